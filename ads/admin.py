@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.pagination import EstimatedCountPaginator
+
 from .models import Campaign, Creative, Event, Slot
 
 
@@ -24,4 +26,10 @@ class SlotAdmin(admin.ModelAdmin):
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
     list_display = ("id", "ts", "tenant", "site", "type")
-    list_filter = ("type",)
+    list_filter = ("type", "tenant")
+    list_select_related = ("tenant", "site")
+    raw_id_fields = ("site",)
+    date_hierarchy = "ts"
+    ordering = ("-ts",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
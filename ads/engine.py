@@ -0,0 +1,327 @@
+"""In-memory ad decisioning.
+
+Each tenant's active campaigns, creatives and slots are compiled into an
+immutable :class:`Snapshot` indexed by placement (site, slot position) and
+creative size, so :meth:`DecisionEngine.decide` runs without touching the
+database. Saving or deleting a Campaign, Creative, Slot or Page bumps the
+tenant's version in the cache (see ``ads.signals``), again once the change
+commits. With a shared cache (``REDIS_URL``) every process notices within
+``ADS_SNAPSHOT_CHECK_INTERVAL`` seconds and recompiles that tenant only; the
+local-memory cache only reaches the process that made the change. Either
+way a snapshot is recompiled once it is ``ADS_SNAPSHOT_MAX_AGE`` seconds old,
+which bounds how long any process serves a stale one.
+
+``targeting_json`` understands these keys, all optional:
+
+* ``sites``: site ids the campaign may serve on
+* ``positions``: slot positions, e.g. ``["hero"]``
+* ``hours``: site-local hours of day, 0-23
+* ``weekdays``: site-local weekdays, Monday is 0
+
+A creative's ``meta_json["weight"]`` (default 1) sets its share of traffic.
+Budgets and ``pacing_json`` are enforced by ``ads.pacing`` before a pick is
+returned.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Campaign, CampaignSpend, Creative, Slot
+from .pacing import PacingPlan, plan_for, reserve
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Candidate:
+    campaign_id: int
+    creative_id: int
+    type: str
+    asset_url: str
+    click_url: str
+    width: int
+    height: int
+    weight: float
+    start_at: datetime | None
+    end_at: datetime | None
+    hours: frozenset[int] | None
+    weekdays: frozenset[int] | None
+    pacing: PacingPlan | None = None
+
+    def eligible(self, now: datetime, local: datetime) -> bool:
+        if self.start_at is not None and now < self.start_at:
+            return False
+        if self.end_at is not None and now >= self.end_at:
+            return False
+        if self.hours is not None and local.hour not in self.hours:
+            return False
+        if self.weekdays is not None and local.weekday() not in self.weekdays:
+            return False
+        return True
+
+
+@dataclass(frozen=True, slots=True)
+class Placement:
+    # Creatives with no size are stored under ``None`` and fit any slot.
+    by_size: dict[str | None, tuple[Candidate, ...]]
+    all: tuple[Candidate, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    tenant_id: int
+    version: int | None
+    placements: dict[tuple[int | None, str | None], Placement]
+    slot_sizes: dict[tuple[int, str], frozenset[str]]
+    checked_at: float = field(default=0.0, compare=False)
+    compiled_at: float = field(default=0.0, compare=False)
+
+    def candidates(self, site_id: int, position: str | None, size: str | None) -> list[Candidate]:
+        if size:
+            sizes = {size}
+        elif position:
+            sizes = self.slot_sizes.get((site_id, position), frozenset())
+        else:
+            sizes = frozenset()
+        positions = (position, None) if position else (None,)
+        found: list[Candidate] = []
+        for site_key in (site_id, None):
+            for position_key in positions:
+                placement = self.placements.get((site_key, position_key))
+                if placement is None:
+                    continue
+                if not sizes:
+                    found.extend(placement.all)
+                    continue
+                found.extend(placement.by_size.get(None, ()))
+                for wanted in sizes:
+                    found.extend(placement.by_size.get(wanted, ()))
+        return found
+
+
+def _as_set(value, cast=int) -> frozenset | None:
+    if not value:
+        return None
+    return frozenset(cast(v) for v in value)
+
+
+def _size_key(width: int, height: int) -> str | None:
+    return f"{width}x{height}" if width and height else None
+
+
+def _active_campaigns(tenant_id: int):
+    return (
+        Campaign.objects.filter(tenant_id=tenant_id, status="active")
+        .exclude(end_at__lte=timezone.now())
+        .values("id", "start_at", "end_at", "budget", "targeting_json", "pacing_json")
+    )
+
+
+def compile_snapshot(tenant_id: int, version: int | None = None) -> Snapshot:
+    campaigns = {row["id"]: row for row in _active_campaigns(tenant_id)}
+    spend = CampaignSpend.objects.in_bulk(list(campaigns))
+    plans = {cid: plan_for(row, spend.get(cid)) for cid, row in campaigns.items()}
+    grouped: dict[tuple, dict[str | None, list[Candidate]]] = {}
+    creatives = Creative.objects.filter(campaign_id__in=list(campaigns)).values(
+        "id", "campaign_id", "type", "asset_url", "click_url", "width", "height", "meta_json"
+    )
+    for row in creatives.order_by("id"):
+        campaign = campaigns[row["campaign_id"]]
+        targeting = campaign["targeting_json"] or {}
+        try:
+            weight = float((row["meta_json"] or {}).get("weight", 1))
+            candidate = Candidate(
+                campaign_id=campaign["id"],
+                creative_id=row["id"],
+                type=row["type"],
+                asset_url=row["asset_url"],
+                click_url=row["click_url"],
+                width=row["width"],
+                height=row["height"],
+                weight=weight,
+                start_at=campaign["start_at"],
+                end_at=campaign["end_at"],
+                hours=_as_set(targeting.get("hours")),
+                weekdays=_as_set(targeting.get("weekdays")),
+                pacing=plans[campaign["id"]],
+            )
+            sites = _as_set(targeting.get("sites")) or (None,)
+            positions = _as_set(targeting.get("positions"), str) or (None,)
+        except (AttributeError, TypeError, ValueError):
+            # Malformed weight or targeting JSON: drop this creative, not the tenant.
+            logger.warning("Skipping creative %s: invalid weight or targeting", row["id"])
+            continue
+        if not weight > 0 or not math.isfinite(weight):
+            continue
+        size = _size_key(row["width"], row["height"])
+        for site_id in sites:
+            for position in positions:
+                by_size = grouped.setdefault((site_id, position), {})
+                by_size.setdefault(size, []).append(candidate)
+
+    placements = {
+        key: Placement(
+            by_size={size: tuple(cands) for size, cands in by_size.items()},
+            all=tuple(c for cands in by_size.values() for c in cands),
+        )
+        for key, by_size in grouped.items()
+    }
+    slot_sizes: dict[tuple[int, str], set[str]] = {}
+    slots = Slot.objects.filter(page__tenant_id=tenant_id, page__site_id__isnull=False)
+    for site_id, position, sizes in slots.values_list("page__site_id", "position", "sizes"):
+        wanted = slot_sizes.setdefault((site_id, position), set())
+        wanted.update(s.strip() for s in sizes.split(",") if s.strip())
+    return Snapshot(
+        tenant_id=tenant_id,
+        version=version,
+        placements=placements,
+        slot_sizes={key: frozenset(sizes) for key, sizes in slot_sizes.items()},
+        checked_at=time.monotonic(),
+        compiled_at=time.monotonic(),
+    )
+
+
+@lru_cache(maxsize=256)
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _version_key(tenant_id: int) -> str:
+    return f"ads:snapshot-version:{tenant_id}"
+
+
+class DecisionEngine:
+    def __init__(self, check_interval: float, max_age: float = 60.0, latency_samples: int = 10_000):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._snapshots: dict[int, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=latency_samples)
+        self._random = random.Random()
+
+    def snapshot(self, tenant_id: int) -> Snapshot:
+        snap = self._snapshots.get(tenant_id)
+        now = time.monotonic()
+        if snap is not None and now - snap.checked_at < self.check_interval:
+            return snap
+        version = cache.get(_version_key(tenant_id))
+        if snap is not None and snap.version == version and now - snap.compiled_at < self.max_age:
+            snap = replace(snap, checked_at=now)
+        else:
+            with self._lock:
+                current = self._snapshots.get(tenant_id)
+                if current is not None and current is not snap:
+                    return current
+                snap = compile_snapshot(tenant_id, version)
+        self._snapshots[tenant_id] = snap
+        return snap
+
+    def decide(
+        self,
+        tenant_id: int,
+        site_id: int,
+        position: str | None = None,
+        size: str | None = None,
+        tz: str = "UTC",
+        now: datetime | None = None,
+    ) -> Candidate | None:
+        """Pick a creative for the placement by weight, or ``None`` if nothing is eligible.
+
+        A pick whose campaign is out of budget (see ``ads.pacing``) is dropped
+        and the draw repeated over the remaining candidates.
+        """
+        start = time.perf_counter()
+        snap = self.snapshot(tenant_id)
+        pool = self._eligible(snap, site_id, position, size, tz, now)
+        choice = None
+        while pool:
+            pick = self._draw(pool)
+            if reserve(pick.pacing, now):
+                choice = pick
+                break
+            pool = [c for c in pool if c.campaign_id != pick.campaign_id]
+        self._latencies.append(time.perf_counter() - start)
+        return choice
+
+    async def adecide(
+        self,
+        tenant_id: int,
+        site_id: int,
+        position: str | None = None,
+        size: str | None = None,
+        tz: str = "UTC",
+        now: datetime | None = None,
+    ) -> Candidate | None:
+        """Async :meth:`decide`; snapshot rebuilds and budget checks run in threads."""
+        start = time.perf_counter()
+        snap = self._snapshots.get(tenant_id)
+        if snap is None or time.monotonic() - snap.checked_at >= self.check_interval:
+            snap = await sync_to_async(self.snapshot)(tenant_id)
+        pool = self._eligible(snap, site_id, position, size, tz, now)
+        choice = None
+        while pool:
+            pick = self._draw(pool)
+            if pick.pacing is None or await sync_to_async(reserve, thread_sensitive=False)(
+                pick.pacing, now
+            ):
+                choice = pick
+                break
+            pool = [c for c in pool if c.campaign_id != pick.campaign_id]
+        self._latencies.append(time.perf_counter() - start)
+        return choice
+
+    def _eligible(
+        self,
+        snap: Snapshot,
+        site_id: int,
+        position: str | None,
+        size: str | None,
+        tz: str,
+        now: datetime | None,
+    ) -> list[Candidate]:
+        now = now or timezone.now()
+        local = now.astimezone(_zone(tz))
+        return [c for c in snap.candidates(site_id, position, size) if c.eligible(now, local)]
+
+    def _draw(self, pool: list[Candidate]) -> Candidate:
+        return self._random.choices(pool, weights=[c.weight for c in pool])[0]
+
+    def invalidate(self, tenant_id: int) -> None:
+        cache.set(_version_key(tenant_id), time.time_ns(), timeout=None)
+        self._snapshots.pop(tenant_id, None)
+
+    def metrics(self) -> dict[str, float | int]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return {"samples": 0, "snapshots": len(self._snapshots), "p50_ms": 0.0, "p99_ms": 0.0}
+
+        def pct(p: float) -> float:
+            return round(samples[min(int(len(samples) * p), len(samples) - 1)] * 1000, 4)
+
+        return {
+            "samples": len(samples),
+            "snapshots": len(self._snapshots),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+        }
+
+
+decision_engine = DecisionEngine(
+    check_interval=settings.ADS_SNAPSHOT_CHECK_INTERVAL, max_age=settings.ADS_SNAPSHOT_MAX_AGE
+)
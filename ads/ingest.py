@@ -0,0 +1,137 @@
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.buffers import BulkWriteBuffer
+from core.models import Site
+from core.resolver import TenantRecord, resolve_site
+
+from .models import Event
+
+event_buffer = BulkWriteBuffer(
+    Event,
+    max_size=settings.EVENT_BUFFER_MAX_SIZE,
+    max_age=settings.EVENT_BUFFER_MAX_AGE,
+    max_pending=settings.EVENT_BUFFER_MAX_PENDING,
+    enabled=settings.EVENT_BUFFER_ENABLED,
+)
+
+
+def record_event(tenant_id: int, site_id: int, type: str, payload=None) -> None:
+    """Queue an :class:`Event` for the next bulk flush (written inline when disabled)."""
+    event_buffer.add(
+        Event(tenant_id=tenant_id, site_id=site_id, type=type, payload_json=payload or {})
+    )
+
+
+async def arecord_event(tenant_id: int, site_id: int, type: str, payload=None) -> None:
+    """Async :func:`record_event`; queuing never blocks, inline writes use the async ORM."""
+    event = Event(tenant_id=tenant_id, site_id=site_id, type=type, payload_json=payload or {})
+    if event_buffer.enabled:
+        event_buffer.add(event)
+    else:
+        await event.asave(force_insert=True)
+
+
+_TYPE_MAX_LENGTH = Event._meta.get_field("type").max_length
+
+
+class BatchTooLarge(Exception):
+    pass
+
+
+def iter_ndjson_lines(
+    chunks: Iterable[bytes], *, gzipped: bool, digest=None, max_bytes: int
+) -> Iterator[bytes]:
+    """Yield the lines of an NDJSON body read as ``chunks``, gunzipping on the fly.
+
+    ``digest`` (an ``hmac`` object) is fed the decompressed bytes as they are
+    produced, so the signature is checked without holding the body. Raises
+    :class:`BatchTooLarge` past ``max_bytes`` of decompressed data (which
+    also bounds gzip bombs) and ``ValueError`` for a corrupt or truncated
+    gzip stream. Concatenated gzip members are accepted.
+    """
+    inflater = zlib.decompressobj(wbits=31) if gzipped else None
+    total = 0
+    pending = b""
+
+    def feed(data: bytes) -> Iterator[bytes]:
+        nonlocal total, pending
+        total += len(data)
+        if total > max_bytes:
+            raise BatchTooLarge
+        if digest is not None:
+            digest.update(data)
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+
+    for chunk in chunks:
+        if inflater is None:
+            yield from feed(chunk)
+            continue
+        data = chunk
+        while data:
+            try:
+                out = inflater.decompress(data, max_bytes - total + 1)
+            except zlib.error as exc:
+                raise ValueError("gzip") from exc
+            yield from feed(out)
+            if inflater.eof:
+                data = inflater.unused_data
+                if data:
+                    inflater = zlib.decompressobj(wbits=31)
+            else:
+                data = inflater.unconsumed_tail
+    if inflater is not None and not inflater.eof:
+        raise ValueError("gzip")
+    if pending:
+        yield pending
+
+
+def _parse_ts(value) -> datetime:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            raise ValueError("ts") from None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            raise ValueError("ts") from None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        if parsed is not None:
+            return parsed
+    raise ValueError("ts")
+
+
+def parse_event_line(tenant: TenantRecord, line: bytes, default_site_id=None) -> Event:
+    """Build an unsaved :class:`Event` from one NDJSON line; ``ValueError`` names the problem.
+
+    Like the form endpoint, the whole object is kept as the payload.
+    """
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ValueError("json") from None
+    if not isinstance(data, dict):
+        raise ValueError("json")
+    type = data.get("type")
+    if not isinstance(type, str) or not 0 < len(type) <= _TYPE_MAX_LENGTH:
+        raise ValueError("type")
+    try:
+        site = resolve_site(tenant.id, data.get("site_id", default_site_id))
+    except Site.DoesNotExist:
+        raise ValueError("site") from None
+    event = Event(tenant_id=tenant.id, site_id=site.id, type=type, payload_json=data)
+    if "ts" in data:
+        event.ts = _parse_ts(data["ts"])
+    return event
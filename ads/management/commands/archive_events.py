@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ads.retention import archive_expired_events
+
+
+class Command(BaseCommand):
+    help = "Move events past each tenant's retention horizon into compressed daily archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", type=int, action="append", dest="tenants")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, tenants=None, chunk_size: int = 5000, **options):
+        archived = archive_expired_events(tenants, chunk_size=chunk_size)
+        for tenant_id, count in archived.items():
+            if count:
+                self.stdout.write(f"Tenant {tenant_id}: archived {count} event(s)")
+        self.stdout.write(f"Archived {sum(archived.values())} event(s)")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ads.pacing import flush_pacing_counters
+
+
+class Command(BaseCommand):
+    help = "Copy live campaign spend/impression counters from the cache to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=0,
+            help="Keep running and flush every N seconds instead of once.",
+        )
+
+    def handle(self, *args, every: float = 0, **options):
+        while True:
+            written = flush_pacing_counters()
+            self.stdout.write(f"Flushed pacing counters for {written} campaign(s)")
+            if not every:
+                return
+            time.sleep(every)
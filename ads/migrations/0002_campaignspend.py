@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 06:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CampaignSpend",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "campaign",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="spend",
+                        serialize=False,
+                        to="ads.campaign",
+                    ),
+                ),
+                ("spend_micros", models.BigIntegerField(default=0)),
+                ("impressions", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
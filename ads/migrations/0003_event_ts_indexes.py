@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0002_campaignspend"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["ts"], name="ads_event_ts_16b731_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["tenant", "ts"], name="ads_event_tenant__b2e3e0_idx"),
+        ),
+    ]
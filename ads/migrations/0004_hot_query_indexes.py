@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0003_event_ts_indexes"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["tenant", "status", "-updated_at"], name="ads_campaig_tenant__dd2ffa_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["tenant", "site", "ts"], name="ads_event_tenant__fc1b3c_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0004_hot_query_indexes"),
+        ("contentmgmt", "0003_api_cursor_indexes"),
+        ("core", "0003_api_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="ads_campaig_updated_eeaf47_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="creative",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="ads_creativ_updated_98e691_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["-created_at", "-id"], name="ads_event_created_6c22c6_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="slot",
+            index=models.Index(fields=["-updated_at", "-id"], name="ads_slot_updated_ee26b4_idx"),
+        ),
+    ]
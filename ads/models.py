@@ -28,10 +28,29 @@ class Campaign(TimeStampedModel):
     targeting_json = models.JSONField(default=dict, blank=True)
     pacing_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant", "status", "-updated_at"]),
+            models.Index(fields=["-updated_at", "-id"]),
+        ]
+
     def __str__(self) -> str:
         return f"{self.tenant_id}:{self.name}"
 
 
+class CampaignSpend(TimeStampedModel):
+    """Durable copy of the pacing counters, flushed from the cache by ``flush_pacing``."""
+
+    campaign = models.OneToOneField(
+        Campaign, on_delete=models.CASCADE, primary_key=True, related_name="spend"
+    )
+    spend_micros = models.BigIntegerField(default=0)
+    impressions = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.campaign_id}:{self.impressions}"
+
+
 class Creative(TimeStampedModel):
     TYPE_CHOICES = (
         ("image", "Image"),
@@ -46,6 +65,9 @@ class Creative(TimeStampedModel):
     click_url = models.URLField()
     meta_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-updated_at", "-id"])]
+
 
 class Slot(TimeStampedModel):
     POSITION_CHOICES = (
@@ -57,6 +79,9 @@ class Slot(TimeStampedModel):
     sizes = models.CharField(max_length=64, default="")
     rules_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-updated_at", "-id"])]
+
 
 class Event(TimeStampedModel):
     TYPE_CHOICES = (
@@ -70,5 +95,13 @@ class Event(TimeStampedModel):
     type = models.CharField(max_length=32, choices=TYPE_CHOICES)
     payload_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["ts"]),
+            models.Index(fields=["tenant", "ts"]),
+            models.Index(fields=["tenant", "site", "ts"]),
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+
 
 # Create your models here.
@@ -0,0 +1,189 @@
+"""Budget and pacing enforcement backed by atomic cache counters.
+
+Per-campaign spend and impression totals live in the default cache, which is
+Redis when ``REDIS_URL`` is set (``INCR`` is atomic across workers) and the
+process-local memory cache otherwise. :func:`reserve` charges one impression
+up front and refunds it if that overshoots a limit, so concurrent workers can
+never jointly exceed a budget. ``manage.py flush_pacing`` copies the totals
+to :class:`CampaignSpend`, which re-seeds the counters if the cache is lost.
+
+``pacing_json`` understands these keys, all optional:
+
+* ``mode``: ``"asap"`` (default) spends as fast as traffic allows; ``"even"``
+  spreads the budget linearly over ``start_at``..``end_at``, or over the
+  (UTC) day for ``daily_budget``
+* ``cpm``: cost per thousand impressions, in the budget's currency
+* ``daily_budget``: spend cap per UTC day
+* ``max_impressions``: lifetime impression cap
+
+``Campaign.budget`` of 0 means no lifetime spend cap.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Campaign, CampaignSpend
+
+MICROS = 1_000_000
+DAY_SECONDS = 24 * 60 * 60
+# Daily counters only need to outlive their day.
+DAILY_TTL = 2 * DAY_SECONDS
+
+
+@dataclass(frozen=True, slots=True)
+class PacingPlan:
+    campaign_id: int
+    mode: str
+    cost_micros: int
+    budget_micros: int
+    daily_budget_micros: int
+    max_impressions: int
+    start_at: datetime | None
+    end_at: datetime | None
+    # Durable totals as of the snapshot, used if the cache lost its counters.
+    seed_spend: int = 0
+    seed_impressions: int = 0
+
+
+def _micros(value) -> int:
+    try:
+        return int(Decimal(str(value or 0)) * MICROS)
+    except InvalidOperation:
+        return 0
+
+
+def plan_for(campaign: dict, spend: CampaignSpend | None = None) -> PacingPlan:
+    """Build the plan for a ``Campaign`` values() row; uncapped campaigns are counted too."""
+    pacing = campaign["pacing_json"] or {}
+    return PacingPlan(
+        campaign_id=campaign["id"],
+        mode="even" if pacing.get("mode") == "even" else "asap",
+        cost_micros=_micros(pacing.get("cpm")) // 1000,
+        budget_micros=_micros(campaign["budget"]),
+        daily_budget_micros=_micros(pacing.get("daily_budget")),
+        max_impressions=int(pacing.get("max_impressions") or 0),
+        start_at=campaign["start_at"],
+        end_at=campaign["end_at"],
+        seed_spend=spend.spend_micros if spend else 0,
+        seed_impressions=spend.impressions if spend else 0,
+    )
+
+
+def _keys(campaign_id: int, now: datetime) -> tuple[str, str, str]:
+    day = now.astimezone(dt_timezone.utc).strftime("%Y%m%d")
+    return (
+        f"pacing:{campaign_id}:spend",
+        f"pacing:{campaign_id}:impressions",
+        f"pacing:{campaign_id}:{day}:spend",
+    )
+
+
+def _incr(key: str, delta: int, seed: int = 0, timeout: int | None = None) -> int:
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Missing (first use or evicted): seed it, then retry so racing workers all count.
+        cache.add(key, seed, timeout=timeout)
+        return cache.incr(key, delta)
+
+
+def _spend_limit(plan: PacingPlan, now: datetime) -> tuple[int, int]:
+    """Return the (lifetime, today) spend allowed at ``now``; 0 means unlimited."""
+    budget, daily = plan.budget_micros, plan.daily_budget_micros
+    if plan.mode != "even":
+        return budget, daily
+    if budget and plan.start_at and plan.end_at and plan.end_at > plan.start_at:
+        elapsed = (now - plan.start_at) / (plan.end_at - plan.start_at)
+        budget = int(budget * min(max(elapsed, 0.0), 1.0))
+    if daily:
+        utc = now.astimezone(dt_timezone.utc)
+        seconds = utc.hour * 3600 + utc.minute * 60 + utc.second
+        daily = int(daily * seconds / DAY_SECONDS)
+    # Always leave room for one impression so pacing can start.
+    return (
+        max(budget, plan.cost_micros) if budget else 0,
+        max(daily, plan.cost_micros) if daily else 0,
+    )
+
+
+def reserve(plan: PacingPlan | None, now: datetime | None = None) -> bool:
+    """Charge one impression to the campaign; refund it and return False if over a limit.
+
+    Lifetime impressions and spend are counted for every campaign, capped or
+    not, so ``flush_pacing`` reports delivery for all of them.
+    """
+    if plan is None:
+        return True
+    now = now or timezone.now()
+    spend_key, impressions_key, daily_key = _keys(plan.campaign_id, now)
+    budget, daily = _spend_limit(plan, now)
+
+    charged = [(impressions_key, 1)]
+    impressions = _incr(impressions_key, 1, plan.seed_impressions)
+    ok = not plan.max_impressions or impressions <= plan.max_impressions
+    if ok and plan.cost_micros:
+        charged.append((spend_key, plan.cost_micros))
+        spent = _incr(spend_key, plan.cost_micros, plan.seed_spend)
+        ok = not budget or spent <= budget
+    if ok and plan.cost_micros and daily:
+        charged.append((daily_key, plan.cost_micros))
+        ok = _incr(daily_key, plan.cost_micros, 0, DAILY_TTL) <= daily
+    if not ok:
+        for key, delta in charged:
+            cache.decr(key, delta)
+    return ok
+
+
+def counters(campaign_ids: list[int], now: datetime | None = None) -> dict[int, dict]:
+    """Return the live spend/impression totals for ``campaign_ids`` from the cache."""
+    now = now or timezone.now()
+    keys = {cid: _keys(cid, now) for cid in campaign_ids}
+    values = cache.get_many([k for triple in keys.values() for k in triple])
+    return {
+        cid: {
+            "spend_micros": values.get(spend),
+            "impressions": values.get(impressions),
+            "today_spend_micros": values.get(daily, 0),
+        }
+        for cid, (spend, impressions, daily) in keys.items()
+    }
+
+
+def flush_pacing_counters(batch_size: int = 500) -> int:
+    """Copy live cache totals into :class:`CampaignSpend`; returns rows written.
+
+    Every campaign is checked, not just active ones: one that completed or was
+    paused since the last flush still has its final counts in the cache.
+    Campaigns without live counters are skipped.
+    """
+    ids = list(Campaign.objects.order_by("id").values_list("id", flat=True))
+    written = 0
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i : i + batch_size]
+        live = counters(chunk)
+        with transaction.atomic():
+            durable = CampaignSpend.objects.select_for_update().in_bulk(chunk)
+            rows = []
+            for cid in chunk:
+                current = durable.get(cid)
+                spend = max(live[cid]["spend_micros"] or 0, current.spend_micros if current else 0)
+                imps = max(live[cid]["impressions"] or 0, current.impressions if current else 0)
+                if current and (spend, imps) == (current.spend_micros, current.impressions):
+                    continue
+                if not current and not (spend or imps):
+                    continue
+                rows.append(CampaignSpend(campaign_id=cid, spend_micros=spend, impressions=imps))
+            CampaignSpend.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["campaign"],
+                update_fields=["spend_micros", "impressions", "updated_at"],
+            )
+        written += len(rows)
+    return written
@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from contentmgmt.models import Page
+
+from .engine import decision_engine
+from .models import Campaign, Creative, Slot
+
+
+def _invalidate(tenant_id):
+    # Bumped now, so this transaction reads its own write, and after commit,
+    # since another process may have compiled the old rows under the first
+    # bump in between and would otherwise keep them until the next change.
+    decision_engine.invalidate(tenant_id)
+    transaction.on_commit(lambda: decision_engine.invalidate(tenant_id))
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+def _recompile_for_campaign(sender, instance, **kwargs):
+    _invalidate(instance.tenant_id)
+
+
+@receiver(post_save, sender=Creative)
+@receiver(post_delete, sender=Creative)
+def _recompile_for_creative(sender, instance, **kwargs):
+    tenant_id = (
+        Campaign.objects.filter(pk=instance.campaign_id).values_list("tenant_id", flat=True).first()
+    )
+    if tenant_id is not None:
+        _invalidate(tenant_id)
+
+
+@receiver(post_save, sender=Slot)
+@receiver(post_delete, sender=Slot)
+def _recompile_for_slot(sender, instance, **kwargs):
+    tenant_id = Page.objects.filter(pk=instance.page_id).values_list("tenant_id", flat=True).first()
+    if tenant_id is not None:
+        _invalidate(tenant_id)
+
+
+@receiver(post_save, sender=Page)
+def _recompile_for_page(sender, instance, update_fields=None, **kwargs):
+    # Slots inherit the page's site; publishing alone does not move them.
+    if update_fields is None or "site" in update_fields:
+        _invalidate(instance.tenant_id)
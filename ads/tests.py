@@ -0,0 +1,266 @@
+import tempfile
+from dataclasses import replace
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analytics.rollup import run_rollup
+from contentmgmt.models import Page
+from core.buffers import BulkWriteBuffer
+from core.models import Brand, Site, Tenant
+
+from .engine import DecisionEngine, compile_snapshot
+from .models import Campaign, CampaignSpend, Creative, Event, Slot
+from .pacing import counters, flush_pacing_counters
+from .retention import archive_expired_events, iter_archived_events
+
+
+class EventBufferTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+
+    def test_rows_are_written_in_one_bulk_flush(self):
+        buffer = BulkWriteBuffer(Event, max_size=100, max_age=3600)
+        self.addCleanup(buffer.stop)
+        for _ in range(3):
+            buffer.add(Event(tenant=self.tenant, site=self.site, type="splash_view"))
+        self.assertEqual(Event.objects.count(), 0)
+        self.assertEqual(buffer.metrics()["depth"], 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(Event.objects.count(), 3)
+        metrics = buffer.metrics()
+        self.assertEqual(metrics["depth"], 0)
+        self.assertEqual(metrics["written"], 3)
+        self.assertEqual(metrics["flushes"], 1)
+
+    def test_pending_rows_are_capped(self):
+        buffer = BulkWriteBuffer(Event, max_size=100, max_age=3600, max_pending=2)
+        self.addCleanup(buffer.stop)
+        buffer.extend([Event(tenant=self.tenant, site=self.site, type="click") for _ in range(5)])
+        metrics = buffer.metrics()
+        self.assertEqual(metrics["depth"], 2)
+        self.assertEqual(metrics["dropped"], 3)
+
+
+class DecisionEngineTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1")
+        self.brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=self.brand, name="S1")
+        self.engine = DecisionEngine(check_interval=0)
+
+    def _creative(self, campaign, width=300, height=250, **meta):
+        return Creative.objects.create(
+            campaign=campaign,
+            type="image",
+            asset_url="https://cdn.example.com/a.png",
+            click_url="https://example.com",
+            width=width,
+            height=height,
+            meta_json=meta,
+        )
+
+    def test_decides_from_snapshot_without_queries(self):
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        creative = self._creative(campaign)
+        self.engine.decide(self.tenant.id, self.site.id)
+        with self.assertNumQueries(0):
+            choice = self.engine.decide(self.tenant.id, self.site.id, "hero")
+        self.assertEqual(choice.creative_id, creative.id)
+        self.assertEqual(self.engine.metrics()["samples"], 2)
+
+    def test_malformed_creative_is_skipped(self):
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        self._creative(campaign, weight="heavy")
+        bad_targeting = Campaign.objects.create(
+            tenant=self.tenant, name="C2", targeting_json={"hours": ["noon"]}
+        )
+        self._creative(bad_targeting)
+        good = self._creative(campaign, weight="2")
+        with self.assertLogs("ads.engine", "WARNING"):
+            choice = self.engine.decide(self.tenant.id, self.site.id, "hero")
+        self.assertEqual(choice.creative_id, good.id)
+
+    def test_targeting_and_flight_dates(self):
+        other = Site.objects.create(tenant=self.tenant, brand=self.brand, name="S2")
+        Campaign.objects.create(tenant=self.tenant, name="paused", status="paused")
+        later = Campaign.objects.create(
+            tenant=self.tenant, name="later", start_at=timezone.now() + timedelta(days=1)
+        )
+        self._creative(later)
+        targeted = Campaign.objects.create(
+            tenant=self.tenant,
+            name="targeted",
+            targeting_json={"sites": [other.id], "positions": ["banner"]},
+        )
+        creative = self._creative(targeted, width=728, height=90)
+
+        self.assertIsNone(self.engine.decide(self.tenant.id, self.site.id, "banner"))
+        self.assertIsNone(self.engine.decide(self.tenant.id, other.id, "hero"))
+        self.assertEqual(
+            self.engine.decide(self.tenant.id, other.id, "banner").creative_id, creative.id
+        )
+        self.assertIsNone(self.engine.decide(self.tenant.id, other.id, "banner", "300x250"))
+
+    def test_slot_sizes_and_weights(self):
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        self._creative(campaign, weight=0)
+        self._creative(campaign, width=728, height=90)
+        banner = self._creative(campaign, width=320, height=50)
+        page = Page.objects.create(tenant=self.tenant, brand=self.brand, site=self.site, name="P")
+        Slot.objects.create(page=page, position="banner", sizes="320x50")
+
+        for _ in range(20):
+            choice = self.engine.decide(self.tenant.id, self.site.id, "banner")
+            self.assertEqual(choice.creative_id, banner.id)
+
+    def test_changes_recompile_the_tenant(self):
+        self.assertIsNone(self.engine.decide(self.tenant.id, self.site.id))
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        creative = self._creative(campaign)
+        self.assertEqual(self.engine.decide(self.tenant.id, self.site.id).creative_id, creative.id)
+        campaign.status = "paused"
+        campaign.save()
+        self.assertIsNone(self.engine.decide(self.tenant.id, self.site.id))
+
+    def test_version_bump_repeats_after_commit(self):
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        self._creative(campaign)
+        stale = compile_snapshot(self.tenant.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            campaign.status = "paused"
+            campaign.save()
+            # Another process compiles the committed (old) rows under the new version.
+            version = cache.get(f"ads:snapshot-version:{self.tenant.id}")
+            self.engine._snapshots[self.tenant.id] = replace(stale, version=version)
+        self.assertIsNone(self.engine.decide(self.tenant.id, self.site.id))
+
+    def test_snapshots_are_recompiled_past_max_age(self):
+        campaign = Campaign.objects.create(tenant=self.tenant, name="C1")
+        self._creative(campaign)
+        fresh, aged = DecisionEngine(check_interval=0), DecisionEngine(check_interval=0, max_age=0)
+        for engine in (fresh, aged):
+            self.assertIsNotNone(engine.decide(self.tenant.id, self.site.id))
+        # A change whose version bump this process never sees (no signal here;
+        # a per-process cache in another worker).
+        Campaign.objects.filter(pk=campaign.pk).update(status="paused")
+        self.assertIsNotNone(fresh.decide(self.tenant.id, self.site.id))
+        self.assertIsNone(aged.decide(self.tenant.id, self.site.id))
+
+
+class PacingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        self.engine = DecisionEngine(check_interval=0)
+
+    def _campaign(self, budget, **pacing):
+        campaign = Campaign.objects.create(
+            tenant=self.tenant, name="C", budget=budget, pacing_json=pacing
+        )
+        Creative.objects.create(
+            campaign=campaign,
+            type="image",
+            asset_url="https://cdn.example.com/a.png",
+            click_url="https://example.com",
+        )
+        return campaign
+
+    def test_asap_stops_at_budget_and_flushes(self):
+        campaign = self._campaign("0.01", cpm="5")  # two impressions at 0.005 each
+        served = [self.engine.decide(self.tenant.id, self.site.id) for _ in range(4)]
+        self.assertEqual(sum(1 for c in served if c is not None), 2)
+        self.assertEqual(counters([campaign.id])[campaign.id]["spend_micros"], 10_000)
+
+        self.assertEqual(flush_pacing_counters(), 1)
+        spend = CampaignSpend.objects.get(campaign=campaign)
+        self.assertEqual((spend.spend_micros, spend.impressions), (10_000, 2))
+
+    def test_even_pacing_follows_the_flight(self):
+        now = timezone.now()
+        campaign = self._campaign("10", cpm="1000", mode="even")  # 1.00 per impression
+        campaign.start_at = now - timedelta(hours=1)
+        campaign.end_at = now + timedelta(hours=3)
+        campaign.save()
+        served = [self.engine.decide(self.tenant.id, self.site.id, now=now) for _ in range(5)]
+        # A quarter of the flight has elapsed: 2.50 of 10.00 may be spent.
+        self.assertEqual(sum(1 for c in served if c is not None), 2)
+
+    def test_uncapped_and_completed_campaigns_are_flushed(self):
+        campaign = self._campaign(0)
+        served = [self.engine.decide(self.tenant.id, self.site.id) for _ in range(3)]
+        self.assertTrue(all(served))
+        campaign.status = "completed"
+        campaign.save()
+
+        self.assertEqual(flush_pacing_counters(), 1)
+        self.assertEqual(CampaignSpend.objects.get(campaign=campaign).impressions, 3)
+        self.assertEqual(flush_pacing_counters(), 0)
+
+    def test_impression_cap(self):
+        self._campaign(0, max_impressions=3)
+        served = [self.engine.decide(self.tenant.id, self.site.id) for _ in range(5)]
+        self.assertEqual(sum(1 for c in served if c is not None), 3)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        archive_root = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_root.cleanup)
+        self.enterContext(override_settings(EVENT_ARCHIVE_ROOT=archive_root.name))
+        self.tenant = Tenant.objects.create(name="T1", settings_json={"event_retention_days": 30})
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+
+    def test_expired_events_are_archived_in_chunks_and_readable(self):
+        now = timezone.now()
+        old = now - timedelta(days=40)
+        for i in range(5):
+            Event.objects.create(
+                tenant=self.tenant, site=self.site, ts=old, type="click", payload_json={"i": i}
+            )
+        kept = Event.objects.create(tenant=self.tenant, site=self.site, ts=now, type="click")
+        # Not rolled up yet: nothing may leave the hot table.
+        self.assertEqual(archive_expired_events(now=now)[self.tenant.id], 0)
+        run_rollup(settle_seconds=0)
+
+        archived = archive_expired_events(chunk_size=2, now=now)
+        self.assertEqual(archived[self.tenant.id], 5)
+        self.assertEqual(list(Event.objects.values_list("id", flat=True)), [kept.id])
+
+        start = old.date() - timedelta(days=1)
+        rows = list(iter_archived_events(self.tenant.id, start, now.date()))
+        self.assertEqual([row["payload_json"]["i"] for row in rows], [0, 1, 2, 3, 4])
+        self.assertEqual(archive_expired_events(now=now)[self.tenant.id], 0)
+
+
+class EventAdminTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+
+    def test_changelist_pages_without_counting_the_table(self):
+        Event.objects.bulk_create(
+            Event(tenant=self.tenant, site=self.site, type="click") for _ in range(150)
+        )
+        # Session, user, tenant filter, capped count, page, date hierarchy (2).
+        with self.assertNumQueries(7) as queries:
+            resp = self.client.get("/admin/ads/event/?type=click")
+        self.assertEqual(resp.status_code, 200)
+        sql = [query["sql"] for query in queries.captured_queries]
+        self.assertFalse(any('COUNT(*) AS "__count" FROM "ads_event"' in q for q in sql))
+        self.assertEqual(sum("LIMIT 100000" in q for q in sql), 1)
+        self.assertContains(resp, "150 events")
@@ -1,26 +1,72 @@
 from rest_framework import viewsets
 
+from core.api import ValuesReadMixin
+
 from .models import Campaign, Creative, Event, Slot
 from .serializers import CampaignSerializer, CreativeSerializer, EventSerializer, SlotSerializer
 
 # Create your views here.
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Campaign.objects.all().order_by("-updated_at")
     serializer_class = CampaignSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "status",
+        "budget",
+        "start_at",
+        "end_at",
+        "targeting_json",
+        "pacing_json",
+        "tenant",
+    )
 
 
-class CreativeViewSet(viewsets.ModelViewSet):
+class CreativeViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Creative.objects.all().order_by("-updated_at")
     serializer_class = CreativeSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "type",
+        "asset_url",
+        "width",
+        "height",
+        "click_url",
+        "meta_json",
+        "campaign",
+    )
 
 
-class SlotViewSet(viewsets.ModelViewSet):
+class SlotViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Slot.objects.all().order_by("-updated_at")
     serializer_class = SlotSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "position",
+        "sizes",
+        "rules_json",
+        "page",
+    )
 
 
-class EventViewSet(viewsets.ReadOnlyModelViewSet):
+class EventViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Event.objects.all().order_by("-created_at")
     serializer_class = EventSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "ts",
+        "type",
+        "payload_json",
+        "tenant",
+        "site",
+    )
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import DailyRollup, HourlyRollup
+
+
+@admin.register(HourlyRollup)
+class HourlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "tenant", "site", "type", "campaign_id", "creative_id", "count")
+    list_filter = ("type",)
+    list_select_related = ("tenant", "site")
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "tenant", "site", "type", "campaign_id", "creative_id", "count")
+    list_filter = ("type",)
+    list_select_related = ("tenant", "site")
@@ -0,0 +1,92 @@
+"""Constant-memory exports of events and rollups.
+
+Rows are read with keyset pagination on ``(<time column>, id)`` and encoded
+chunk by chunk, so neither the queryset cache nor the response ever holds
+more than one chunk regardless of the export size.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+from ads.models import Event
+
+from .models import DailyRollup, HourlyRollup
+
+
+@dataclass(frozen=True)
+class ExportKind:
+    model: type
+    time_field: str
+    fields: tuple[str, ...]
+
+    def queryset(self, **filters) -> QuerySet:
+        return self.model.objects.filter(**filters).values(*self.fields)
+
+
+_ROLLUP_FIELDS = ("tenant_id", "site_id", "type", "campaign_id", "creative_id", "count")
+
+EXPORT_KINDS = {
+    "events": ExportKind(Event, "ts", ("id", "ts", "tenant_id", "site_id", "type", "payload_json")),
+    "hourly": ExportKind(HourlyRollup, "hour", ("id", "hour", *_ROLLUP_FIELDS)),
+    "daily": ExportKind(DailyRollup, "day", ("id", "day", *_ROLLUP_FIELDS)),
+}
+
+
+def _keyset_page(qs: QuerySet, time_field: str, last: tuple | None) -> QuerySet:
+    """``qs`` in ``(time_field, id)`` order, after the row keyed ``last`` if given."""
+    if last is not None:
+        qs = qs.filter(
+            Q(**{f"{time_field}__gt": last[0]}) | Q(**{time_field: last[0], "id__gt": last[1]})
+        )
+    return qs.order_by(time_field, "id")
+
+
+def iter_keyset(qs: QuerySet, time_field: str, chunk_size: int = 2000) -> Iterator[list[dict]]:
+    """Yield ``values()`` rows of ``qs`` in ``(time_field, id)`` order, one chunk at a time."""
+    last = None
+    while True:
+        rows = list(_keyset_page(qs, time_field, last)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1][time_field], rows[-1]["id"])
+
+
+def encode_ndjson(chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows).encode()
+
+
+def encode_csv(chunks: Iterable[list[dict]], fields: tuple[str, ...]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow(
+                json.dumps(row[f], cls=DjangoJSONEncoder) if isinstance(row[f], dict) else row[f]
+                for f in fields
+            )
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollup import run_rollup
+
+
+class Command(BaseCommand):
+    help = "Add events newer than the rollup watermark into the hourly/daily rollup tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=60,
+            help="Leave events younger than this for the next run.",
+        )
+
+    def handle(self, *args, chunk_size: int, settle_seconds: int, **options):
+        processed = run_rollup(chunk_size=chunk_size, settle_seconds=settle_seconds)
+        self.stdout.write(f"Rolled up {processed} event(s)")
@@ -0,0 +1,64 @@
+from django.db import models
+from django.utils import timezone
+
+from core.models import Site, Tenant
+
+
+class TimeStampedModel(models.Model):
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class EventRollup(TimeStampedModel):
+    # Campaign/creative are plain ids (0 = none) so rollups outlive deleted campaigns
+    # and the unique constraint never has to compare NULLs.
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="+")
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="+")
+    type = models.CharField(max_length=32)
+    campaign_id = models.BigIntegerField(default=0)
+    creative_id = models.BigIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class HourlyRollup(EventRollup):
+    hour = models.DateTimeField(help_text="Start of the site-local hour")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "hour", "site", "type", "campaign_id", "creative_id"],
+                name="analytics_hourly_rollup_key",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.site_id}:{self.hour:%Y-%m-%d %H}:{self.type}={self.count}"
+
+
+class DailyRollup(EventRollup):
+    day = models.DateField(help_text="Site-local calendar day")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "day", "site", "type", "campaign_id", "creative_id"],
+                name="analytics_daily_rollup_key",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.site_id}:{self.day}:{self.type}={self.count}"
+
+
+class RollupWatermark(TimeStampedModel):
+    name = models.CharField(max_length=64, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.name}:{self.last_event_id}"
@@ -0,0 +1,104 @@
+import gzip
+import json
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.test import Client, TestCase
+
+from ads.models import Event
+from core.models import Brand, Site, Tenant
+
+from .export import iter_keyset
+from .models import DailyRollup, HourlyRollup
+from .rollup import run_rollup
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(
+            tenant=self.tenant, brand=brand, name="S1", timezone="America/New_York"
+        )
+
+    def _event(self, ts, type="impression", **payload):
+        Event.objects.create(
+            tenant=self.tenant, site=self.site, ts=ts, type=type, payload_json=payload
+        )
+
+    def test_local_day_buckets_and_rerun_is_safe(self):
+        # 02:30 UTC on the 2nd is still the 1st in New York.
+        late = datetime(2025, 3, 2, 2, 30, tzinfo=dt_timezone.utc)
+        self._event(late, campaign_id=7, creative_id=9)
+        self._event(late, campaign_id=7, creative_id=9)
+        self._event(late, type="splash_view")
+        self.assertEqual(run_rollup(settle_seconds=0), 3)
+        self.assertEqual(run_rollup(settle_seconds=0), 0)
+
+        day = DailyRollup.objects.get(type="impression")
+        self.assertEqual((day.day, day.campaign_id, day.count), (date(2025, 3, 1), 7, 2))
+        hour = HourlyRollup.objects.get(type="splash_view")
+        self.assertEqual(hour.hour, datetime(2025, 3, 2, 2, 0, tzinfo=dt_timezone.utc))
+
+        self._event(late, campaign_id=["7"], creative_id=["9"])
+        self.assertEqual(run_rollup(settle_seconds=0), 1)
+        self.assertEqual(DailyRollup.objects.get(type="impression").count, 3)
+        self.assertEqual(HourlyRollup.objects.count(), 2)
+
+    def test_watermark_waits_for_unsettled_lower_ids(self):
+        from django.utils import timezone
+
+        now = timezone.now()
+        # The lower id is still inside the settle window; the higher one is not.
+        young = Event.objects.create(tenant=self.tenant, site=self.site, ts=now, type="click")
+        Event.objects.create(
+            tenant=self.tenant,
+            site=self.site,
+            ts=now,
+            type="click",
+            created_at=now - timezone.timedelta(minutes=5),
+        )
+        self.assertEqual(run_rollup(settle_seconds=60), 0)
+
+        Event.objects.filter(pk=young.pk).update(created_at=now - timezone.timedelta(minutes=2))
+        self.assertEqual(run_rollup(settle_seconds=60), 2)
+        self.assertEqual(DailyRollup.objects.get(type="click").count, 2)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        other = Tenant.objects.create(name="T2")
+        other_site = Site.objects.create(tenant=other, brand=brand, name="S2")
+        ts = datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc)
+        for i in range(5):
+            Event.objects.create(
+                tenant=self.tenant, site=self.site, ts=ts, type="click", payload_json={"i": i}
+            )
+        Event.objects.create(tenant=other, site=other_site, ts=ts, type="click")
+
+    def test_keyset_walks_ties_on_ts(self):
+        qs = Event.objects.filter(tenant=self.tenant).values("id", "ts")
+        chunks = list(iter_keyset(qs, "ts", chunk_size=2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        ids = [row["id"] for chunk in chunks for row in chunk]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_streams_ndjson_csv_and_gzip(self):
+        c = Client()
+        url = "/api/admin/export/events"
+        resp = c.get(url, {"tenant": self.tenant.id, "since": "2025-03-01"})
+        self.assertEqual(resp.status_code, 200)
+        lines = b"".join(resp.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)["payload_json"]["i"] for line in lines], list(range(5)))
+
+        resp = c.get(url, {"tenant": self.tenant.id, "output": "csv", "gzip": "1"})
+        rows = gzip.decompress(b"".join(resp.streaming_content)).decode().splitlines()
+        self.assertEqual(rows[0], "id,ts,tenant_id,site_id,type,payload_json")
+        self.assertEqual(len(rows), 6)
+
+        empty = c.get(url, {"tenant": self.tenant.id, "until": "2025-03-01"})
+        self.assertEqual(b"".join(empty.streaming_content), b"")
+        self.assertEqual(c.get(url).status_code, 400)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("export/<str:kind>", views.ExportView.as_view(), name="analytics-export"),
+]
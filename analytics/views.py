@@ -0,0 +1,73 @@
+from datetime import date, datetime, time
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import response, status, views
+
+from .export import EXPORT_KINDS, encode_csv, encode_ndjson, gzip_stream, iter_keyset
+
+
+def _parse_bound(value: str, as_date: bool) -> date | datetime | None:
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        return None
+    if as_date:
+        return parsed.date() if isinstance(parsed, datetime) else parsed
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, time.min)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class ExportView(views.APIView):
+    """Stream a tenant's events or rollups as NDJSON or CSV, optionally gzipped.
+
+    Query parameters: ``tenant`` (required), ``site``, ``type``, ``since`` and
+    ``until`` (ISO dates or datetimes, ``until`` exclusive), ``output``
+    (``ndjson`` or ``csv``; ``format`` is taken by DRF) and ``gzip=1``.
+    """
+
+    def get(self, request, kind: str):
+        spec = EXPORT_KINDS.get(kind)
+        if spec is None:
+            return response.Response({"detail": "unknown export"}, status=status.HTTP_404_NOT_FOUND)
+        params = request.query_params
+        fmt = params.get("output", "ndjson")
+        if fmt not in ("ndjson", "csv"):
+            return response.Response(
+                {"output": "expected ndjson or csv"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            filters = {"tenant_id": int(params["tenant"])}
+            if params.get("site"):
+                filters["site_id"] = int(params["site"])
+        except (KeyError, ValueError):
+            return response.Response({"tenant": "required"}, status=status.HTTP_400_BAD_REQUEST)
+        if params.get("type"):
+            filters["type"] = params["type"]
+        for param, lookup in (("since", "gte"), ("until", "lt")):
+            if not params.get(param):
+                continue
+            value = _parse_bound(params[param], as_date=spec.time_field == "day")
+            if value is None:
+                return response.Response(
+                    {param: "expected an ISO date or datetime"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            filters[f"{spec.time_field}__{lookup}"] = value
+
+        qs = spec.queryset(**filters)
+        chunks = iter_keyset(qs, spec.time_field)
+        if fmt == "csv":
+            body, content_type = encode_csv(chunks, spec.fields), "text/csv"
+        else:
+            body, content_type = encode_ndjson(chunks), "application/x-ndjson"
+        filename = f"{kind}-{filters['tenant_id']}.{fmt}"
+        if params.get("gzip") in ("1", "true"):
+            body, content_type, filename = gzip_stream(body), "application/gzip", filename + ".gz"
+        resp = StreamingHttpResponse(body, content_type=content_type)
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return resp
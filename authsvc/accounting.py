@@ -0,0 +1,195 @@
+"""Interim/stop accounting for guest sessions.
+
+Controllers report cumulative ``bytes_up``/``bytes_down`` per client every
+few minutes. A batch is collapsed to the newest update per session, then
+applied as one ``UPDATE ... FROM (VALUES ...)`` per chunk. Each row carries
+its own guard (``acct_at`` older than the update), so retried or reordered
+batches never roll counters back: last writer wins on the reported
+timestamp, not on arrival order.
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .identity import normalize_mac
+from .models import Session
+from .presence import mark_closed
+
+_PARAMS_PER_ROW = ["pk"] * 5
+_MAX_CHUNK = 5000
+
+
+@dataclass(frozen=True, slots=True)
+class AccountingUpdate:
+    session_id: int | None
+    mac: str
+    bytes_up: int
+    bytes_down: int
+    ts: datetime
+    stop: bool
+
+
+@dataclass
+class AccountingResult:
+    applied: int = 0
+    stale: int = 0
+    unknown: int = 0
+    rejected: list[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "applied": self.applied,
+            "stale": self.stale,
+            "unknown": self.unknown,
+            "rejected": self.rejected,
+        }
+
+
+def _parse_ts(value) -> datetime | None:
+    if isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            if parsed is not None and timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed, dt_timezone.utc)
+            return parsed
+    except (ValueError, OverflowError, OSError):
+        # Out-of-range epochs (OverflowError, or OSError on some platforms),
+        # NaN and impossible calendar dates.
+        return None
+    return None
+
+
+def parse_update(item) -> AccountingUpdate:
+    """Validate one raw update; raises ``ValueError`` with a short reason."""
+    if not isinstance(item, dict):
+        raise ValueError("not an object")
+    session_id = item.get("session_id")
+    mac = item.get("mac") or ""
+    if session_id is None and not mac:
+        raise ValueError("session_id or mac required")
+    if session_id is not None and (isinstance(session_id, bool) or not isinstance(session_id, int)):
+        raise ValueError("session_id")
+    counters = []
+    for name in ("bytes_up", "bytes_down"):
+        value = item.get(name, 0)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(name)
+        counters.append(value)
+    ts = _parse_ts(item.get("ts"))
+    if ts is None:
+        raise ValueError("ts")
+    return AccountingUpdate(
+        session_id=session_id,
+        mac=normalize_mac(mac) if isinstance(mac, str) else "",
+        bytes_up=counters[0],
+        bytes_down=counters[1],
+        ts=ts,
+        stop=bool(item.get("stop")),
+    )
+
+
+def _open_sessions_by_mac(site_id: int, macs: set[str]) -> dict[str, int]:
+    # Newest open session wins when a device somehow has several.
+    rows = (
+        Session.objects.filter(site_id=site_id, mac__in=macs, end_at__isnull=True)
+        .order_by("start_at", "pk")
+        .values_list("mac", "pk")
+    )
+    return dict(rows)
+
+
+def _apply_chunk(site_id: int, updates: dict[int, AccountingUpdate]) -> tuple[int, int]:
+    """Apply newest-per-session updates; returns ``(applied, known)``.
+
+    Raw SQL for PostgreSQL and SQLite >= 3.33, which both support
+    ``UPDATE ... FROM`` and name VALUES columns ``column1``, ``column2``, ...
+    A ``Case``/``When`` update builds an ORM expression per row and column,
+    and compiling those costs more than running the query. The freshness
+    guard is in the join condition, so a concurrent newer write still wins.
+    """
+    known = Session.objects.filter(site_id=site_id, pk__in=updates).count()
+    if not known:
+        return 0, 0
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+    table = qn(Session._meta.db_table)
+    params: list = []
+    for u in updates.values():
+        params += [u.session_id, u.bytes_up, u.bytes_down, adapt(u.ts), u.stop]
+    rows = ", ".join(["(%s, %s, %s, %s, %s)"] * len(updates))
+    sql = (
+        f"UPDATE {table} SET bytes_up = v.bytes_up, bytes_down = v.bytes_down, "
+        f"acct_at = v.ts, end_at = CASE WHEN v.stop THEN v.ts ELSE {table}.end_at END, "
+        f"updated_at = %s "
+        f"FROM (SELECT column1 AS id, column2 AS bytes_up, column3 AS bytes_down, "
+        f"column4 AS ts, column5 AS stop FROM (VALUES {rows}) AS updates) AS v "
+        f"WHERE {table}.id = v.id AND {table}.site_id = %s "
+        f"AND ({table}.acct_at IS NULL OR {table}.acct_at < v.ts)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [adapt(timezone.now()), *params, site_id])
+        return cursor.rowcount, known
+
+
+def apply_accounting(site_id: int, items: list) -> AccountingResult:
+    """Apply a controller's batch of accounting updates for one site.
+
+    Items that fail validation are reported back by index in ``rejected``;
+    the rest are applied. ``stale`` counts updates older than what is
+    stored, ``unknown`` those matching no session (or no open one, by MAC).
+    """
+    result = AccountingResult()
+    newest: dict[int, AccountingUpdate] = {}
+    by_mac: dict[str, AccountingUpdate] = {}
+
+    def keep(bucket: dict, key, update: AccountingUpdate) -> None:
+        seen = bucket.get(key)
+        if seen is None or seen.ts < update.ts:
+            bucket[key] = update
+        else:
+            result.stale += 1
+
+    for index, item in enumerate(items):
+        try:
+            update = parse_update(item)
+        except ValueError as exc:
+            result.rejected.append({"index": index, "error": str(exc)})
+            continue
+        if update.session_id is not None:
+            keep(newest, update.session_id, update)
+        else:
+            keep(by_mac, update.mac, update)
+
+    if by_mac:
+        sessions = _open_sessions_by_mac(site_id, set(by_mac))
+        for mac, update in by_mac.items():
+            if mac in sessions:
+                keep(newest, sessions[mac], replace(update, session_id=sessions[mac]))
+            else:
+                result.unknown += 1
+
+    ids = list(newest)
+    batch = min(_MAX_CHUNK, connection.ops.bulk_batch_size(_PARAMS_PER_ROW, ids) or _MAX_CHUNK)
+    for start in range(0, len(ids), batch):
+        chunk = {pk: newest[pk] for pk in ids[start : start + batch]}
+        applied, known = _apply_chunk(site_id, chunk)
+        result.applied += applied
+        result.stale += known - applied
+        result.unknown += len(chunk) - known
+
+    # The UPDATE skips signals, so closed sessions leave the active index here.
+    stopped = [pk for pk, u in newest.items() if u.stop]
+    if stopped:
+        closed = Session.objects.filter(site_id=site_id, pk__in=stopped, end_at__isnull=False)
+        for pk, mac in closed.values_list("pk", "mac"):
+            mark_closed(site_id, mac, pk)
+    return result
@@ -0,0 +1,29 @@
+from django.contrib import admin
+
+from core.pagination import EstimatedCountPaginator
+
+from .models import GuestUser, Session
+
+
+@admin.register(GuestUser)
+class GuestUserAdmin(admin.ModelAdmin):
+    list_display = ("id", "tenant", "mac", "email", "created_at", "updated_at")
+    list_filter = ("tenant",)
+    list_select_related = ("tenant",)
+    date_hierarchy = "created_at"
+    ordering = ("-created_at",)
+    readonly_fields = ("mac_hash",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Session)
+class SessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "site", "user", "mac", "start_at", "end_at", "bytes_up", "bytes_down")
+    list_filter = ("site",)
+    list_select_related = ("site", "user")
+    raw_id_fields = ("user",)
+    date_hierarchy = "start_at"
+    ordering = ("-start_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,154 @@
+"""Guest identity keyed on ``(tenant, mac_hash)``.
+
+``mac_hash`` is an HMAC-SHA256 of the normalized MAC keyed with the tenant's
+``secret_salt``: deterministic per tenant, not reversible without the salt,
+and backed by a unique index so an insert-or-fetch is one statement and two
+concurrent logins from the same device cannot create two guests.
+
+Rotating a tenant's salt changes every hash; run ``backfill_mac_hashes
+--rehash --tenant <id>`` afterwards.
+"""
+
+import hashlib
+import hmac
+import re
+
+from django.utils import timezone
+
+from core.resolver import TenantRecord
+
+from .models import GuestUser
+
+_HEX_ONLY = re.compile(r"[^0-9a-f]")
+
+
+def normalize_mac(mac: str) -> str:
+    """``AA-BB-CC-DD-EE-FF`` and ``aabb.ccdd.eeff`` -> ``aa:bb:cc:dd:ee:ff``.
+
+    Values that are not 12 hex digits are kept as-is (lowercased), so an odd
+    controller still gets a stable identity.
+    """
+    value = (mac or "").strip().lower()
+    digits = _HEX_ONLY.sub("", value)
+    if len(digits) != 12:
+        return value
+    return ":".join(digits[i : i + 2] for i in range(0, 12, 2))
+
+
+def mac_hash(secret_salt: str, mac: str) -> str:
+    key = (secret_salt or "").encode("utf-8")
+    return hmac.new(key, normalize_mac(mac).encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def upsert_guest(tenant: TenantRecord, mac: str, *, email: str = "") -> int:
+    """Return the id of the tenant's guest for ``mac``, creating it if needed.
+
+    One ``INSERT ... ON CONFLICT (tenant_id, mac_hash) DO UPDATE`` that only
+    touches ``updated_at`` (the guest's last login), so an existing row keeps
+    its contact details; ``email`` only fills a blank one.
+    """
+    now = timezone.now()
+    (guest,) = GuestUser.objects.bulk_create(
+        [
+            GuestUser(
+                tenant_id=tenant.id,
+                mac=normalize_mac(mac),
+                mac_hash=mac_hash(tenant.secret_salt, mac),
+                email=email,
+                created_at=now,
+                updated_at=now,
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["tenant", "mac_hash"],
+        update_fields=["updated_at"],
+    )
+    if email:
+        GuestUser.objects.filter(pk=guest.pk, email="").update(email=email)
+    return guest.pk
+
+
+def backfill_mac_hashes(
+    guest_model=None,
+    session_model=None,
+    tenant_model=None,
+    *,
+    tenant_ids=None,
+    rehash: bool = False,
+    chunk_size: int = 2000,
+) -> tuple[int, int]:
+    """Fill ``mac_hash`` (and normalize ``mac``) in id order, ``chunk_size`` rows at a time.
+
+    Guests that turn out to share a device are merged into the row already
+    holding the hash (else the oldest in the chunk): its blank contact fields
+    are filled from the duplicates, their sessions are moved over and the
+    duplicates deleted. Only one chunk is in memory at a time. Takes the model
+    classes so the migration can pass historical ones. Returns
+    ``(updated, merged)``.
+    """
+    if guest_model is None:
+        from core.models import Tenant
+
+        from .models import Session
+
+        guest_model, session_model, tenant_model = GuestUser, Session, Tenant
+
+    tenants = tenant_model.objects.order_by("pk").values_list("pk", "secret_salt")
+    if tenant_ids:
+        tenants = tenants.filter(pk__in=tenant_ids)
+    updated = merged = 0
+    for tenant_id, salt in tenants.iterator():
+        guests = guest_model.objects.filter(tenant_id=tenant_id)
+        if not rehash:
+            guests = guests.filter(mac_hash="")
+        last_id = 0
+        while True:
+            chunk = list(guests.filter(pk__gt=last_id).order_by("pk")[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            u, m = _backfill_chunk(guest_model, session_model, tenant_id, salt, chunk)
+            updated += u
+            merged += m
+    return updated, merged
+
+
+def _backfill_chunk(guest_model, session_model, tenant_id, salt, chunk) -> tuple[int, int]:
+    for guest in chunk:
+        guest.mac = normalize_mac(guest.mac)
+        guest.mac_hash = mac_hash(salt, guest.mac)
+    chunk_ids = [g.pk for g in chunk]
+    keepers = {
+        g.mac_hash: g
+        for g in guest_model.objects.filter(
+            tenant_id=tenant_id, mac_hash__in={g.mac_hash for g in chunk}
+        ).exclude(pk__in=chunk_ids)
+    }
+    dirty_keepers = {}
+    survivors = []
+    duplicates: dict[int, list[int]] = {}
+    for guest in chunk:
+        keeper = keepers.setdefault(guest.mac_hash, guest)
+        if keeper is guest:
+            survivors.append(guest)
+            continue
+        duplicates.setdefault(keeper.pk, []).append(guest.pk)
+        changed = False
+        for field in ("email", "phone", "social_id", "consent_json"):
+            if not getattr(keeper, field) and getattr(guest, field):
+                setattr(keeper, field, getattr(guest, field))
+                changed = True
+        if changed and keeper.pk not in chunk_ids:
+            dirty_keepers[keeper.pk] = keeper
+
+    for keeper_id, dup_ids in duplicates.items():
+        session_model.objects.filter(user_id__in=dup_ids).update(user_id=keeper_id)
+        guest_model.objects.filter(pk__in=dup_ids).delete()
+    guest_model.objects.bulk_update(
+        survivors, ["mac", "mac_hash", "email", "phone", "social_id", "consent_json"]
+    )
+    if dirty_keepers:
+        guest_model.objects.bulk_update(
+            list(dirty_keepers.values()), ["email", "phone", "social_id", "consent_json"]
+        )
+    return len(survivors), sum(map(len, duplicates.values()))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from authsvc.identity import backfill_mac_hashes
+
+
+class Command(BaseCommand):
+    help = "Fill GuestUser.mac_hash in bounded chunks, merging guests that share a device."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", type=int, action="append", dest="tenants")
+        parser.add_argument(
+            "--rehash", action="store_true", help="Recompute every hash (after a salt rotation)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, tenants=None, rehash=False, chunk_size: int = 2000, **options):
+        updated, merged = backfill_mac_hashes(
+            tenant_ids=tenants, rehash=rehash, chunk_size=chunk_size
+        )
+        self.stdout.write(f"Hashed {updated} guest(s), merged {merged} duplicate(s)")
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authsvc.models import Voucher
+from authsvc.vouchers import (
+    DEFAULT_CODE_LENGTH,
+    MAX_CODE_LENGTH,
+    MIN_CODE_LENGTH,
+    generate_vouchers,
+)
+from core.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Generate a batch of unique voucher codes for a tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tenant", type=int)
+        parser.add_argument("count", type=int)
+        parser.add_argument("--length", type=int, default=DEFAULT_CODE_LENGTH)
+        parser.add_argument("--policy", default="{}", help="JSON policy stored on each voucher")
+        parser.add_argument("--batch", default="", help="Batch id (generated if omitted)")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--output", help="Write the generated codes to this file")
+
+    def handle(self, *args, tenant: int, count: int, **options):
+        if not MIN_CODE_LENGTH <= options["length"] <= MAX_CODE_LENGTH:
+            raise CommandError(f"--length must be {MIN_CODE_LENGTH}..{MAX_CODE_LENGTH}")
+        if not Tenant.objects.filter(pk=tenant).exists():
+            raise CommandError(f"Tenant {tenant} does not exist")
+        try:
+            policy = json.loads(options["policy"])
+        except ValueError as exc:
+            raise CommandError(f"--policy is not valid JSON: {exc}") from exc
+        batch = generate_vouchers(
+            tenant,
+            count,
+            length=options["length"],
+            policy=policy,
+            batch=options["batch"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            codes = Voucher.objects.filter(batch=batch).values_list("code", flat=True)
+            with open(options["output"], "w") as fh:
+                for code in codes.iterator(chunk_size=options["chunk_size"]):
+                    fh.write(code + "\n")
+        self.stdout.write(f"Generated {count} voucher(s) in batch {batch}")
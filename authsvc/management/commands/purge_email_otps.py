@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authsvc.otp import purge_expired_otps
+
+
+class Command(BaseCommand):
+    help = "Delete EmailOTP audit rows that expired more than --days ago, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.EMAIL_OTP_RETENTION_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, days: int, chunk_size: int, **options):
+        before = timezone.now() - timezone.timedelta(days=days)
+        deleted = purge_expired_otps(before, chunk_size=chunk_size)
+        self.stdout.write(f"Deleted {deleted} expired OTP row(s)")
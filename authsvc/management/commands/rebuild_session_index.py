@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from authsvc.models import Session
+from authsvc.presence import rebuild_site
+
+
+class Command(BaseCommand):
+    help = "Reload the active-session index from the database (e.g. after a cache flush)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--site", type=int, action="append", dest="sites")
+
+    def handle(self, *args, sites=None, **options):
+        if not sites:
+            sites = (
+                Session.objects.filter(end_at__isnull=True)
+                .values_list("site_id", flat=True)
+                .distinct()
+                .order_by("site_id")
+            )
+        total = 0
+        for site_id in sites:
+            total += rebuild_site(site_id)
+        self.stdout.write(f"Indexed {total} open session(s)")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0002_guestuser_mac_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="voucher",
+            name="batch",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=32),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:12
+
+import hashlib
+import hmac
+import re
+
+from django.db import migrations, models
+
+# A frozen copy of authsvc.identity as of this migration, so later changes to
+# the app code (or its imports) cannot alter or break it.
+_HEX_ONLY = re.compile(r"[^0-9a-f]")
+_CONTACT_FIELDS = ("email", "phone", "social_id", "consent_json")
+
+
+def _normalize_mac(mac):
+    value = (mac or "").strip().lower()
+    digits = _HEX_ONLY.sub("", value)
+    if len(digits) != 12:
+        return value
+    return ":".join(digits[i : i + 2] for i in range(0, 12, 2))
+
+
+def _mac_hash(secret_salt, mac):
+    key = (secret_salt or "").encode("utf-8")
+    return hmac.new(key, mac.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _backfill_chunk(GuestUser, Session, tenant_id, salt, chunk):
+    for guest in chunk:
+        guest.mac = _normalize_mac(guest.mac)
+        guest.mac_hash = _mac_hash(salt, guest.mac)
+    chunk_ids = [g.pk for g in chunk]
+    # Guests of earlier chunks already hold their hash.
+    keepers = {
+        g.mac_hash: g
+        for g in GuestUser.objects.filter(
+            tenant_id=tenant_id, mac_hash__in={g.mac_hash for g in chunk}
+        ).exclude(pk__in=chunk_ids)
+    }
+    dirty_keepers = {}
+    survivors = []
+    duplicates = {}
+    for guest in chunk:
+        keeper = keepers.setdefault(guest.mac_hash, guest)
+        if keeper is guest:
+            survivors.append(guest)
+            continue
+        duplicates.setdefault(keeper.pk, []).append(guest.pk)
+        for field in _CONTACT_FIELDS:
+            if not getattr(keeper, field) and getattr(guest, field):
+                setattr(keeper, field, getattr(guest, field))
+                if keeper.pk not in chunk_ids:
+                    dirty_keepers[keeper.pk] = keeper
+    for keeper_id, dup_ids in duplicates.items():
+        Session.objects.filter(user_id__in=dup_ids).update(user_id=keeper_id)
+        GuestUser.objects.filter(pk__in=dup_ids).delete()
+    GuestUser.objects.bulk_update(survivors, ["mac", "mac_hash", *_CONTACT_FIELDS])
+    if dirty_keepers:
+        GuestUser.objects.bulk_update(list(dirty_keepers.values()), list(_CONTACT_FIELDS))
+
+
+def backfill(apps, schema_editor, chunk_size=2000):
+    """Fill mac_hash, merging guests that share a device, before the unique constraint."""
+    GuestUser = apps.get_model("authsvc", "GuestUser")
+    Session = apps.get_model("authsvc", "Session")
+    Tenant = apps.get_model("core", "Tenant")
+    for tenant_id, salt in Tenant.objects.order_by("pk").values_list("pk", "secret_salt"):
+        guests = GuestUser.objects.filter(tenant_id=tenant_id, mac_hash="")
+        last_id = 0
+        while True:
+            chunk = list(guests.filter(pk__gt=last_id).order_by("pk")[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            _backfill_chunk(GuestUser, Session, tenant_id, salt, chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0003_voucher_batch"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="guestuser",
+            constraint=models.UniqueConstraint(
+                fields=("tenant", "mac_hash"), name="authsvc_guestuser_tenant_mac_hash"
+            ),
+        ),
+    ]
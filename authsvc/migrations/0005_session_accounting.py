@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0004_guestuser_mac_hash_unique"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="acct_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(fields=["site", "mac"], name="authsvc_ses_site_id_c6483f_idx"),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+def drop_plaintext_codes(apps, schema_editor):
+    # Pending codes now live in the cache; old rows keep no usable secret.
+    apps.get_model("authsvc", "EmailOTP").objects.exclude(code="").update(code="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0005_session_accounting"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_plaintext_codes, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="emailotp",
+            name="code_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="emailotp",
+            name="code",
+            field=models.CharField(blank=True, default="", max_length=6),
+        ),
+        migrations.AlterField(
+            model_name="emailotp",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
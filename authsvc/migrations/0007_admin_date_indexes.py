@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0006_emailotp_code_hash"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="guestuser",
+            index=models.Index(fields=["created_at"], name="authsvc_gue_created_908197_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(fields=["start_at"], name="authsvc_ses_start_a_f52374_idx"),
+        ),
+    ]
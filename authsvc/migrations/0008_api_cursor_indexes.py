@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authsvc", "0007_admin_date_indexes"),
+        ("core", "0003_api_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="voucher",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="authsvc_vou_created_e04a76_idx"
+            ),
+        ),
+    ]
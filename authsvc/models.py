@@ -21,6 +21,14 @@ class GuestUser(TimeStampedModel):
     mac_hash = models.CharField(max_length=64, blank=True, default="")
     consent_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "mac_hash"], name="authsvc_guestuser_tenant_mac_hash"
+            )
+        ]
+        indexes = [models.Index(fields=["created_at"])]
+
     def __str__(self) -> str:
         return f"{self.tenant_id}:{self.mac}"
 
@@ -31,9 +39,13 @@ class Voucher(TimeStampedModel):
     code = models.CharField(max_length=64, unique=True)
     policy_json = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="active")
+    batch = models.CharField(max_length=32, blank=True, default="", db_index=True)
     used_by_mac = models.CharField(max_length=17, null=True, blank=True)
     used_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
 
 class Session(TimeStampedModel):
     user = models.ForeignKey(GuestUser, on_delete=models.CASCADE, related_name="sessions")
@@ -44,14 +56,19 @@ class Session(TimeStampedModel):
     end_at = models.DateTimeField(null=True, blank=True)
     bytes_up = models.BigIntegerField(default=0)
     bytes_down = models.BigIntegerField(default=0)
+    acct_at = models.DateTimeField(null=True, blank=True)
     policy_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["site", "mac"]), models.Index(fields=["start_at"])]
+
 
 class EmailOTP(TimeStampedModel):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     email = models.EmailField()
-    code = models.CharField(max_length=6)
-    expires_at = models.DateTimeField()
+    code = models.CharField(max_length=6, blank=True, default="")
+    code_hash = models.CharField(max_length=64, blank=True, default="")
+    expires_at = models.DateTimeField(db_index=True)
     verified_at = models.DateTimeField(null=True, blank=True)
 
 
@@ -0,0 +1,112 @@
+"""Email one-time passwords held in the cache.
+
+Only an HMAC of the code is stored, under ``email-otp:{tenant}:{email}`` with the
+OTP's TTL, so verifying is one ``get_many`` (code hash + failed attempts) and
+nothing accumulates. Each tenant/email gets ``EMAIL_OTP_MAX_ATTEMPTS`` wrong
+guesses per TTL window, reissuing does not reset them, and a code is
+single-use: of two concurrent correct guesses only the one that deletes the
+key succeeds.
+
+``EmailOTP`` rows are an optional, append-only audit trail (one row when a
+code is issued, one when it is verified) written in batches.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.buffers import BulkWriteBuffer
+from core.resolver import TenantRecord
+
+from .models import EmailOTP
+
+otp_audit_buffer = BulkWriteBuffer(
+    EmailOTP,
+    max_size=settings.EVENT_BUFFER_MAX_SIZE,
+    max_age=settings.EVENT_BUFFER_MAX_AGE,
+    max_pending=settings.EVENT_BUFFER_MAX_PENDING,
+    enabled=settings.EVENT_BUFFER_ENABLED,
+)
+
+
+def _keys(tenant_id: int, email: str) -> tuple[str, str]:
+    return f"email-otp:{tenant_id}:{email}", f"email-otp-attempts:{tenant_id}:{email}"
+
+
+def _code_hash(tenant: TenantRecord, email: str, code: str) -> str:
+    key = f"{settings.SECRET_KEY}:{tenant.secret_salt}".encode("utf-8")
+    return hmac.new(key, f"{email}:{code}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def _audit(tenant: TenantRecord, email: str, code_hash: str, verified: bool = False) -> None:
+    if not settings.EMAIL_OTP_AUDIT:
+        return
+    now = timezone.now()
+    otp_audit_buffer.add(
+        EmailOTP(
+            tenant_id=tenant.id,
+            email=email,
+            code_hash=code_hash,
+            expires_at=now + timezone.timedelta(seconds=settings.EMAIL_OTP_TTL),
+            verified_at=now if verified else None,
+        )
+    )
+
+
+def issue_otp(tenant: TenantRecord, email: str) -> str:
+    """Create a fresh 6-digit code for ``email``, replacing any pending one."""
+    email = normalize_email(email)
+    code = f"{secrets.randbelow(10**6):06d}"
+    code_hash = _code_hash(tenant, email, code)
+    key, attempts_key = _keys(tenant.id, email)
+    cache.set(key, code_hash, timeout=settings.EMAIL_OTP_TTL)
+    cache.add(attempts_key, 0, timeout=settings.EMAIL_OTP_TTL)
+    _audit(tenant, email, code_hash)
+    return code
+
+
+def verify_otp(tenant: TenantRecord, email: str, code: str) -> bool:
+    email = normalize_email(email)
+    key, attempts_key = _keys(tenant.id, email)
+    found = cache.get_many([key, attempts_key])
+    stored = found.get(key)
+    if stored is None:
+        return False
+    if found.get(attempts_key, 0) >= settings.EMAIL_OTP_MAX_ATTEMPTS:
+        cache.delete(key)
+        return False
+    code_hash = _code_hash(tenant, email, code or "")
+    if not hmac.compare_digest(stored, code_hash):
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            cache.add(attempts_key, 1, timeout=settings.EMAIL_OTP_TTL)
+            attempts = 1
+        if attempts >= settings.EMAIL_OTP_MAX_ATTEMPTS:
+            cache.delete(key)
+        return False
+    if not cache.delete(key):
+        return False
+    cache.delete(attempts_key)
+    _audit(tenant, email, code_hash, verified=True)
+    return True
+
+
+def purge_expired_otps(before=None, chunk_size: int = 5000) -> int:
+    """Delete audit rows that expired before ``before``, ``chunk_size`` at a time."""
+    before = before or timezone.now()
+    expired = EmailOTP.objects.filter(expires_at__lt=before)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += EmailOTP.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,109 @@
+"""Active-session index: which MACs hold an open ``Session`` at a site.
+
+One cache key per ``(site, mac)`` holds the open session's id, so checking a
+batch of MACs is a single ``get_many``. A per-site marker says the site's
+entries are complete: while it is present a missing key means "no session";
+when it is gone (first use, cache flush, eviction) the next lookup rebuilds
+that site from one indexed query. Entries outlive their marker, so a site
+never looks complete with entries already expired.
+
+Session saves and deletes keep the index current through signals; bulk paths
+that skip signals (accounting stops) call ``mark_closed`` themselves.
+
+A marker set in one worker vouches for entries written by all of them, so
+the index needs a shared cache: it is only used with
+``SESSION_INDEX_ENABLED`` (on by default with ``REDIS_URL``). Otherwise
+lookups run one indexed query on the ``(site, mac)`` index.
+"""
+
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .identity import normalize_mac
+from .models import Session
+
+_REBUILD_CHUNK = 5000
+
+
+def _entry_key(site_id: int, mac: str) -> str:
+    return f"active-session:{site_id}:{mac}"
+
+
+def _marker_key(site_id: int) -> str:
+    return f"active-sessions-built:{site_id}"
+
+
+def _entry_ttl() -> int:
+    return settings.SESSION_INDEX_TTL + 60
+
+
+def rebuild_site(site_id: int) -> int:
+    """Reload the open sessions of ``site_id``; returns how many were indexed."""
+    rows = (
+        Session.objects.filter(site_id=site_id, end_at__isnull=True)
+        .order_by("start_at", "pk")
+        .values_list("mac", "pk")
+    )
+    count = 0
+    batch: dict[str, int] = {}
+    for mac, pk in rows.iterator(chunk_size=_REBUILD_CHUNK):
+        # Later (newer) sessions overwrite older ones for the same device.
+        batch[_entry_key(site_id, mac)] = pk
+        if len(batch) >= _REBUILD_CHUNK:
+            cache.set_many(batch, timeout=_entry_ttl())
+            count += len(batch)
+            batch = {}
+    if batch:
+        cache.set_many(batch, timeout=_entry_ttl())
+        count += len(batch)
+    cache.set(_marker_key(site_id), 1, timeout=settings.SESSION_INDEX_TTL)
+    return count
+
+
+def _query_sessions(site_id: int, macs: set[str]) -> dict[str, int | None]:
+    result: dict[str, int | None] = dict.fromkeys(macs)
+    rows = (
+        Session.objects.filter(site_id=site_id, mac__in=macs, end_at__isnull=True)
+        .order_by("start_at", "pk")
+        .values_list("mac", "pk")
+    )
+    # Later (newer) sessions overwrite older ones for the same device.
+    result.update(rows)
+    return result
+
+
+def active_sessions(site_id: int, macs: Iterable[str]) -> dict[str, int | None]:
+    """Map each MAC (normalized) to its open session id at ``site_id``, or ``None``."""
+    wanted = {normalize_mac(mac) for mac in macs}
+    if not settings.SESSION_INDEX_ENABLED:
+        return _query_sessions(site_id, wanted)
+    keys = {_entry_key(site_id, mac): mac for mac in wanted}
+    found = cache.get_many([*keys, _marker_key(site_id)])
+    if _marker_key(site_id) not in found:
+        rebuild_site(site_id)
+        found = cache.get_many(list(keys))
+    result: dict[str, int | None] = dict.fromkeys(wanted)
+    for key, mac in keys.items():
+        result[mac] = found.get(key)
+    return result
+
+
+def active_session(site_id: int, mac: str) -> int | None:
+    return active_sessions(site_id, [mac])[normalize_mac(mac)]
+
+
+def mark_open(site_id: int, mac: str, session_id: int) -> None:
+    if not settings.SESSION_INDEX_ENABLED:
+        return
+    cache.set(_entry_key(site_id, normalize_mac(mac)), session_id, timeout=_entry_ttl())
+
+
+def mark_closed(site_id: int, mac: str, session_id: int) -> None:
+    """Drop the entry if it still points at ``session_id``; a newer session stays."""
+    if not settings.SESSION_INDEX_ENABLED:
+        return
+    key = _entry_key(site_id, normalize_mac(mac))
+    if cache.get(key) == session_id:
+        cache.delete(key)
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from .models import Voucher
+from .vouchers import DEFAULT_CODE_LENGTH, MAX_CODE_LENGTH, MIN_CODE_LENGTH
+
+
+class VoucherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Voucher
+        fields = "__all__"
+
+
+class VoucherBatchSerializer(serializers.Serializer):
+    tenant = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=1, max_value=500_000)
+    length = serializers.IntegerField(
+        min_value=MIN_CODE_LENGTH, max_value=MAX_CODE_LENGTH, default=DEFAULT_CODE_LENGTH
+    )
+    policy_json = serializers.JSONField(default=dict)
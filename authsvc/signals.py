@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.resolver import resolve_tenant
+
+from .identity import mac_hash, normalize_mac
+from .models import GuestUser, Session
+from .presence import mark_closed, mark_open
+
+
+@receiver(pre_save, sender=GuestUser)
+def _fill_mac_hash(sender, instance, **kwargs):
+    # Rows created outside upsert_guest (admin, shell) still need their key.
+    if not instance.mac_hash:
+        instance.mac = normalize_mac(instance.mac)
+        instance.mac_hash = mac_hash(resolve_tenant(instance.tenant_id).secret_salt, instance.mac)
+
+
+@receiver(post_save, sender=Session)
+def _index_session(sender, instance, **kwargs):
+    if instance.end_at is None:
+        mark_open(instance.site_id, instance.mac, instance.pk)
+    else:
+        mark_closed(instance.site_id, instance.mac, instance.pk)
+
+
+@receiver(post_delete, sender=Session)
+def _unindex_session(sender, instance, **kwargs):
+    mark_closed(instance.site_id, instance.mac, instance.pk)
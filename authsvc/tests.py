@@ -0,0 +1,390 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import counters
+from core.models import Brand, Site, Tenant
+from core.resolver import resolve_tenant
+
+from .accounting import apply_accounting
+from .identity import backfill_mac_hashes, mac_hash, normalize_mac, upsert_guest
+from .models import EmailOTP, GuestUser, Session, Voucher
+from .otp import issue_otp, purge_expired_otps, verify_otp
+from .presence import active_session, active_sessions
+from .vouchers import CODE_ALPHABET, generate_vouchers, redeem_voucher
+
+
+class IdentityTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1", secret_salt="s1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+
+    def test_normalize_mac(self):
+        for raw in ("AA-BB-CC-DD-EE-FF", "aabb.ccdd.eeff", " aa:bb:cc:dd:ee:ff "):
+            self.assertEqual(normalize_mac(raw), "aa:bb:cc:dd:ee:ff")
+        self.assertEqual(normalize_mac("Not-A-Mac"), "not-a-mac")
+
+    def test_upsert_returns_one_guest_per_device(self):
+        tenant = resolve_tenant(self.tenant.id)
+        first = upsert_guest(tenant, "AA-BB-CC-DD-EE-FF")
+        self.assertEqual(upsert_guest(tenant, "aa:bb:cc:dd:ee:ff", email="a@b.com"), first)
+        upsert_guest(tenant, "aa:bb:cc:dd:ee:ff", email="other@b.com")
+        guest = GuestUser.objects.get()
+        self.assertEqual((guest.pk, guest.email), (first, "a@b.com"))
+        self.assertEqual(guest.mac_hash, mac_hash("s1", "aa:bb:cc:dd:ee:ff"))
+
+        other = Tenant.objects.create(name="T2", secret_salt="s2")
+        self.assertNotEqual(upsert_guest(resolve_tenant(other.id), "aa:bb:cc:dd:ee:ff"), first)
+
+    def test_save_fills_mac_hash(self):
+        guest = GuestUser.objects.create(tenant=self.tenant, mac="AA:BB:CC:DD:EE:01")
+        self.assertEqual(guest.mac, "aa:bb:cc:dd:ee:01")
+        self.assertEqual(guest.mac_hash, mac_hash("s1", guest.mac))
+
+    def test_rehash_after_salt_rotation_merges_guests(self):
+        old = upsert_guest(resolve_tenant(self.tenant.id), "aa:bb:cc:dd:ee:ff", email="a@b.com")
+        Session.objects.create(user_id=old, site=self.site, mac="aa:bb:cc:dd:ee:ff")
+        self.tenant.secret_salt = "s2"
+        self.tenant.save()
+        new = upsert_guest(resolve_tenant(self.tenant.id), "aa:bb:cc:dd:ee:ff")
+        self.assertNotEqual(new, old)
+
+        self.assertEqual(backfill_mac_hashes(rehash=True, chunk_size=1), (1, 1))
+        guest = GuestUser.objects.get()
+        self.assertEqual((guest.pk, guest.email), (new, "a@b.com"))
+        self.assertEqual(Session.objects.get().user_id, new)
+        self.assertEqual(backfill_mac_hashes(), (0, 0))
+
+
+class AccountingTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1", secret_salt="s1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        guest = GuestUser.objects.create(tenant=self.tenant, mac="aa:bb:cc:dd:ee:01")
+        self.sessions = [
+            Session.objects.create(user=guest, site=self.site, mac=f"aa:bb:cc:dd:ee:{i:02x}")
+            for i in range(3)
+        ]
+
+    def test_last_writer_wins_on_timestamp(self):
+        a, b, c = (s.pk for s in self.sessions)
+        result = apply_accounting(
+            self.site.id,
+            [
+                {"session_id": a, "bytes_up": 10, "bytes_down": 20, "ts": 1000},
+                {"session_id": a, "bytes_up": 5, "bytes_down": 5, "ts": 900},
+                {"mac": "AA-BB-CC-DD-EE-01", "bytes_up": 7, "ts": "2025-01-01T00:00:00Z"},
+                {"session_id": c, "bytes_up": 1, "bytes_down": 2, "ts": 1000, "stop": True},
+                {"session_id": c + 100, "bytes_up": 1, "ts": 1000},
+                {"mac": "aa:bb:cc:dd:ee:99", "ts": 1000},
+                {"session_id": a, "bytes_up": -1, "ts": 1000},
+                {"bytes_up": 1, "ts": 1000},
+                {"session_id": a, "bytes_up": 1, "ts": 1e20},
+            ],
+        )
+        self.assertEqual((result.applied, result.stale, result.unknown), (3, 1, 2))
+        self.assertEqual([r["index"] for r in result.rejected], [6, 7, 8])
+        self.assertEqual(result.rejected[2]["error"], "ts")
+
+        rows = {s.pk: s for s in Session.objects.all()}
+        self.assertEqual((rows[a].bytes_up, rows[a].bytes_down), (10, 20))
+        self.assertEqual(rows[b].bytes_up, 7)
+        self.assertIsNone(rows[a].end_at)
+        self.assertEqual(rows[c].end_at, rows[c].acct_at)
+
+        # A late retry of an older interim update does not roll counters back.
+        result = apply_accounting(self.site.id, [{"session_id": a, "bytes_up": 1, "ts": 999}])
+        self.assertEqual((result.applied, result.stale), (0, 1))
+        self.assertEqual(Session.objects.get(pk=a).bytes_up, 10)
+
+    def test_endpoint_checks_signature_and_site(self):
+        other = Site.objects.create(tenant=self.tenant, brand=self.site.brand, name="S2")
+        session = self.sessions[0]
+
+        def post(site_id, secret="s1"):
+            body = json.dumps(
+                {
+                    "tenant_id": self.tenant.id,
+                    "site_id": site_id,
+                    "updates": [{"session_id": session.pk, "bytes_down": 42, "ts": 1000}],
+                }
+            ).encode()
+            signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            return Client(enforce_csrf_checks=True).post(
+                "/acct",
+                body,
+                content_type="application/json",
+                headers={"X-Portal-Signature": f"sha256={signature}"},
+            )
+
+        self.assertEqual(post(self.site.id, secret="wrong").status_code, 401)
+        # Sessions of another site are not touched.
+        self.assertEqual(post(other.id).json()["unknown"], 1)
+        resp = post(self.site.id)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["applied"], 1)
+        self.assertEqual(Session.objects.get(pk=session.pk).bytes_down, 42)
+
+
+@override_settings(SESSION_INDEX_ENABLED=True)
+class ActiveSessionIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="T1", secret_salt="s1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        self.guest = GuestUser.objects.create(tenant=self.tenant, mac="aa:bb:cc:dd:ee:01")
+
+    def _open(self, mac):
+        return Session.objects.create(user=self.guest, site=self.site, mac=mac)
+
+    def test_index_follows_session_lifecycle(self):
+        first = self._open("aa:bb:cc:dd:ee:01")
+        self._open("aa:bb:cc:dd:ee:02").delete()
+        with self.assertNumQueries(1):  # first lookup loads the site
+            found = active_sessions(self.site.id, ["AA-BB-CC-DD-EE-01", "aa:bb:cc:dd:ee:02"])
+        self.assertEqual(found, {"aa:bb:cc:dd:ee:01": first.pk, "aa:bb:cc:dd:ee:02": None})
+
+        second = self._open("aa:bb:cc:dd:ee:01")
+        first.end_at = timezone.now()
+        first.save()  # closing an older session keeps the device's newer one
+        with self.assertNumQueries(0):
+            self.assertEqual(active_session(self.site.id, "aa:bb:cc:dd:ee:01"), second.pk)
+
+        apply_accounting(self.site.id, [{"session_id": second.pk, "ts": time.time(), "stop": True}])
+        self.assertIsNone(active_session(self.site.id, "aa:bb:cc:dd:ee:01"))
+
+    def test_rebuilds_after_cache_loss(self):
+        session = self._open("aa:bb:cc:dd:ee:03")
+        cache.clear()
+        self.assertEqual(active_session(self.site.id, "aa:bb:cc:dd:ee:03"), session.pk)
+
+    @override_settings(SESSION_INDEX_ENABLED=False)
+    def test_without_shared_cache_lookups_query_the_database(self):
+        self.assertIsNone(active_session(self.site.id, "aa:bb:cc:dd:ee:05"))
+        # As if opened by another worker, whose process-local cache this one cannot see.
+        Session.objects.bulk_create(
+            [Session(user=self.guest, site=self.site, mac="aa:bb:cc:dd:ee:05")]
+        )
+        with self.assertNumQueries(1):
+            found = active_sessions(self.site.id, ["aa:bb:cc:dd:ee:05", "aa:bb:cc:dd:ee:06"])
+        session = Session.objects.get(mac="aa:bb:cc:dd:ee:05")
+        self.assertEqual(found, {"aa:bb:cc:dd:ee:05": session.pk, "aa:bb:cc:dd:ee:06": None})
+
+    @override_settings(ALLOW_UNAUTH_EVENTS=True)
+    def test_batch_lookup_endpoint(self):
+        session = self._open("aa:bb:cc:dd:ee:04")
+        resp = Client().post(
+            "/sessions/active",
+            {
+                "tenant_id": self.tenant.id,
+                "site_id": self.site.id,
+                "macs": ["aa:bb:cc:dd:ee:04", "aa:bb:cc:dd:ee:05"],
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(
+            resp.json()["sessions"], {"aa:bb:cc:dd:ee:04": session.pk, "aa:bb:cc:dd:ee:05": None}
+        )
+
+
+class EmailOTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = resolve_tenant(Tenant.objects.create(name="T1", secret_salt="s1").id)
+
+    def test_codes_are_hashed_and_single_use(self):
+        code = issue_otp(self.tenant, "A@B.com")
+        self.assertFalse(EmailOTP.objects.filter(code=code).exists())
+        self.assertEqual(len(EmailOTP.objects.get().code_hash), 64)
+        with self.assertNumQueries(0):
+            self.assertFalse(verify_otp(self.tenant, "a@b.com", "wrong"))
+        self.assertTrue(verify_otp(self.tenant, " a@b.com", code))
+        self.assertFalse(verify_otp(self.tenant, "a@b.com", code))
+        self.assertEqual(EmailOTP.objects.filter(verified_at__isnull=False).count(), 1)
+
+    @override_settings(EMAIL_OTP_MAX_ATTEMPTS=3)
+    def test_attempts_are_limited_across_reissues(self):
+        issue_otp(self.tenant, "a@b.com")
+        for _ in range(2):
+            self.assertFalse(verify_otp(self.tenant, "a@b.com", "bad"))
+        code = issue_otp(self.tenant, "a@b.com")
+        self.assertFalse(verify_otp(self.tenant, "a@b.com", "bad"))
+        self.assertFalse(verify_otp(self.tenant, "a@b.com", code))
+
+    @override_settings(EMAIL_OTP_AUDIT=False)
+    def test_audit_is_optional(self):
+        self.assertTrue(verify_otp(self.tenant, "a@b.com", issue_otp(self.tenant, "a@b.com")))
+        self.assertFalse(EmailOTP.objects.exists())
+
+    def test_purge_expired_rows_in_chunks(self):
+        now = timezone.now()
+        EmailOTP.objects.bulk_create(
+            EmailOTP(tenant_id=self.tenant.id, email="a@b.com", expires_at=now + offset)
+            for offset in [timezone.timedelta(hours=-1)] * 5 + [timezone.timedelta(hours=1)]
+        )
+        self.assertEqual(purge_expired_otps(now, chunk_size=2), 5)
+        self.assertEqual(EmailOTP.objects.count(), 1)
+
+
+class VoucherTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1")
+
+    def test_generate_batch_in_chunks(self):
+        batch = generate_vouchers(self.tenant.id, 2500, policy={"minutes": 60}, chunk_size=1000)
+        codes = list(Voucher.objects.filter(batch=batch).values_list("code", flat=True))
+        self.assertEqual(len(codes), 2500)
+        self.assertEqual(len(set(codes)), 2500)
+        self.assertTrue(all(len(c) == 10 and set(c) <= set(CODE_ALPHABET) for c in codes))
+        self.assertEqual(Voucher.objects.get(code=codes[0]).policy_json, {"minutes": 60})
+
+    def test_generate_gives_up_on_persistent_integrity_errors(self):
+        from django.db import IntegrityError
+
+        with mock.patch.object(
+            Voucher.objects, "bulk_create", side_effect=IntegrityError("fk")
+        ) as bulk_create:
+            with self.assertRaises(IntegrityError):
+                generate_vouchers(self.tenant.id, 10)
+        self.assertEqual(bulk_create.call_count, 3)
+
+    def test_generate_rejects_out_of_range_lengths(self):
+        from django.core.management import CommandError, call_command
+
+        for length in (1, 65):
+            with self.subTest(length), self.assertRaises(CommandError):
+                call_command("generate_vouchers", self.tenant.id, 40, length=length)
+        with self.assertRaises(ValueError):
+            generate_vouchers(self.tenant.id, 40, length=1)
+        self.assertFalse(Voucher.objects.exists())
+
+    def test_generate_api(self):
+        resp = Client().post(
+            "/api/admin/vouchers/generate/",
+            {"tenant": self.tenant.id, "count": 50, "length": 8},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        batch = resp.json()["batch"]
+        listed = Client().get("/api/admin/vouchers/", {"batch": batch}).json()
+        self.assertEqual(len(listed["results"]), 50)
+
+        resp = Client().post(
+            "/api/admin/vouchers/generate/",
+            {"tenant": self.tenant.id + 1, "count": 5},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_redeem_claims_once(self):
+        Voucher.objects.create(tenant=self.tenant, code="ABC123")
+        self.assertFalse(redeem_voucher(self.tenant.id + 1, "ABC123", "aa:bb:cc:dd:ee:01"))
+        self.assertTrue(redeem_voucher(self.tenant.id, "ABC123", "aa:bb:cc:dd:ee:01"))
+        self.assertFalse(redeem_voucher(self.tenant.id, "ABC123", "aa:bb:cc:dd:ee:02"))
+        voucher = Voucher.objects.get(code="ABC123")
+        self.assertEqual((voucher.status, voucher.used_by_mac), ("used", "aa:bb:cc:dd:ee:01"))
+
+    def test_second_device_mid_redemption_is_rejected(self):
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        Voucher.objects.create(tenant=self.tenant, code="ABC123")
+        create_session = Session.objects.create
+        rival = []
+
+        def post(mac):
+            data = {"tenant_id": self.tenant.id, "site_id": site.id, "mac": mac, "code": "ABC123"}
+            return Client().post("/auth/voucher", data)
+
+        def interleave(**kwargs):
+            # The second device arrives while the first is still creating its session.
+            if not rival:
+                rival.append(post("aa:bb:cc:dd:ee:02"))
+            return create_session(**kwargs)
+
+        with mock.patch.object(Session.objects, "create", side_effect=interleave):
+            first = post("aa:bb:cc:dd:ee:01")
+        self.assertEqual((first.status_code, rival[0].status_code), (200, 400))
+        self.assertEqual(Session.objects.get().mac, "aa:bb:cc:dd:ee:01")
+
+
+@unittest.skipIf(
+    connection.vendor == "sqlite", "SQLite's shared-cache test database locks whole tables"
+)
+class VoucherRaceTests(TransactionTestCase):
+    def test_concurrent_redemption_creates_one_session(self):
+        tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=tenant, name="B1")
+        site = Site.objects.create(tenant=tenant, brand=brand, name="S1")
+        Voucher.objects.create(tenant=tenant, code="RACE42")
+        devices = 8
+        barrier = threading.Barrier(devices)
+        statuses = []
+
+        def redeem(i):
+            try:
+                barrier.wait()
+                resp = Client().post(
+                    "/auth/voucher",
+                    {
+                        "tenant_id": tenant.id,
+                        "site_id": site.id,
+                        "mac": f"aa:bb:cc:dd:ee:{i:02x}",
+                        "code": "RACE42",
+                    },
+                )
+                statuses.append(resp.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=redeem, args=(i,)) for i in range(devices)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(statuses), [200] + [400] * (devices - 1))
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        # Row counts are cached between requests; seed them as a warm server would.
+        counters.reconcile()
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        self.tenant = Tenant.objects.create(name="T1")
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+
+    def add_sessions(self, count):
+        start = GuestUser.objects.count()
+        for n in range(start, start + count):
+            mac = f"aa:bb:cc:dd:{n // 256:02x}:{n % 256:02x}"
+            guest = GuestUser.objects.create(tenant=self.tenant, mac=mac)
+            Session.objects.create(user=guest, site=self.site, mac=guest.mac)
+
+    def test_query_budget_does_not_grow_with_rows(self):
+        # Session, user, filter choices, count, page, date hierarchy (2).
+        for url in ("/admin/authsvc/session/", "/admin/authsvc/guestuser/"):
+            with self.subTest(url):
+                self.add_sessions(3)
+                with self.assertNumQueries(7):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                self.add_sessions(120)  # past list_per_page
+                with self.assertNumQueries(7) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertIn("LIMIT 100", queries.captured_queries[4]["sql"])
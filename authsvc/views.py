@@ -0,0 +1,47 @@
+from rest_framework import decorators, response, status, viewsets
+
+from core.api import ValuesReadMixin
+from core.models import Tenant
+
+from .models import Voucher
+from .serializers import VoucherBatchSerializer, VoucherSerializer
+from .vouchers import generate_vouchers
+
+
+class VoucherViewSet(ValuesReadMixin, viewsets.ModelViewSet):
+    queryset = Voucher.objects.all().order_by("-created_at")
+    serializer_class = VoucherSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "code",
+        "policy_json",
+        "status",
+        "batch",
+        "used_by_mac",
+        "used_at",
+        "tenant",
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        batch = self.request.query_params.get("batch")
+        if batch:
+            queryset = queryset.filter(batch=batch)
+        return queryset
+
+    @decorators.action(detail=False, methods=["post"], url_path="generate")
+    def generate(self, request):
+        params = VoucherBatchSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        if not Tenant.objects.filter(pk=data["tenant"]).exists():
+            return response.Response({"tenant": ["Unknown tenant."]}, status=400)
+        batch = generate_vouchers(
+            data["tenant"], data["count"], length=data["length"], policy=data["policy_json"]
+        )
+        return response.Response(
+            {"ok": True, "batch": batch, "count": data["count"]},
+            status=status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,101 @@
+"""Voucher batches and redemption.
+
+Codes are drawn from a 32-character alphabet without look-alikes (no 0/O,
+1/I), so a 10-character code has ~10^15 possibilities and a batch of
+hundreds of thousands rarely hits a collision. The few that do are dropped
+and redrawn per chunk, before the insert, so ``bulk_create`` never trips
+the unique index.
+
+Redemption is a single conditional UPDATE: whoever flips ``status`` from
+``active`` to ``used`` owns the voucher, however many devices race for it.
+"""
+
+import secrets
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Voucher
+
+CODE_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+DEFAULT_CODE_LENGTH = 10
+# Shorter codes are guessable and run out quickly; Voucher.code holds 64.
+MIN_CODE_LENGTH, MAX_CODE_LENGTH = 8, 32
+# A chunk losing a code to a concurrent batch is redrawn this many times; any
+# other IntegrityError (e.g. a missing tenant) fails the same way each time.
+CHUNK_ATTEMPTS = 3
+
+# 32 symbols: the low five bits of a random byte pick one without bias.
+_BYTE_TO_SYMBOL = bytes(ord(CODE_ALPHABET[b & 31]) for b in range(256))
+
+
+def _draw(count: int, length: int) -> set[str]:
+    codes: set[str] = set()
+    while len(codes) < count:
+        need = count - len(codes)
+        raw = secrets.token_bytes(need * length).translate(_BYTE_TO_SYMBOL).decode()
+        codes.update(raw[i : i + length] for i in range(0, len(raw), length))
+    return codes
+
+
+def _fresh_codes(count: int, length: int) -> list[str]:
+    codes = _draw(count, length)
+    while True:
+        taken = set(Voucher.objects.filter(code__in=codes).values_list("code", flat=True))
+        if not taken:
+            return list(codes)
+        codes -= taken
+        codes |= _draw(len(taken), length) - codes
+
+
+def generate_vouchers(
+    tenant_id: int,
+    count: int,
+    *,
+    length: int = DEFAULT_CODE_LENGTH,
+    policy: dict | None = None,
+    batch: str = "",
+    chunk_size: int = 5000,
+) -> str:
+    """Create ``count`` active vouchers for ``tenant_id`` and return the batch id.
+
+    Each chunk is checked against existing codes and inserted with one
+    ``bulk_create`` in its own transaction, so memory stays flat and a
+    large batch does not hold one long write lock.
+    """
+    if not MIN_CODE_LENGTH <= length <= MAX_CODE_LENGTH:
+        raise ValueError(f"code length must be {MIN_CODE_LENGTH}..{MAX_CODE_LENGTH}")
+    batch = batch or uuid.uuid4().hex[:12]
+    policy = policy or {}
+    remaining = count
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        for attempt in range(1, CHUNK_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    Voucher.objects.bulk_create(
+                        Voucher(tenant_id=tenant_id, code=code, policy_json=policy, batch=batch)
+                        for code in _fresh_codes(size, length)
+                    )
+                break
+            except IntegrityError:
+                # Usually a concurrent batch took one of these codes after the
+                # check; redraw, but give up on errors that keep recurring.
+                if attempt == CHUNK_ATTEMPTS:
+                    raise
+        remaining -= size
+    return batch
+
+
+def _redeemable(tenant_id: int, code: str):
+    return Voucher.objects.filter(tenant_id=tenant_id, code=code, status="active")
+
+
+def redeem_voucher(tenant_id: int, code: str, mac: str) -> bool:
+    """Claim an active voucher for ``mac``; ``False`` if it is unknown or already used."""
+    now = timezone.now()
+    claimed = _redeemable(tenant_id, code).update(
+        status="used", used_by_mac=mac, used_at=now, updated_at=now
+    )
+    return claimed == 1
@@ -0,0 +1,62 @@
+"""Session accounting: per-row saves vs. grouped last-writer-wins updates.
+
+    python -m benchmarks.bench_accounting --sessions 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.common import report, setup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.sessions
+    setup()
+
+    from authsvc.accounting import apply_accounting
+    from authsvc.models import GuestUser, Session
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench", secret_salt="s")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    guest = GuestUser.objects.create(tenant=tenant, mac="aa:bb:cc:00:00:00")
+    macs = [f"aa:bb:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}:00" for i in range(n)]
+    Session.objects.bulk_create(Session(user=guest, site=site, mac=mac) for mac in macs)
+    ids = list(Session.objects.values_list("pk", flat=True))
+
+    def per_row(ts):
+        for pk in ids:
+            session = Session.objects.get(pk=pk)
+            session.bytes_up += 1000
+            session.bytes_down += 5000
+            session.save(update_fields=["bytes_up", "bytes_down", "updated_at"])
+
+    def grouped(ts):
+        apply_accounting(
+            site.id,
+            [{"session_id": pk, "bytes_up": ts, "bytes_down": ts * 5, "ts": ts} for pk in ids],
+        )
+
+    def by_mac(ts):
+        apply_accounting(
+            site.id, [{"mac": mac, "bytes_up": ts, "bytes_down": ts * 5, "ts": ts} for mac in macs]
+        )
+
+    rows = []
+    for label, fn, ts in (
+        ("get + save per row (before)", per_row, 1000),
+        ("apply_accounting by id (after)", grouped, 2000),
+        ("apply_accounting by mac (after)", by_mac, 3000),
+    ):
+        start = time.perf_counter()
+        fn(ts)
+        rows.append((label, args.sessions / (time.perf_counter() - start)))
+    report(f"interim update for {args.sessions:,} sessions", rows, unit="updates/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Ad decision latency: per-request ORM queries vs. the compiled snapshot."""
+
+import random
+import time
+
+from benchmarks.common import setup
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def main(campaigns: int = 200, creatives: int = 5, decisions: int = 20_000) -> None:
+    setup()
+
+    from ads.engine import DecisionEngine
+    from ads.models import Campaign, Creative
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    sites = [Site.objects.create(tenant=tenant, brand=brand, name=f"s{i}") for i in range(20)]
+    for i in range(campaigns):
+        targeting = {"sites": [random.choice(sites).id]} if i % 2 else {}
+        if i % 3 == 0:
+            targeting["positions"] = ["hero"]
+        campaign = Campaign.objects.create(tenant=tenant, name=f"c{i}", targeting_json=targeting)
+        Creative.objects.bulk_create(
+            Creative(
+                campaign=campaign,
+                type="image",
+                asset_url="https://cdn.example.com/a.png",
+                click_url="https://example.com",
+                width=300,
+                height=250,
+                meta_json={"weight": random.randint(1, 5)},
+            )
+            for _ in range(creatives)
+        )
+
+    def orm():
+        campaign = (
+            Campaign.objects.filter(tenant_id=tenant.id, status="active")
+            .order_by("-updated_at")
+            .first()
+        )
+        campaign.creatives.order_by("-updated_at").first()
+
+    engine = DecisionEngine(check_interval=1.0)
+    engine.decide(tenant.id, sites[0].id)
+
+    rows = []
+    for label, fn in (
+        ("orm per request (before)", orm),
+        ("snapshot (after)", lambda: engine.decide(tenant.id, random.choice(sites).id, "hero")),
+    ):
+        samples = []
+        for _ in range(decisions):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        rows.append((label, *percentiles(samples)))
+
+    print(f"ad decision, {campaigns} campaigns x {creatives} creatives")
+    for label, p50, p99 in rows:
+        print(f"  {label:<32} p50 {p50:8.4f} ms   p99 {p99:8.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
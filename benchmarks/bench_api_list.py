@@ -0,0 +1,81 @@
+"""Admin API list pages: ModelSerializer instances vs. ``.values()`` rows.
+
+Times ``GET /api/admin/<prefix>/?page_size=1000`` end to end through the
+viewset (query, serialization, JSON rendering) and records the peak traced
+memory of one request. "before" is the same viewset without the values path.
+"""
+
+import tracemalloc
+
+from benchmarks.common import rate, report, setup
+
+
+def main(rows: int = 5000) -> None:
+    setup()
+
+    from django.utils import timezone
+    from rest_framework import viewsets
+    from rest_framework.test import APIRequestFactory
+
+    from ads.models import Event
+    from ads.views import EventViewSet
+    from contentmgmt.models import Page
+    from contentmgmt.views import PageViewSet
+    from core.models import Brand, Site, Tenant
+    from core.views import SiteViewSet
+
+    tenant = Tenant.objects.create(name="bench")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    sites = Site.objects.bulk_create(
+        Site(tenant=tenant, brand=brand, name=f"site {n}", address="1 Main St", lat=1, lon=2)
+        for n in range(rows)
+    )
+    now = timezone.now()
+    Event.objects.bulk_create(
+        Event(tenant=tenant, site=sites[n % 50], type="click", ts=now, payload_json={"n": n})
+        for n in range(rows)
+    )
+    Page.objects.bulk_create(
+        Page(tenant=tenant, brand=brand, name=f"page {n}", html="<b>hi</b>" * 50)
+        for n in range(rows)
+    )
+
+    factory = APIRequestFactory()
+    request = factory.get("/", {"page_size": 1000})
+
+    def serializer_view(viewset):
+        # The viewset as it was: no values path, same queryset and pagination.
+        attrs = {"queryset": viewset.queryset, "serializer_class": viewset.serializer_class}
+        return type("Before", (viewsets.ReadOnlyModelViewSet,), attrs).as_view({"get": "list"})
+
+    def call(view):
+        def run():
+            view(request).render()
+
+        return run
+
+    def peak_kb(fn) -> float:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / 1024
+
+    endpoints = (("events", EventViewSet), ("sites", SiteViewSet), ("pages", PageViewSet))
+    for name, viewset in endpoints:
+        before = call(serializer_view(viewset))
+        after = call(viewset.as_view({"get": "list"}))
+        report(
+            f"{name}: list of 1000 rows",
+            [("ModelSerializer (before)", rate(before)), (".values() (after)", rate(after))],
+            "pages/s",
+        )
+        report(
+            f"{name}: peak traced memory per request",
+            [("ModelSerializer (before)", peak_kb(before)), (".values() (after)", peak_kb(after))],
+            "KB",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Concurrent splash throughput: async views under ASGI vs. sync views under WSGI.
+
+Thousands of captive clients connect at once. WSGI serves them from a fixed
+thread pool (like gunicorn ``--threads``), ASGI from one event loop. Both
+talk to a cache with simulated network latency (``--latency-ms``), which is
+what ties a WSGI thread up on a real deployment: the async cache methods
+sleep on the loop instead of blocking it, as a native async client would.
+
+Django still runs sync-only work (``MiddlewareMixin`` hooks, request
+signals) through one thread per ASGI request, which costs a few thread
+hops each. That overhead dominates at low backend latency, so ASGI only pulls
+ahead once the per-request wait outgrows it; the sweep shows where.
+
+    python -m benchmarks.bench_asgi --clients 2000 --threads 32 --latency-ms 2 20 50
+"""
+
+import argparse
+import asyncio
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from benchmarks.common import setup
+
+LATENCY = 0.002
+
+
+class SlowLocMemCache(LocMemCache):
+    def get(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return super().get(*args, **kwargs)
+
+    async def aget(self, *args, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return super().get(*args, **kwargs)
+
+
+def run_wsgi(path: str, clients: int, threads: int) -> float:
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def one(_):
+        environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD="GET")
+        statuses = []
+        body = b"".join(handler(environ, lambda status, headers: statuses.append(status)))
+        assert statuses[0].startswith("200") and body
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(clients)))
+    return clients / (time.perf_counter() - start)
+
+
+def run_asgi(path: str, clients: int) -> float:
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+    async def one():
+        sent = False
+        messages = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Future()  # the client never disconnects
+
+        async def send(message):
+            messages.append(message)
+
+        await handler(dict(scope), receive, send)
+        assert messages[0]["status"] == 200
+
+    async def main():
+        await asyncio.gather(*(one() for _ in range(clients)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return clients / (time.perf_counter() - start)
+
+
+def main() -> None:
+    global LATENCY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[2.0, 20.0, 50.0])
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    settings.CACHES = {"default": {"BACKEND": f"{__name__}.SlowLocMemCache"}}
+    setup()
+
+    from django.test import override_settings
+    from django.urls import clear_url_caches
+
+    import portal.urls
+    from contentmgmt.models import Page
+    from contentmgmt.utils import store_page_artifact
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    page = Page.objects.create(
+        tenant=tenant, brand=brand, site=site, name="bench", status="published", html="<p>hi</p>"
+    )
+    store_page_artifact(page)
+    path = f"/p/{tenant.id}/{site.id}"
+
+    print(f"splash, {args.clients} concurrent clients")
+    for latency_ms in args.latency_ms:
+        LATENCY = latency_ms / 1000
+        rates = {}
+        for use_async in (False, True):
+            with override_settings(PORTAL_ASYNC_VIEWS=use_async):
+                importlib.reload(portal.urls)
+                clear_url_caches()
+                if use_async:
+                    rates["ASGI"] = run_asgi(path, args.clients)
+                else:
+                    rates[f"WSGI x{args.threads}"] = run_wsgi(path, args.clients, args.threads)
+        cells = "   ".join(f"{label} {rate:>9,.1f} req/s" for label, rate in rates.items())
+        print(f"  cache latency {latency_ms:5.1f} ms   {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Splash page weight and modelled load time: separate assets vs. the gzipped bundle.
+
+Before, the browser fetched the HTML, then the CSS and JS in a second round
+trip, all uncompressed. After, one response carries everything, gzipped.
+Load time is modelled as round trips plus bytes over a congested link
+(``--rtt-ms``, ``--kbps``); server time is measured in-process.
+"""
+
+import argparse
+
+from benchmarks.common import rate, report, setup
+
+
+def main(rtt_ms: float = 150.0, kbps: float = 1000.0) -> None:
+    setup()
+
+    from django.core.cache import cache
+    from django.test import Client
+
+    from contentmgmt.models import Page
+    from contentmgmt.utils import store_page_artifact
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    card = '<div class="card"><b>Welcome</b> <a href="/terms">terms</a><img src="x.png"></div>\n'
+    rule = "  .card-{n} {{\n    margin: 0 auto;  /* centre */\n    color: #333;\n  }}\n"
+    func = "  function step{n}(el) {{\n    // fade in\n    el.classList.add('on-{n}');\n  }}\n\n"
+    page = Page.objects.create(
+        tenant=tenant,
+        brand=brand,
+        site=site,
+        name="bench",
+        status="published",
+        html=card * 300,
+        css="".join(rule.format(n=n) for n in range(400)),
+        js="".join(func.format(n=n) for n in range(400)),
+    )
+    cache.clear()
+    artifact = store_page_artifact(page)
+
+    separate = [len(page.html.encode()), len(page.css.encode()), len(page.js.encode())]
+    bytes_per_ms = kbps * 1000 / 8 / 1000
+
+    def load_ms(round_trips: int, size: int) -> float:
+        return round_trips * rtt_ms + size / bytes_per_ms
+
+    report(
+        "splash weight",
+        [
+            ("html + css + js (before)", sum(separate) / 1024),
+            ("bundle, minified", len(artifact.body) / 1024),
+            ("bundle, minified + gzip (after)", len(artifact.gzipped) / 1024),
+        ],
+        "KB",
+    )
+    report(
+        f"modelled load, {rtt_ms:g} ms RTT, {kbps:g} kbit/s",
+        [
+            ("3 requests, 2 round trips (before)", load_ms(2, sum(separate))),
+            ("1 gzipped response (after)", load_ms(1, len(artifact.gzipped))),
+        ],
+        "ms",
+    )
+
+    url = f"/p/{tenant.id}/{site.id}"
+    client = Client()
+    report(
+        "splash serving, in-process",
+        [
+            ("identity", rate(lambda: client.get(url))),
+            ("gzip", rate(lambda: client.get(url, headers={"Accept-Encoding": "gzip"}))),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rtt-ms", type=float, default=150.0)
+    parser.add_argument("--kbps", type=float, default=1000.0)
+    args = parser.parse_args()
+    main(args.rtt_ms, args.kbps)
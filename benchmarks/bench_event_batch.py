@@ -0,0 +1,73 @@
+"""Event ingest: one signed form POST per event vs. signed gzip NDJSON batches."""
+
+import gzip
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+from benchmarks.common import report, setup
+
+
+def main(events: int = 5000, batch: int = 500) -> None:
+    setup()
+
+    from django.conf import settings
+    from django.test import Client
+
+    from ads.ingest import event_buffer
+    from ads.models import Event
+    from core.models import Brand, Site, Tenant
+
+    settings.RATE_LIMIT_ENABLED = False
+    event_buffer.enabled = False  # time the inserts, not the write-behind queue
+    tenant = Tenant.objects.create(name="bench", secret_salt="s")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    client = Client()
+
+    def sign(body: bytes) -> str:
+        return "sha256=" + hmac.new(b"s", body, hashlib.sha256).hexdigest()
+
+    start = time.perf_counter()
+    for i in range(events):
+        body = urlencode(
+            {"tenant_id": tenant.id, "site_id": site.id, "type": "impression", "campaign_id": i}
+        ).encode()
+        client.post(
+            "/e",
+            body,
+            content_type="application/x-www-form-urlencoded",
+            headers={"X-Portal-Signature": sign(body)},
+        )
+    single = events / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, events, batch):
+        body = b"".join(
+            json.dumps({"type": "impression", "campaign_id": i}).encode() + b"\n"
+            for i in range(offset, offset + batch)
+        )
+        client.post(
+            f"/e/batch?site_id={site.id}",
+            gzip.compress(body),
+            content_type="application/x-ndjson",
+            headers={
+                "Content-Encoding": "gzip",
+                "X-Portal-Tenant": str(tenant.id),
+                "X-Portal-Signature": sign(body),
+            },
+        )
+    batched = events / (time.perf_counter() - start)
+    assert Event.objects.count() == 2 * events
+
+    report(
+        f"event ingest, {events:,} events",
+        [("form POST per event (before)", single), (f"gzip NDJSON x{batch} (after)", batched)],
+        unit="events/s",
+    )
+
+
+if __name__ == "__main__":
+    main()
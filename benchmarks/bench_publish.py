@@ -0,0 +1,81 @@
+"""Publishing a tenant's pages against a storage with object-store latency.
+
+Every ``exists``/``save`` call sleeps ``--latency-ms`` to stand in for an S3
+round trip. "before" saves html, css and js one after another on every
+publish; "after" is ``publish_page_assets`` on a first publish and on a
+republish where one page in ten changed.
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import report, setup
+
+
+def main(pages: int = 40, latency_ms: float = 20.0) -> None:
+    setup()
+
+    from unittest import mock
+
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.test import override_settings
+
+    from contentmgmt.utils import _hash_content, publish_page_assets
+
+    delay = latency_ms / 1000
+
+    def slow(method):
+        def call(*args, **kwargs):
+            time.sleep(delay)
+            return method(*args, **kwargs)
+
+        return call
+
+    contents = [
+        (f"<html><body>page {n}</body></html>", f".p{n} {{color: red}}", f"init({n})")
+        for n in range(pages)
+    ]
+    edited = [
+        (html, css, js + ";track()" if n % 10 == 0 else js)
+        for n, (html, css, js) in enumerate(contents)
+    ]
+
+    def sequential(items):
+        for html, css, js in items:
+            for name, text in (("page", html), ("style", css), ("script", js)):
+                data = text.encode("utf-8")
+                path = f"cp/1/bench/pages/{name}-{_hash_content(data)}"
+                default_storage.save(path, ContentFile(data))
+
+    def publish(items):
+        for html, css, js in items:
+            publish_page_assets(1, "bench", html, css, js)
+
+    def timed(fn, items) -> float:
+        start = time.perf_counter()
+        fn(items)
+        return pages / (time.perf_counter() - start)
+
+    with (
+        tempfile.TemporaryDirectory() as media_root,
+        override_settings(MEDIA_ROOT=media_root),
+        mock.patch.object(default_storage, "save", slow(default_storage.save)),
+        mock.patch.object(default_storage, "exists", slow(default_storage.exists)),
+    ):
+        rows = [
+            ("sequential saves (before)", timed(sequential, contents)),
+            ("sequential republish (before)", timed(sequential, edited)),
+            ("concurrent first publish", timed(publish, contents)),
+            ("skip-existing republish (after)", timed(publish, edited)),
+        ]
+    report(f"publish {pages} pages, {latency_ms:g} ms storage latency", rows, "pages/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    main(args.pages, args.latency_ms)
@@ -0,0 +1,41 @@
+"""Per-request cost of the rate limiter (local buckets, or Redis with REDIS_URL set).
+
+    python -m benchmarks.bench_ratelimit
+    REDIS_URL=redis://localhost:6379/0 python -m benchmarks.bench_ratelimit
+"""
+
+import itertools
+
+from benchmarks.common import rate, report, setup
+
+
+def main() -> None:
+    setup()
+
+    from django.conf import settings
+    from django.test import RequestFactory
+
+    from core.ratelimit import check
+
+    settings.RATE_LIMITS = {"auth": {"ip": "1000000/s", "mac": "1000000/s", "tenant": "1000000/s"}}
+    factory = RequestFactory()
+    requests = []
+    for i in range(5000):
+        data = {"tenant_id": 1, "mac": f"aa:bb:cc:dd:{i:04x}"}
+        request = factory.post("/auth/clickthrough", data)
+        request.resolver_match = None
+        request.POST  # noqa: B018 - parsed up front, the view needs it anyway
+        requests.append(request)
+    pool = itertools.cycle(requests)
+
+    backend = "redis" if settings.REDIS_URL else "local"
+    per_second = rate(lambda: check("auth", next(pool)))
+    report(
+        f"rate limit check, 3 buckets, {backend} backend",
+        [("check()", 1e6 / per_second)],
+        unit="us/request",
+    )
+
+
+if __name__ == "__main__":
+    main()
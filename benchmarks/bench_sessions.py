@@ -0,0 +1,52 @@
+"""Active-session lookups: DB query vs. the cache-backed index.
+
+    python -m benchmarks.bench_sessions --sessions 20000
+"""
+
+import argparse
+import random
+
+from benchmarks.common import rate, report, setup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.sessions
+    setup()
+
+    from authsvc.models import GuestUser, Session
+    from authsvc.presence import active_session, active_sessions, rebuild_site
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench", secret_salt="s")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    guest = GuestUser.objects.create(tenant=tenant, mac="aa:bb:cc:00:00:00")
+    macs = [f"aa:bb:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}:00" for i in range(n)]
+    Session.objects.bulk_create(Session(user=guest, site=site, mac=mac) for mac in macs)
+    rebuild_site(site.id)
+
+    def db_one():
+        mac = random.choice(macs)
+        Session.objects.filter(site_id=site.id, mac=mac, end_at__isnull=True).values("pk").first()
+
+    def db_batch():
+        dict(
+            Session.objects.filter(
+                site_id=site.id, mac__in=random.sample(macs, 100), end_at__isnull=True
+            ).values_list("mac", "pk")
+        )
+
+    rows = [
+        ("1 MAC, DB query", 1e6 / rate(db_one)),
+        ("1 MAC, index", 1e6 / rate(lambda: active_session(site.id, random.choice(macs)))),
+        ("100 MACs, DB query", 1e6 / rate(db_batch)),
+        ("100 MACs, index", 1e6 / rate(lambda: active_sessions(site.id, random.sample(macs, 100)))),
+    ]
+    report(f"active-session lookup, {n:,} open sessions at one site", rows, unit="us/call")
+
+
+if __name__ == "__main__":
+    main()
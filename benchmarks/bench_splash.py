@@ -0,0 +1,52 @@
+"""Splash throughput: per-request sanitization, the publish-time artifact, and 304s."""
+
+from benchmarks.common import rate, report, setup
+
+
+def main() -> None:
+    setup()
+
+    from django.core.cache import cache
+    from django.test import Client
+
+    from contentmgmt.models import Page
+    from contentmgmt.utils import store_page_artifact
+    from core.models import Brand, Site, Tenant
+
+    tenant = Tenant.objects.create(name="bench")
+    brand = Brand.objects.create(tenant=tenant, name="bench")
+    site = Site.objects.create(tenant=tenant, brand=brand, name="bench")
+    block = '<div class="card"><p style="color:red">Welcome <b>guest</b></p><img src="x.png"></div>'
+    html = "<html><body>" + block * (100 * 1024 // len(block)) + "</body></html>"
+    page = Page.objects.create(
+        tenant=tenant, brand=brand, site=site, name="bench", status="published", html=html
+    )
+    url = f"/p/{tenant.id}/{site.id}"
+    client = Client()
+
+    def cold():
+        # Equivalent to the old behaviour: every request pays for bleach.clean.
+        cache.clear()
+        client.get(url)
+
+    def warm():
+        client.get(url)
+
+    store_page_artifact(page)
+    etag = client.get(url)["ETag"]
+
+    def revalidate():
+        client.get(url, headers={"If-None-Match": etag})
+
+    report(
+        f"splash, {len(html) / 1024:.0f} KB page",
+        [
+            ("sanitize per request (before)", rate(cold)),
+            ("published artifact (after)", rate(warm)),
+            ("conditional GET, 304", rate(revalidate)),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
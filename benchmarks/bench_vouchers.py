@@ -0,0 +1,66 @@
+"""Voucher throughput: batch generation and redemption, before vs. after.
+
+    python -m benchmarks.bench_vouchers --count 100000
+"""
+
+import argparse
+import time
+from itertools import count
+
+from benchmarks.common import rate, report, setup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    setup()
+
+    from django.utils import timezone
+
+    from authsvc.models import Voucher
+    from authsvc.vouchers import _draw, generate_vouchers, redeem_voucher
+    from core.models import Tenant
+
+    tenant = Tenant.objects.create(name="bench")
+
+    one_by_one = min(args.count, 5000)
+    start = time.perf_counter()
+    for code in _draw(one_by_one, 10):
+        Voucher.objects.create(tenant=tenant, code=code, batch="single")
+    single = one_by_one / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch = generate_vouchers(tenant.id, args.count)
+    bulk = args.count / (time.perf_counter() - start)
+    report(
+        f"voucher generation ({args.count:,} codes)",
+        [("create() per code (before)", single), ("generate_vouchers (after)", bulk)],
+        unit="codes/s",
+    )
+
+    codes = iter(Voucher.objects.filter(batch=batch).values_list("code", flat=True))
+    macs = (f"aa:bb:cc:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}" for i in count())
+
+    def get_then_save():
+        voucher = Voucher.objects.get(tenant_id=tenant.id, code=next(codes), status="active")
+        voucher.status = "used"
+        voucher.used_by_mac = next(macs)
+        voucher.used_at = timezone.now()
+        voucher.save(update_fields=["status", "used_by_mac", "used_at"])
+
+    def conditional_update():
+        redeem_voucher(tenant.id, next(codes), next(macs))
+
+    report(
+        "voucher redemption",
+        [
+            ("get + save (before)", rate(get_then_save, 1.0)),
+            ("conditional update (after)", rate(conditional_update, 1.0)),
+        ],
+        unit="redeems/s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Shared bootstrap for the scripts in ``benchmarks/``.
+
+Each script runs against a throwaway in-memory test database, e.g.::
+
+    python -m benchmarks.bench_splash
+"""
+
+import os
+import time
+from collections.abc import Callable
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "portalopenwisp.settings")
+
+
+def setup() -> None:
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def rate(fn: Callable[[], object], seconds: float = 2.0) -> float:
+    """Call ``fn`` repeatedly for ``seconds`` and return calls per second."""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def report(title: str, rows: list[tuple[str, float]], unit: str = "req/s") -> None:
+    print(title)
+    for label, value in rows:
+        print(f"  {label:<32} {value:>12,.1f} {unit}")
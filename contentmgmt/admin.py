@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import Page
-from .utils import publish_page_assets
+from .utils import publish_page
 
 
 @admin.register(Page)
@@ -14,12 +14,7 @@ class PageAdmin(admin.ModelAdmin):
 
     def publish_selected(self, request, queryset):
         for page in queryset:
-            result = publish_page_assets(
-                page.tenant_id, "admin", page.html or "", page.css or "", page.js or ""
-            )
-            page.status = "published"
-            page.rev = result.html_path.rsplit("/", 1)[-1]
-            page.save(update_fields=["status", "rev"])
+            publish_page(page, "admin")
         self.message_user(request, f"Published {queryset.count()} page(s)")
 
     publish_selected.short_description = "Publish selected pages"
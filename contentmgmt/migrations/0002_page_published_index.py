@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contentmgmt", "0001_initial"),
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="page",
+            index=models.Index(
+                fields=["tenant", "site", "status", "-updated_at"],
+                include=("id", "rev"),
+                name="contentmgmt_page_published",
+            ),
+        ),
+    ]
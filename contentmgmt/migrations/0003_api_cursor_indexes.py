@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contentmgmt", "0002_page_published_index"),
+        ("core", "0003_api_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="page",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="contentmgmt_updated_c98f76_idx"
+            ),
+        ),
+    ]
@@ -35,6 +35,14 @@ class Page(TimeStampedModel):
     class Meta:
         indexes = [
             models.Index(fields=["tenant", "status"]),
+            # published_page(): newest published page of a site, answered
+            # from the index alone where the backend supports INCLUDE.
+            models.Index(
+                fields=["tenant", "site", "status", "-updated_at"],
+                include=["id", "rev"],
+                name="contentmgmt_page_published",
+            ),
+            models.Index(fields=["-updated_at", "-id"]),
         ]
 
     def __str__(self) -> str:
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Page
+from .utils import forget_published_page
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def _forget_published_page(sender, instance, **kwargs):
+    forget_published_page(instance.tenant_id, instance.site_id)
@@ -1,41 +1,331 @@
+import gzip
 import hashlib
-from dataclasses import dataclass
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
 
+import bleach
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 
+from .models import Page
+
+# Bump whenever the allowlist below changes so cached artifacts are re-sanitized.
+SANITIZER_VERSION = "1"
+# Bump whenever bundling or minification output changes, for the same reason.
+BUNDLE_VERSION = "1"
+
+SANITIZER_TAGS = bleach.sanitizer.ALLOWED_TAGS | {
+    "img",
+    "video",
+    "source",
+    "link",
+    "meta",
+    "script",
+}
+SANITIZER_ATTRIBUTES = {
+    "*": [
+        "class",
+        "style",
+        "id",
+        "href",
+        "src",
+        "width",
+        "height",
+        "type",
+        "rel",
+    ]
+}
+SANITIZER_PROTOCOLS = ["http", "https", "data"]
+
+
+@dataclass(frozen=True, slots=True)
+class PublishedPage:
+    """What splash needs to find a page's artifact, without the page bodies."""
+
+    id: int
+    rev: str
+    updated_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class PageArtifact:
+    """Ready-to-serve splash bundle; ``gzipped`` is empty when gzip would not shrink it."""
+
+    body: bytes
+    gzipped: bytes = b""
+
 
 @dataclass
 class PublishResult:
     html_path: str
     css_path: str | None
     js_path: str | None
+    rev: str = ""
+    manifest_path: str | None = None
+    uploaded: list[str] = field(default_factory=list)
 
 
 def _hash_content(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()[:16]
 
 
+def sanitize_html(html: str) -> str:
+    return bleach.clean(
+        html,
+        tags=SANITIZER_TAGS,
+        attributes=SANITIZER_ATTRIBUTES,
+        protocols=SANITIZER_PROTOCOLS,
+    )
+
+
+# A ";" before "}" is dropped with the whitespace and comments around it.
+_CSS_TOKENS = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s*;(?:\s|/\*.*?\*/)*(?=\})"""
+    r"""|\s*([{};,>])\s*|:\s+|(\s+)""",
+    re.S,
+)
+# Comments are matched only so that quotes inside them start no literal.
+_JS_LITERALS = re.compile(
+    r"""//[^\n]*|/\*.*?\*/|("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)""",
+    re.S,
+)
+_JS_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_HEAD_CLOSE = re.compile(r"</head\s*>", re.I)
+_BODY_CLOSE = re.compile(r"</body\s*>", re.I)
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and collapse whitespace, leaving string literals untouched."""
+
+    def replace(match: re.Match) -> str:
+        literal, punctuation, space = match.groups()
+        if literal:
+            return literal
+        if punctuation:
+            return punctuation
+        if space:
+            return " "
+        # A comment, a ";" before "}", or whitespace after a colon ("color: red").
+        return ":" if match.group().startswith(":") else ""
+
+    return _CSS_TOKENS.sub(replace, css).strip()
+
+
+def minify_js(js: str) -> str:
+    """Trim indentation and drop blank lines, except inside string and template literals.
+
+    Newlines stay, so automatic semicolon insertion and comments keep their
+    meaning; proper JS minification needs a parser.
+    """
+    multiline = []
+
+    def hide(match: re.Match) -> str:
+        literal = match.group(1)
+        if literal is None or "\n" not in literal:
+            return match.group()
+        multiline.append(literal)
+        return f"\x00{len(multiline) - 1}\x00"
+
+    code = _JS_LITERALS.sub(hide, js)
+    code = "\n".join(line.strip() for line in code.splitlines() if line.strip())
+    return _JS_PLACEHOLDER.sub(lambda match: multiline[int(match.group(1))], code)
+
+
+def bundle_page(html: str, css: str = "", js: str = "") -> str:
+    """Inline the page's CSS and JS into its sanitized HTML: one response, no extra RTTs.
+
+    CSS and JS are added after sanitizing, as they are admin-authored like
+    the separately published files; only a closing tag inside them is
+    escaped so it cannot end the element early.
+    """
+    body = sanitize_html(html)
+    if css.strip():
+        style = "<style>" + minify_css(css).replace("</", "<\\/") + "</style>"
+        match = _HEAD_CLOSE.search(body)
+        body = body[: match.start()] + style + body[match.start() :] if match else style + body
+    if js.strip():
+        script = "<script>" + minify_js(js).replace("</", "<\\/") + "</script>"
+        matches = list(_BODY_CLOSE.finditer(body))
+        at = matches[-1].start() if matches else len(body)
+        body = body[:at] + script + body[at:]
+    return body
+
+
+def _published_key(tenant_id: int, site_id: int | None) -> str:
+    return f"published-page:{tenant_id}:{site_id}"
+
+
+def _published_query(tenant_id: int, site_id: int):
+    return (
+        Page.objects.filter(tenant_id=tenant_id, site_id=site_id, status="published")
+        .order_by("-updated_at")
+        .values("id", "rev", "updated_at")
+    )
+
+
+def published_page(tenant_id: int, site_id: int) -> PublishedPage | None:
+    """Return the site's live page, cached until a Page save/delete (``PAGE_LOOKUP_TTL``)."""
+    key = _published_key(tenant_id, site_id)
+    row = cache.get(key)
+    if row is None:
+        row = _published_query(tenant_id, site_id).first() or {}
+        cache.set(key, row, timeout=settings.PAGE_LOOKUP_TTL)
+    return PublishedPage(**row) if row else None
+
+
+async def apublished_page(tenant_id: int, site_id: int) -> PublishedPage | None:
+    """Async :func:`published_page`."""
+    key = _published_key(tenant_id, site_id)
+    row = await cache.aget(key)
+    if row is None:
+        row = await _published_query(tenant_id, site_id).afirst() or {}
+        await cache.aset(key, row, timeout=settings.PAGE_LOOKUP_TTL)
+    return PublishedPage(**row) if row else None
+
+
+def forget_published_page(tenant_id: int, site_id: int | None) -> None:
+    cache.delete(_published_key(tenant_id, site_id))
+
+
+def page_artifact_key(page) -> str:
+    # ``updated_at`` covers edits saved without a republish (rev unchanged).
+    stamp = int(page.updated_at.timestamp() * 1_000_000)
+    versions = f"{SANITIZER_VERSION}.{BUNDLE_VERSION}"
+    return f"page-artifact:{versions}:{page.id}:{page.rev}:{stamp}"
+
+
+def page_etag(page: Page | PublishedPage, gzipped: bool = False) -> str:
+    """Strong ETag for the splash bytes: same inputs as the artifact cache key.
+
+    Each encoding is its own representation, so the gzip one gets its own tag.
+    """
+    tag = _hash_content(page_artifact_key(page).encode("utf-8"))
+    return f'"{tag}-gz"' if gzipped else f'"{tag}"'
+
+
+def store_page_artifact(page: Page | PublishedPage) -> PageArtifact:
+    """Bundle, sanitize and gzip the page once and cache the result for its rev."""
+    if isinstance(page, Page):
+        html, css, js = page.html, page.css, page.js
+    else:
+        row = Page.objects.filter(pk=page.id).values_list("html", "css", "js").first()
+        html, css, js = row or ("", "", "")
+    artifact = PageArtifact(b"")
+    if html:
+        body = bundle_page(html, css or "", js or "").encode("utf-8")
+        compressed = _gzip(body)
+        artifact = PageArtifact(body, compressed if len(compressed) < len(body) else b"")
+    cache.set(page_artifact_key(page), artifact, timeout=settings.PAGE_ARTIFACT_TTL)
+    return artifact
+
+
+def get_page_artifact(page: Page | PublishedPage) -> PageArtifact:
+    """Return the splash bundle for ``page``, building it only on a cache miss."""
+    artifact = cache.get(page_artifact_key(page))
+    if artifact is None:
+        artifact = store_page_artifact(page)
+    return artifact
+
+
+async def aget_page_artifact(page: PublishedPage) -> PageArtifact:
+    """Async :func:`get_page_artifact`; a miss is built in a worker thread."""
+    artifact = await cache.aget(page_artifact_key(page))
+    if artifact is None:
+        artifact = await sync_to_async(store_page_artifact)(page)
+    return artifact
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the bytes (and so the path) identical across republishes.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _ensure_stored(path: str, data: bytes) -> bool:
+    """Upload ``data`` unless ``path`` already exists; returns whether it uploaded.
+
+    Paths are content-addressed, so an existing object already holds these
+    bytes. If a concurrent publisher won the race, storage saves ours under
+    an alternative name; that copy is dropped.
+    """
+    if default_storage.exists(path):
+        return False
+    name = default_storage.save(path, ContentFile(data))
+    if name != path:
+        default_storage.delete(name)
+        return False
+    return True
+
+
 def publish_page_assets(
     tenant_id: int, env: str, html: str, css: str = "", js: str = ""
 ) -> PublishResult:
+    """Store the page's files under content-addressed paths, plus ``.gz`` variants.
+
+    Existence checks and uploads of all files run concurrently, and files
+    already present are skipped, so a republish only pays for what changed.
+    The rev's manifest (``manifest-<rev>.json``) is written last, so its
+    presence means every file it lists is in place and an unchanged page
+    costs a single existence check.
+    """
     base_prefix = f"cp/{tenant_id}/{env}/pages/"
-    html_bytes = html.encode("utf-8")
-    html_hash = _hash_content(html_bytes)
-    html_path = f"{base_prefix}page-{html_hash}.html"
-    default_storage.save(html_path, ContentFile(html_bytes))
-
-    css_path = None
-    js_path = None
-    if css:
-        css_bytes = css.encode("utf-8")
-        css_hash = _hash_content(css_bytes)
-        css_path = f"{base_prefix}style-{css_hash}.css"
-        default_storage.save(css_path, ContentFile(css_bytes))
-    if js:
-        js_bytes = js.encode("utf-8")
-        js_hash = _hash_content(js_bytes)
-        js_path = f"{base_prefix}script-{js_hash}.js"
-        default_storage.save(js_path, ContentFile(js_bytes))
-
-    return PublishResult(html_path=html_path, css_path=css_path, js_path=js_path)
+    files = {}
+    for kind, name, ext, text in (
+        ("html", "page", "html", html),
+        ("css", "style", "css", css),
+        ("js", "script", "js", js),
+    ):
+        if kind != "html" and not text:
+            continue
+        data = text.encode("utf-8")
+        digest = _hash_content(data)
+        compressed = _gzip(data)
+        path = f"{base_prefix}{name}-{digest}.{ext}"
+        files[kind] = {
+            "path": path,
+            "hash": digest,
+            "size": len(data),
+            "gzip": {"path": f"{path}.gz", "size": len(compressed)},
+            "_blobs": ((path, data), (f"{path}.gz", compressed)),
+        }
+
+    blobs = [blob for entry in files.values() for blob in entry.pop("_blobs")]
+    # Keyed by kind: the same text moved from the CSS to the JS is a new rev.
+    hashes = {kind: entry["hash"] for kind, entry in files.items()}
+    rev = _hash_content(json.dumps(hashes, sort_keys=True).encode("ascii"))
+    manifest_path = f"{base_prefix}manifest-{rev}.json"
+    uploaded = []
+    # An existing manifest vouches for every file of the rev: one round trip.
+    if not default_storage.exists(manifest_path):
+        workers = min(settings.PUBLISH_UPLOAD_WORKERS, len(blobs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            stored = list(pool.map(lambda blob: _ensure_stored(*blob), blobs))
+        uploaded = [path for (path, _), new in zip(blobs, stored) if new]
+        manifest = json.dumps({"rev": rev, "files": files}, sort_keys=True)
+        _ensure_stored(manifest_path, manifest.encode("utf-8"))
+
+    return PublishResult(
+        html_path=files["html"]["path"],
+        css_path=files["css"]["path"] if "css" in files else None,
+        js_path=files["js"]["path"] if "js" in files else None,
+        rev=f"rev-{rev}",
+        manifest_path=manifest_path,
+        uploaded=uploaded,
+    )
+
+
+def publish_page(page: Page, env: str) -> PublishResult:
+    """Publish ``page``'s assets, mark it live at the new rev and cache its splash artifact."""
+    result = publish_page_assets(
+        page.tenant_id, env, page.html or "", page.css or "", page.js or ""
+    )
+    page.status = "published"
+    page.rev = result.rev
+    page.save(update_fields=["status", "rev", "updated_at"])
+    store_page_artifact(page)
+    return result
@@ -1,30 +1,46 @@
 from rest_framework import decorators, response, status, viewsets
 
+from core.api import ValuesReadMixin
+
 from .models import Page
 from .serializers import PageSerializer
-from .utils import publish_page_assets
+from .utils import publish_page
 
 
-class PageViewSet(viewsets.ModelViewSet):
+class PageViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Page.objects.all().order_by("-updated_at")
     serializer_class = PageSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "status",
+        "html",
+        "css",
+        "js",
+        "rev",
+        "publish_at",
+        "meta_json",
+        "tenant",
+        "brand",
+        "site",
+    )
 
     @decorators.action(detail=True, methods=["post"], url_path="publish")
     def publish(self, request, pk=None):
         page = self.get_object()
         env = request.data.get("env", "dev")
-        result = publish_page_assets(
-            page.tenant_id, env, page.html or "", page.css or "", page.js or ""
-        )
-        page.status = "published"
-        page.rev = result.html_path.rsplit("/", 1)[-1]
-        page.save(update_fields=["status", "rev"])
+        result = publish_page(page, env)
         return response.Response(
             {
                 "ok": True,
                 "html_path": result.html_path,
                 "css_path": result.css_path,
                 "js_path": result.js_path,
+                "rev": result.rev,
+                "manifest_path": result.manifest_path,
+                "uploaded": result.uploaded,
             },
             status=status.HTTP_200_OK,
         )
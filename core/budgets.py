@@ -0,0 +1,112 @@
+"""Per-endpoint query-count and wall-time budgets.
+
+A :class:`Budget` names one request and the most queries and milliseconds it
+may take once warm. :func:`measure` replays it through the test client (one
+warm-up call for caches and artifacts, then ``repeats`` timed calls) and
+records the worst query count and the median time. :func:`write_report`
+saves the measurements as JSON to ``settings.PERF_BUDGET_REPORT``, when set,
+for CI to keep and compare between runs.
+
+Times vary between machines far more than query counts do, so time budgets
+only fail a run with ``PERF_BUDGET_ENFORCE_TIME``; ``PERF_BUDGET_TIME_SCALE``
+stretches every ``max_ms`` on slow runners.
+"""
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    path: str
+    max_queries: int
+    max_ms: float
+    method: str = "get"
+    # A dict/str body, or a callable returning one for each call (e.g. a
+    # fresh MAC per call) when the endpoint must not see the same request twice.
+    data: Any = None
+    content_type: str | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Measurement:
+    name: str
+    method: str
+    path: str
+    status: int
+    queries: int
+    max_queries: int
+    ms: float
+    max_ms: float
+
+    @property
+    def within_budget(self) -> bool:
+        return self.queries <= self.max_queries and self.ms <= self.max_ms
+
+
+def _request(client, budget: Budget, call: int):
+    data = budget.data(call) if callable(budget.data) else budget.data
+    kwargs: dict[str, Any] = {"headers": budget.headers}
+    if budget.content_type:
+        kwargs["content_type"] = budget.content_type
+    response = getattr(client, budget.method)(budget.path, data, **kwargs)
+    if response.streaming:
+        # Streaming bodies query as they are consumed.
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(client, budget: Budget, repeats: int = 5) -> Measurement:
+    """Replay ``budget`` warm and return its worst query count and median time."""
+    response = _request(client, budget, 0)
+    queries, times = 0, []
+    for call in range(1, repeats + 1):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = _request(client, budget, call)
+            times.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, len(captured))
+    return Measurement(
+        name=budget.name,
+        method=budget.method.upper(),
+        path=budget.path,
+        status=response.status_code,
+        queries=queries,
+        max_queries=budget.max_queries,
+        ms=round(statistics.median(times), 3),
+        max_ms=budget.max_ms * settings.PERF_BUDGET_TIME_SCALE,
+    )
+
+
+def write_report(
+    measurements: list[Measurement], fixtures: dict[str, int] | None = None
+) -> Path | None:
+    """Write ``measurements`` to ``settings.PERF_BUDGET_REPORT``; returns the path.
+
+    Does nothing (and returns ``None``) when no report path is configured.
+    """
+    if not settings.PERF_BUDGET_REPORT:
+        return None
+    path = Path(settings.PERF_BUDGET_REPORT)
+    report = {
+        "generated_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "fixtures": fixtures or {},
+        "endpoints": [{**asdict(m), "within_budget": m.within_budget} for m in measurements],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    return path
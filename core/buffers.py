@@ -0,0 +1,162 @@
+"""Write-behind buffering for high-volume inserts.
+
+A :class:`BulkWriteBuffer` collects unsaved model instances in memory and a
+background thread writes them with ``bulk_create`` once ``max_size`` rows are
+pending or the oldest row is ``max_age`` seconds old. Whatever is left is
+flushed at interpreter exit. Rows are lost if the process is killed hard, so
+only use it for data where that is acceptable (analytics events, audit rows).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+from django.db import close_old_connections
+
+from . import counters
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriteBuffer:
+    def __init__(
+        self,
+        model,
+        max_size: int = 500,
+        max_age: float = 2.0,
+        max_pending: int = 50_000,
+        enabled: bool = True,
+    ):
+        self.model = model
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._rows: list = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._pid = 0
+        self._stats = {
+            "added": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "peak_depth": 0,
+            "last_flush_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+        atexit.register(self.stop)
+
+    def add(self, obj) -> None:
+        self.extend([obj])
+
+    def extend(self, objs: list) -> None:
+        if not objs:
+            return
+        if not self.enabled:
+            self.model.objects.bulk_create(objs, batch_size=self.max_size)
+            counters.add(self.model, len(objs))
+            return
+        self._ensure_thread()
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.extend(objs)
+            overflow = len(self._rows) - self.max_pending
+            if overflow > 0:
+                del self._rows[:overflow]
+                self._stats["dropped"] += overflow
+            depth = len(self._rows)
+            self._stats["added"] += len(objs)
+            self._stats["peak_depth"] = max(self._stats["peak_depth"], depth)
+        if depth >= self.max_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            written = self._write(rows)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats["written"] += written
+                self._stats["dropped"] += len(rows) - written
+                self._stats["flushes"] += 1
+                self._stats["last_flush_size"] = written
+                self._stats["last_flush_ms"] = elapsed_ms
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+            return written
+
+    def _write(self, rows: list) -> int:
+        try:
+            self.model.objects.bulk_create(rows, batch_size=self.max_size)
+            counters.add(self.model, len(rows))
+            return len(rows)
+        except Exception:
+            logger.exception("Bulk insert of %d %s rows failed", len(rows), self.model.__name__)
+        with self._lock:
+            self._stats["failed_flushes"] += 1
+        # Fall back to row-by-row so one bad row does not take the batch with it.
+        written = 0
+        for row in rows:
+            try:
+                row.save(force_insert=True)
+                written += 1
+            except Exception:
+                logger.warning("Dropping unwritable %s row", self.model.__name__, exc_info=True)
+        return written
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            depth = len(self._rows)
+            oldest = time.monotonic() - self._oldest if depth else 0.0
+            return {"depth": depth, "oldest_age_s": round(oldest, 3), **self._stats}
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.max_age + 5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        # Started lazily, and again in a forked child whose parent had one.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.model.__name__}-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        timeout = self.max_age
+        while not self._stopping:
+            self._wake.wait(timeout=timeout)
+            self._wake.clear()
+            with self._lock:
+                depth = len(self._rows)
+                age = time.monotonic() - self._oldest if depth else 0.0
+            if depth >= self.max_size or (depth and age >= self.max_age):
+                self.flush()
+                close_old_connections()
+                timeout = self.max_age
+            else:
+                timeout = self.max_age - age if depth else self.max_age
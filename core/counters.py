@@ -0,0 +1,116 @@
+"""Row counts for the admin dashboard, kept in the cache instead of COUNT(*).
+
+Each model in ``settings.DASHBOARD_COUNTERS`` has one cache key holding its
+row count. Single-row saves and deletes adjust it through signals (after
+commit, so rolled-back writes do not count); bulk paths that skip signals
+(``BulkWriteBuffer``, batched event ingest, event retention) call :func:`add`
+themselves. A missing or expired count is recounted on read. Other models
+are never cached, since nothing would keep their count current: every read
+counts them (see :func:`count_rows`).
+
+Counts can drift: cascaded bulk deletes and queryset ``update``/``delete``
+calls elsewhere are not seen. ``reconcile_counters`` recounts periodically,
+and ``COUNTER_TTL`` bounds the drift even without it. Above
+``COUNTER_EXACT_LIMIT`` rows a recount uses PostgreSQL's planner estimate
+(``pg_class.reltuples``, kept current by autovacuum) instead of a scan.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models.signals import post_delete, post_save
+
+# Deleted in bulk by code that adjusts the count itself (event retention);
+# a post_delete receiver would turn those fast DELETEs into row-by-row ones.
+_NO_DELETE_SIGNAL = frozenset({"ads.Event"})
+
+
+def _key(label: str) -> str:
+    return f"row-count:{label}"
+
+
+def _tracked(model: type[models.Model]) -> str | None:
+    label = model._meta.label
+    return label if label in settings.DASHBOARD_COUNTERS else None
+
+
+def is_tracked(model: type[models.Model]) -> bool:
+    """Whether ``model``'s cached count is kept current by signals and bulk hooks."""
+    return _tracked(model) is not None
+
+
+def estimated_count(model: type[models.Model]) -> int | None:
+    """The planner's row estimate where the backend keeps one, else ``None``."""
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    # -1 means the table was never analyzed.
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+def count_rows(model: type[models.Model]) -> int:
+    """Exact up to ``COUNTER_EXACT_LIMIT`` rows, estimated past it when possible."""
+    estimate = estimated_count(model)
+    if estimate is not None and estimate > settings.COUNTER_EXACT_LIMIT:
+        return estimate
+    return model.objects.count()
+
+
+def get_count(model: type[models.Model]) -> int:
+    """Cached row count of a tracked ``model``, counting once when the cache has none.
+
+    Untracked models are counted on every call.
+    """
+    label = _tracked(model)
+    if label is None:
+        return count_rows(model)
+    key = _key(label)
+    value = cache.get(key)
+    if value is None:
+        value = count_rows(model)
+        # add(), not set(): an increment that landed meanwhile is kept.
+        cache.add(key, value, timeout=settings.COUNTER_TTL)
+    return value
+
+
+def add(model: type[models.Model], delta: int) -> None:
+    """Adjust a tracked model's count by ``delta`` rows; untracked models are ignored."""
+    label = _tracked(model)
+    if label is None or not delta:
+        return
+    try:
+        cache.incr(_key(label), delta)
+    except ValueError:
+        # Not cached: the next read counts these rows anyway.
+        pass
+
+
+def reconcile(labels=None) -> dict[str, int]:
+    """Recount tracked models (or ``labels``) and store the results."""
+    counts = {}
+    for label in labels or settings.DASHBOARD_COUNTERS:
+        counts[label] = count_rows(apps.get_model(label))
+        cache.set(_key(label), counts[label], timeout=settings.COUNTER_TTL)
+    return counts
+
+
+def _saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: add(sender, 1))
+
+
+def _deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: add(sender, -1))
+
+
+def connect_signals() -> None:
+    for label in settings.DASHBOARD_COUNTERS:
+        model = apps.get_model(label)
+        post_save.connect(_saved, sender=model, dispatch_uid=f"row-count-save:{label}")
+        if label not in _NO_DELETE_SIGNAL:
+            post_delete.connect(_deleted, sender=model, dispatch_uid=f"row-count-delete:{label}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount the admin dashboard's cached row counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", action="append", dest="labels", help="app_label.Model; repeatable"
+        )
+
+    def handle(self, *args, labels=None, **options):
+        for label, count in reconcile(labels).items():
+            self.stdout.write(f"{label}: {count}")
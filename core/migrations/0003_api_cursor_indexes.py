@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_tenant_secret_salt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="brand",
+            index=models.Index(fields=["-created_at", "-id"], name="core_brand_created_acde58_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="controller",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="core_contro_created_8f09b9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="site",
+            index=models.Index(fields=["-created_at", "-id"], name="core_site_created_aeca3e_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ssid",
+            index=models.Index(fields=["-created_at", "-id"], name="core_ssid_created_0f73e8_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tenant",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="core_tenant_created_a03c66_idx"
+            ),
+        ),
+    ]
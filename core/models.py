@@ -17,6 +17,9 @@ class Tenant(TimeStampedModel):
     settings_json = models.JSONField(default=dict, blank=True)
     secret_salt = models.CharField(max_length=64, blank=True, default="")
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
     def __str__(self) -> str:
         return self.name
 
@@ -26,6 +29,9 @@ class Brand(TimeStampedModel):
     name = models.CharField(max_length=200)
     theme_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
     def __str__(self) -> str:
         return f"{self.tenant_id}:{self.name}"
 
@@ -39,6 +45,9 @@ class Site(TimeStampedModel):
     lon = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     timezone = models.CharField(max_length=64, default="UTC")
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
     def __str__(self) -> str:
         return f"{self.tenant_id}:{self.name}"
 
@@ -56,6 +65,9 @@ class Controller(TimeStampedModel):
     radius_profile_id = models.CharField(max_length=128, blank=True, default="")
     metadata = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
     def __str__(self) -> str:
         return f"{self.tenant_id}:{self.type}"
 
@@ -73,6 +85,9 @@ class SSID(TimeStampedModel):
     controller = models.ForeignKey(Controller, on_delete=models.PROTECT, related_name="ssids")
     walled_garden_json = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
     def __str__(self) -> str:
         return f"{self.site_id}:{self.name}"
 
@@ -0,0 +1,56 @@
+"""Pagination for large tables, in the admin REST API and the Django admin.
+
+API lists are paged by an opaque cursor over the viewset's own ordering
+(``-created_at`` or ``-updated_at``), so page N costs the same as page 1
+however many rows a tenant has. Admin changelists use
+:class:`EstimatedCountPaginator`, which never counts a whole table.
+
+Kept apart from ``core.api``: DRF imports ``DEFAULT_PAGINATION_CLASS`` while
+defining ``GenericAPIView``, so this module must not import
+``rest_framework.generics``.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+from . import counters
+
+
+class TimestampCursorPagination(CursorPagination):
+    """Cursor pages over the queryset's ``order_by``, with ``pk`` breaking ties."""
+
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(queryset.query.order_by) or ("-created_at",)
+        tie_breaker = "-pk" if ordering[0].startswith("-") else "pk"
+        if tie_breaker not in ordering:
+            ordering += (tie_breaker,)
+        return ordering
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator for large tables that never counts a whole table.
+
+    Counts are exact up to ``COUNTER_EXACT_LIMIT`` rows (a ``LIMIT``-ed
+    count) and capped there, except that an unfiltered table whose row count
+    is tracked in ``settings.DASHBOARD_COUNTERS`` and past the limit reports
+    that count.
+    An undercount would make the admin drop ``LIMIT`` and list every row,
+    so a small cached count is never trusted on its own. Pair it with
+    ``show_full_result_count = False`` so the admin skips its own unfiltered
+    COUNT(*).
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        limit = settings.COUNTER_EXACT_LIMIT
+        if not queryset.query.where and counters.is_tracked(queryset.model):
+            cached = counters.get_count(queryset.model)
+            if cached >= limit:
+                return cached
+        return queryset.order_by()[:limit].count()
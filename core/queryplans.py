@@ -0,0 +1,78 @@
+"""Query plans of ORM querysets, reduced to what the index tests assert on.
+
+:func:`explain` runs the backend's EXPLAIN for a queryset and reports the
+tables it reads in full and whether it sorts. On PostgreSQL sequential scans
+are disabled for the EXPLAIN, so on tiny test tables a ``Seq Scan`` still
+appears only when no index can answer the query at all. SQLite's planner
+assumes large tables without ``ANALYZE`` and needs no such nudge.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.db import connections, transaction
+
+# "SCAN ads_event", "SCAN ads_event USING INDEX ..." or, before SQLite 3.36,
+# "SCAN TABLE ads_event ...". SEARCH lines are index lookups.
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+@dataclass
+class QueryPlan:
+    lines: list[str]
+    full_scans: list[str] = field(default_factory=list)
+    sorts: bool = False
+
+    def __str__(self) -> str:
+        return "\n".join(self.lines)
+
+
+def _sqlite_plan(cursor, sql: str, params) -> QueryPlan:
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    plan = QueryPlan([row[-1] for row in cursor.fetchall()])
+    for line in plan.lines:
+        match = _SQLITE_SCAN.match(line)
+        if match:
+            plan.full_scans.append(match.group(1))
+        elif line.startswith("USE TEMP B-TREE FOR"):
+            plan.sorts = True
+    return plan
+
+
+def _postgresql_plan(cursor, sql: str, params) -> QueryPlan:
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        raw = cursor.fetchone()[0]
+    root = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    plan = QueryPlan([])
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        kind = node["Node Type"]
+        plan.lines.append(f"{kind} {node.get('Relation Name', '')}".strip())
+        if kind == "Seq Scan":
+            plan.full_scans.append(node["Relation Name"])
+        elif kind in ("Sort", "Incremental Sort"):
+            plan.sorts = True
+        nodes.extend(node.get("Plans", ()))
+    return plan
+
+
+_PLANNERS = {"sqlite": _sqlite_plan, "postgresql": _postgresql_plan}
+
+
+def supports_explain(using: str = "default") -> bool:
+    return connections[using].vendor in _PLANNERS
+
+
+def explain(queryset) -> QueryPlan:
+    """The plan of ``queryset`` on its database (SQLite or PostgreSQL)."""
+    connection = connections[queryset.db]
+    planner = _PLANNERS.get(connection.vendor)
+    if planner is None:
+        raise NotImplementedError(f"no query plan support for {connection.vendor}")
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        return planner(cursor, sql, params)
@@ -0,0 +1,233 @@
+"""Token-bucket rate limiting for portal endpoints.
+
+Limits are configured per scope in ``settings.RATE_LIMITS`` as
+``{"auth": {"mac": "10/m", "tenant": "6000/m"}}``: each dimension is a bucket
+holding up to N tokens that refills at N per period, so "10/m" allows a
+burst of 10 and then one request every six seconds. A request consumes one
+token from every bucket of its scope, or from none of them if any is empty.
+:func:`charge` takes more for requests that carry many items (event
+batches); a bucket may go into debt then, and refuses until it refills.
+
+With ``REDIS_URL`` set the check is one Lua script call, atomic across all
+workers and timed by the Redis clock. Otherwise buckets live in process
+memory: exact within a process, but each worker counts on its own.
+"""
+
+import functools
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$")
+_NOT_HEX = re.compile(r"[^0-9a-f]")
+
+# KEYS are bucket keys; ARGV[1] is the cost, then (capacity, tokens per second) per key.
+_REDIS_SCRIPT = """
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local wait = 0
+local tokens = {}
+local cost = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local b = redis.call('HMGET', key, 'tokens', 'ts')
+  local left = tonumber(b[1]) or capacity
+  local ts = tonumber(b[2]) or t
+  left = math.min(capacity, left + math.max(0, t - ts) * rate)
+  if left < 1 then
+    wait = math.max(wait, (1 - left) / rate)
+  end
+  tokens[i] = left
+end
+if wait > 0 then
+  return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local left = tokens[i] - cost
+  redis.call('HSET', key, 'tokens', left, 'ts', t)
+  redis.call('PEXPIRE', key, math.ceil((capacity - left) / rate * 1000))
+end
+return '0'
+"""
+
+
+@functools.lru_cache(maxsize=256)
+def parse_rate(rate: str) -> tuple[float, float]:
+    """``"30/m"`` or ``"5/10s"`` -> ``(capacity, tokens per second)``."""
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}; expected e.g. '30/m' or '5/10s'")
+    count, multiplier, unit = match.groups()
+    seconds = int(multiplier or 1) * _PERIODS[unit]
+    return float(count), int(count) / seconds
+
+
+class LocalBuckets:
+    """In-process token buckets, evicting the least recently used past ``maxsize``."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, limits: list[tuple[str, float, float]], cost: int = 1) -> float:
+        """Take ``cost`` tokens from each bucket; returns 0, or seconds until allowed.
+
+        Allowed while every bucket holds a token, even if ``cost`` leaves it
+        in debt.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, capacity, rate in limits:
+                tokens, ts = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - ts) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                levels.append(tokens)
+            if wait:
+                return wait
+            for (key, _, _), tokens in zip(limits, levels):
+                self._buckets[key] = (tokens - cost, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBuckets:
+    def __init__(self):
+        from django_redis import get_redis_connection
+
+        self._script = get_redis_connection("default").register_script(_REDIS_SCRIPT)
+
+    def consume(self, limits: list[tuple[str, float, float]], cost: int = 1) -> float:
+        args = [cost]
+        for _, capacity, rate in limits:
+            args += [capacity, rate]
+        return float(self._script(keys=[key for key, _, _ in limits], args=args))
+
+
+local_buckets = LocalBuckets()
+_redis_buckets: RedisBuckets | None = None
+
+
+def _backend():
+    global _redis_buckets
+    if not settings.REDIS_URL:
+        return local_buckets
+    if _redis_buckets is None:
+        _redis_buckets = RedisBuckets()
+    return _redis_buckets
+
+
+def _client_ip(request: HttpRequest) -> str | None:
+    return request.META.get("REMOTE_ADDR") or None
+
+
+def _tenant(request: HttpRequest) -> str | None:
+    # Same sources as the views: URL, batch ingest header, form, query string.
+    tenant_id = (
+        (request.resolver_match.kwargs.get("tenant_id") if request.resolver_match else None)
+        or request.headers.get("X-Portal-Tenant")
+        or request.POST.get("tenant_id")
+        or request.GET.get("tenant_id")
+    )
+    return str(tenant_id or "") or None
+
+
+def _per_tenant(field: str, normalize: Callable[[str], str]):
+    def extract(request: HttpRequest) -> str | None:
+        value = request.POST.get(field)
+        if not value:
+            return None
+        return f"{_tenant(request)}:{normalize(value)}"
+
+    return extract
+
+
+KEY_FUNCTIONS: dict[str, Callable[[HttpRequest], str | None]] = {
+    "ip": _client_ip,
+    "tenant": _tenant,
+    "mac": _per_tenant("mac", lambda value: _NOT_HEX.sub("", value.lower())),
+    "email": _per_tenant("email", lambda value: value.strip().lower()),
+}
+
+
+def check(scope: str, request: HttpRequest, cost: int = 1) -> float:
+    """Consume ``cost`` tokens (one request) for ``scope``; returns 0, or seconds to wait."""
+    limits = []
+    for dimension, rate in settings.RATE_LIMITS.get(scope, {}).items():
+        value = KEY_FUNCTIONS[dimension](request)
+        if value is not None:
+            capacity, per_second = parse_rate(rate)
+            limits.append((f"rl:{scope}:{dimension}:{value}", capacity, per_second))
+    if not limits:
+        return 0.0
+    return _backend().consume(limits, cost)
+
+
+def charge(scope: str, request: HttpRequest, cost: int) -> JsonResponse | None:
+    """Consume ``cost`` more tokens for ``scope`` from inside a view.
+
+    For requests whose weight is only known once parsed. Returns the 429
+    response to send, or ``None`` when allowed or rate limiting is off.
+    """
+    if not settings.RATE_LIMIT_ENABLED or cost <= 0:
+        return None
+    wait = check(scope, request, cost)
+    return _limited(wait) if wait else None
+
+
+def _limited(wait: float) -> JsonResponse:
+    resp = JsonResponse({"ok": False, "error": "rate_limited"}, status=429)
+    resp["Retry-After"] = str(max(1, math.ceil(wait)))
+    return resp
+
+
+def rate_limit(scope: str):
+    """Answer 429 with ``Retry-After`` once a request exhausts any bucket of ``scope``."""
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if settings.RATE_LIMIT_ENABLED:
+                    if settings.REDIS_URL:
+                        wait = await sync_to_async(check, thread_sensitive=False)(scope, request)
+                    else:
+                        wait = check(scope, request)
+                    if wait:
+                        return _limited(wait)
+                return await view(request, *args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED:
+                wait = check(scope, request)
+                if wait:
+                    return _limited(wait)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
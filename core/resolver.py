@@ -0,0 +1,216 @@
+"""Cached tenant/site lookups for the portal hot paths.
+
+Lookups go through a small per-process LRU, then the Django cache, and only
+then the database. Records are immutable snapshots; ``post_save``/``post_delete``
+on :class:`Tenant` and :class:`Site` evict them (see ``core.signals``) from
+this process's LRU and from the cache.
+
+Other worker processes only see the eviction through a shared cache
+(``REDIS_URL``): there they drop their local copy after ``RESOLVER_LOCAL_TTL``
+seconds. With the default local-memory cache each process has its own
+cached copy too, so another worker can serve a stale record for up to
+``RESOLVER_CACHE_TTL`` seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Site, Tenant
+
+
+@dataclass(frozen=True, slots=True)
+class TenantRecord:
+    id: int
+    name: str
+    status: str
+    secret_salt: str
+    settings: Mapping[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class SiteRecord:
+    id: int
+    tenant_id: int
+    brand_id: int
+    name: str
+    timezone: str
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU(settings.RESOLVER_LOCAL_SIZE, settings.RESOLVER_LOCAL_TTL)
+
+
+def _tenant_key(tenant_id: int) -> str:
+    return f"resolver:tenant:{tenant_id}"
+
+
+def _site_key(site_id: int) -> str:
+    return f"resolver:site:{site_id}"
+
+
+def _as_id(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _tenant_record(row: dict) -> TenantRecord:
+    return TenantRecord(
+        id=row["id"],
+        name=row["name"],
+        status=row["status"],
+        secret_salt=row["secret_salt"],
+        settings=MappingProxyType(row["settings_json"] or {}),
+    )
+
+
+def _site_record(row: dict) -> SiteRecord:
+    return SiteRecord(
+        id=row["id"],
+        tenant_id=row["tenant_id"],
+        brand_id=row["brand_id"],
+        name=row["name"],
+        timezone=row["timezone"],
+    )
+
+
+_TENANT_FIELDS = ("id", "name", "status", "secret_salt", "settings_json")
+_SITE_FIELDS = ("id", "tenant_id", "brand_id", "name", "timezone")
+
+
+def resolve_tenant(tenant_id: Any) -> TenantRecord:
+    """Return the tenant record or raise ``Tenant.DoesNotExist``."""
+    pk = _as_id(tenant_id)
+    if pk is None:
+        raise Tenant.DoesNotExist
+    key = _tenant_key(pk)
+    record = _local.get(key)
+    if record is not None:
+        return record
+    row = cache.get(key)
+    if row is None:
+        row = Tenant.objects.filter(pk=pk).values(*_TENANT_FIELDS).first()
+        if row is None:
+            raise Tenant.DoesNotExist
+        cache.set(key, row, timeout=settings.RESOLVER_CACHE_TTL)
+    record = _tenant_record(row)
+    _local.set(key, record)
+    return record
+
+
+async def aresolve_tenant(tenant_id: Any) -> TenantRecord:
+    """Async :func:`resolve_tenant`."""
+    pk = _as_id(tenant_id)
+    if pk is None:
+        raise Tenant.DoesNotExist
+    key = _tenant_key(pk)
+    record = _local.get(key)
+    if record is not None:
+        return record
+    row = await cache.aget(key)
+    if row is None:
+        row = await Tenant.objects.filter(pk=pk).values(*_TENANT_FIELDS).afirst()
+        if row is None:
+            raise Tenant.DoesNotExist
+        await cache.aset(key, row, timeout=settings.RESOLVER_CACHE_TTL)
+    record = _tenant_record(row)
+    _local.set(key, record)
+    return record
+
+
+def resolve_site(tenant_id: Any, site_id: Any) -> SiteRecord:
+    """Return the site record or raise ``Site.DoesNotExist`` if it is not the tenant's."""
+    pk = _as_id(site_id)
+    if pk is None:
+        raise Site.DoesNotExist
+    key = _site_key(pk)
+    record = _local.get(key)
+    if record is None:
+        row = cache.get(key)
+        if row is None:
+            row = Site.objects.filter(pk=pk).values(*_SITE_FIELDS).first()
+            if row is None:
+                raise Site.DoesNotExist
+            cache.set(key, row, timeout=settings.RESOLVER_CACHE_TTL)
+        record = _site_record(row)
+        _local.set(key, record)
+    if record.tenant_id != _as_id(tenant_id):
+        raise Site.DoesNotExist
+    return record
+
+
+async def aresolve_site(tenant_id: Any, site_id: Any) -> SiteRecord:
+    """Async :func:`resolve_site`."""
+    pk = _as_id(site_id)
+    if pk is None:
+        raise Site.DoesNotExist
+    key = _site_key(pk)
+    record = _local.get(key)
+    if record is None:
+        row = await cache.aget(key)
+        if row is None:
+            row = await Site.objects.filter(pk=pk).values(*_SITE_FIELDS).afirst()
+            if row is None:
+                raise Site.DoesNotExist
+            await cache.aset(key, row, timeout=settings.RESOLVER_CACHE_TTL)
+        record = _site_record(row)
+        _local.set(key, record)
+    if record.tenant_id != _as_id(tenant_id):
+        raise Site.DoesNotExist
+    return record
+
+
+def invalidate_tenant(tenant_id: int) -> None:
+    key = _tenant_key(tenant_id)
+    _local.pop(key)
+    cache.delete(key)
+
+
+def invalidate_site(site_id: int) -> None:
+    key = _site_key(site_id)
+    _local.pop(key)
+    cache.delete(key)
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Site, Tenant
+from .resolver import invalidate_site, invalidate_tenant
+
+# Each entry is evicted twice: now, so this transaction reads its own write,
+# and after commit, since a concurrent reader may have re-cached the old row
+# in between and would otherwise serve it for RESOLVER_CACHE_TTL.
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def _evict_tenant(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_tenant(pk)
+    transaction.on_commit(lambda: invalidate_tenant(pk))
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def _evict_site(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_site(pk)
+    transaction.on_commit(lambda: invalidate_site(pk))
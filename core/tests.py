@@ -0,0 +1,346 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from . import counters, queryplans
+from .models import Brand, Site, Tenant
+from .ratelimit import LocalBuckets, local_buckets, parse_rate
+from .resolver import resolve_site, resolve_tenant
+
+
+class ResolverTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="T1", secret_salt="s1")
+        self.brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        self.site = Site.objects.create(tenant=self.tenant, brand=self.brand, name="S1")
+
+    def test_hit_skips_database(self):
+        resolve_tenant(self.tenant.id)
+        resolve_site(self.tenant.id, self.site.id)
+        with self.assertNumQueries(0):
+            tenant = resolve_tenant(str(self.tenant.id))
+            site = resolve_site(tenant.id, self.site.id)
+        self.assertEqual(tenant.secret_salt, "s1")
+        self.assertEqual(site.tenant_id, self.tenant.id)
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(resolve_tenant(self.tenant.id).name, "T1")
+        self.tenant.name = "T2"
+        self.tenant.save()
+        self.assertEqual(resolve_tenant(self.tenant.id).name, "T2")
+        site_id = self.site.id
+        resolve_site(self.tenant.id, site_id)
+        self.site.delete()
+        with self.assertRaises(Site.DoesNotExist):
+            resolve_site(self.tenant.id, site_id)
+
+    def test_eviction_repeats_after_commit(self):
+        from .resolver import _tenant_key
+
+        stale = Tenant.objects.filter(pk=self.tenant.pk).values().first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.name = "T2"
+            self.tenant.save()
+            # A concurrent reader caches the committed (old) row meanwhile.
+            cache.set(_tenant_key(self.tenant.id), stale)
+        self.assertEqual(resolve_tenant(self.tenant.id).name, "T2")
+
+    def test_site_of_other_tenant_is_not_found(self):
+        other = Tenant.objects.create(name="T2")
+        with self.assertRaises(Site.DoesNotExist):
+            resolve_site(other.id, self.site.id)
+        with self.assertRaises(Tenant.DoesNotExist):
+            resolve_tenant("nope")
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_follow_saves_deletes_and_bulk_writes(self):
+        from ads.models import Event
+
+        from .buffers import BulkWriteBuffer
+
+        self.assertEqual(counters.get_count(Tenant), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            tenant = Tenant.objects.create(name="T1")
+            Tenant.objects.create(name="T2").delete()
+        brand = Brand.objects.create(tenant=tenant, name="B1")
+        site = Site.objects.create(tenant=tenant, brand=brand, name="S1")
+        self.assertEqual(counters.get_count(Event), 0)
+        buffer = BulkWriteBuffer(Event, enabled=False)
+        buffer.extend([Event(tenant=tenant, site=site, type="click") for _ in range(3)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.get_count(Tenant), 1)
+            self.assertEqual(counters.get_count(Event), 3)
+
+    def test_rolled_back_create_is_not_counted(self):
+        from django.db import transaction
+
+        self.assertEqual(counters.get_count(Tenant), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Tenant.objects.create(name="T1")
+                raise RuntimeError
+        self.assertEqual(counters.get_count(Tenant), 0)
+
+    def test_reconcile_fixes_drift(self):
+        self.assertEqual(counters.get_count(Tenant), 0)
+        Tenant.objects.bulk_create([Tenant(name="T1"), Tenant(name="T2")])
+        self.assertEqual(counters.get_count(Tenant), 0)
+        self.assertEqual(counters.reconcile(["core.Tenant"]), {"core.Tenant": 2})
+        self.assertEqual(counters.get_count(Tenant), 2)
+
+    def test_untracked_models_are_counted_on_every_read(self):
+        from authsvc.models import Voucher
+
+        tenant = Tenant.objects.create(name="T1")
+        self.assertEqual(counters.get_count(Voucher), 0)
+        Voucher.objects.bulk_create([Voucher(tenant=tenant, code=f"CODE000{i}") for i in range(3)])
+        self.assertEqual(counters.get_count(Voucher), 3)
+        self.assertIsNone(cache.get("row-count:authsvc.Voucher"))
+
+    @override_settings(COUNTER_EXACT_LIMIT=10)
+    def test_paginator_trusts_only_tracked_counts(self):
+        from authsvc.models import GuestUser
+
+        from .pagination import EstimatedCountPaginator
+
+        cache.set("row-count:authsvc.GuestUser", 500)
+        cache.set("row-count:core.Tenant", 500)
+        self.assertEqual(EstimatedCountPaginator(GuestUser.objects.all(), 20).count, 0)
+        self.assertEqual(EstimatedCountPaginator(Tenant.objects.all(), 20).count, 500)
+
+
+class RateLimitTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("30/m"), (30.0, 0.5))
+        self.assertEqual(parse_rate("5/10s"), (5.0, 0.5))
+        with self.assertRaises(ValueError):
+            parse_rate("often")
+
+    @mock.patch("core.ratelimit.time.monotonic")
+    def test_bucket_bursts_then_refills(self, monotonic):
+        monotonic.return_value = 100.0
+        buckets = LocalBuckets()
+        limits = [("a", 3.0, 0.5)]
+        self.assertEqual([buckets.consume(limits) for _ in range(3)], [0.0] * 3)
+        self.assertAlmostEqual(buckets.consume(limits), 2.0)
+        monotonic.return_value = 102.0
+        self.assertEqual(buckets.consume(limits), 0.0)
+        self.assertGreater(buckets.consume(limits), 0.0)
+
+    def test_denied_request_consumes_nothing(self):
+        buckets = LocalBuckets()
+        buckets.consume([("full", 1.0, 1.0)])
+        self.assertGreater(buckets.consume([("other", 5.0, 1.0), ("full", 1.0, 1.0)]), 0)
+        self.assertEqual(buckets.consume([("other", 1.0, 1.0)]), 0.0)
+
+    @mock.patch("core.ratelimit.time.monotonic", return_value=100.0)
+    def test_costly_request_leaves_the_bucket_in_debt(self, monotonic):
+        buckets = LocalBuckets()
+        self.assertEqual(buckets.consume([("a", 5.0, 1.0)], cost=8), 0.0)
+        self.assertAlmostEqual(buckets.consume([("a", 5.0, 1.0)]), 4.0)
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={"otp": {"email": "2/m"}})
+class RateLimitViewTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.tenant = Tenant.objects.create(name="T1")
+
+    def test_decorated_view_answers_429(self):
+        c = Client()
+        for _ in range(2):
+            data = {"tenant_id": self.tenant.id, "email": "a@b.com"}
+            self.assertEqual(c.post("/auth/email-otp", data).status_code, 200)
+        resp = c.post("/auth/email-otp", {"tenant_id": self.tenant.id, "email": "A@b.com "})
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "30")
+        other = c.post("/auth/email-otp", {"tenant_id": self.tenant.id, "email": "c@d.com"})
+        self.assertEqual(other.status_code, 200)
+
+    @override_settings(ALLOW_UNAUTH_EVENTS=True, RATE_LIMITS={"events": {"tenant": "5/m"}})
+    def test_event_batch_pays_per_accepted_line(self):
+        from ads.models import Event
+
+        brand = Brand.objects.create(tenant=self.tenant, name="B1")
+        site = Site.objects.create(tenant=self.tenant, brand=brand, name="S1")
+        other = Tenant.objects.create(name="T2")
+        body = "\n".join(json.dumps({"type": "click", "site_id": site.id}) for _ in range(8))
+
+        def post(tenant):
+            return Client().post(
+                f"/e/batch?site_id={site.id}",
+                body,
+                content_type="application/x-ndjson",
+                headers={"X-Portal-Tenant": str(tenant.id)},
+            )
+
+        self.assertEqual(post(self.tenant).json()["accepted"], 8)
+        resp = post(self.tenant)
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "48")
+        self.assertEqual(Event.objects.count(), 8)
+        # Keyed on the header's tenant: others are unaffected.
+        self.assertEqual(post(other).status_code, 200)
+
+
+@override_settings(RATE_LIMIT_ENABLED=True)
+class RateLimitDefaultsTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.tenant = Tenant.objects.create(name="T1")
+
+    def test_guests_behind_one_nat_address_are_not_throttled(self):
+        c = Client(REMOTE_ADDR="203.0.113.7")
+        for i in range(40):
+            data = {"tenant_id": self.tenant.id, "email": f"guest{i}@example.com"}
+            self.assertEqual(c.post("/auth/email-otp", data).status_code, 200)
+
+
+class AdminAPITests(TestCase):
+    def setUp(self):
+        self.tenants = [
+            Tenant.objects.create(name=f"T{n}", settings_json={"blob": "x" * 100}) for n in range(5)
+        ]
+
+    def test_cursor_pages_cover_every_row_once(self):
+        c = Client()
+        names = []
+        url = "/api/admin/tenants/?page_size=2"
+        while url:
+            data = c.get(url).json()
+            names += [row["name"] for row in data["results"]]
+            url = data["next"]
+        self.assertEqual(names, ["T4", "T3", "T2", "T1", "T0"])
+
+    def test_sparse_fields_select_only_requested_columns(self):
+        c = Client()
+        with self.assertNumQueries(1) as queries:
+            data = c.get("/api/admin/tenants/", {"fields": "id,name"}).json()
+        self.assertEqual(data["results"][0], {"id": self.tenants[-1].id, "name": "T4"})
+        self.assertNotIn("settings_json", queries.captured_queries[0]["sql"])
+
+        with self.assertNumQueries(1):
+            row = c.get(f"/api/admin/tenants/{self.tenants[0].id}/", {"fields": "name"}).json()
+        self.assertEqual(row, {"name": "T0"})
+
+        resp = c.get("/api/admin/tenants/", {"fields": "name,nope"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json(), {"fields": ["nope"]})
+
+    def test_values_reads_match_serializers(self):
+        from decimal import Decimal
+
+        from django.utils import timezone
+        from rest_framework.renderers import JSONRenderer
+
+        from ads.models import Campaign, Creative, Event, Slot
+        from authsvc.models import Voucher
+        from contentmgmt.models import Page
+        from portalopenwisp.urls import router
+
+        from .models import SSID, Controller
+
+        tenant = self.tenants[0]
+        brand = Brand.objects.create(tenant=tenant, name="B1", theme_json={"c": 1})
+        site = Site.objects.create(
+            tenant=tenant, brand=brand, name="S1", lat=Decimal("1.5"), lon=None
+        )
+        controller = Controller.objects.create(
+            tenant=tenant, type="ruckus_sz", base_url="https://c.example.com"
+        )
+        SSID.objects.create(site=site, name="Guest", controller=controller)
+        page = Page.objects.create(tenant=tenant, brand=brand, site=site, name="P1", html="<b/>")
+        campaign = Campaign.objects.create(
+            tenant=tenant, name="C1", budget=Decimal("12.5"), start_at=timezone.now()
+        )
+        Creative.objects.create(
+            campaign=campaign,
+            type="image",
+            asset_url="https://cdn.example.com/a.png",
+            click_url="https://example.com",
+        )
+        Slot.objects.create(page=page, position="hero")
+        Event.objects.create(tenant=tenant, site=site, type="click", payload_json={"k": [1]})
+        Voucher.objects.create(tenant=tenant, code="ABC123")
+
+        c = Client()
+        for prefix, viewset, _ in router.registry:
+            with self.subTest(prefix):
+                queryset = viewset.queryset.all()
+                expected = json.loads(
+                    JSONRenderer().render(viewset.serializer_class(queryset, many=True).data)
+                )
+                self.assertEqual(c.get(f"/api/admin/{prefix}/").json()["results"], expected)
+                detail = c.get(f"/api/admin/{prefix}/{expected[0]['id']}/").json()
+                self.assertEqual(detail, expected[0])
+
+
+class QueryPlanTests(TestCase):
+    """Each hot path is answered from an index, never a full table scan."""
+
+    def setUp(self):
+        if not queryplans.supports_explain():
+            self.skipTest("query plans are only checked on SQLite and PostgreSQL")
+
+    def hot_queries(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from ads.engine import _active_campaigns
+        from ads.retention import _expired_events
+        from analytics.export import EXPORT_KINDS, _keyset_page
+        from authsvc.vouchers import _redeemable
+        from contentmgmt.utils import _published_query
+
+        now = timezone.now()
+        site_events = EXPORT_KINDS["events"].queryset(
+            tenant_id=1, site_id=2, ts__gte=now - timedelta(days=1)
+        )
+        return {
+            "published page": (_published_query(1, 2)[:1], True),
+            "active campaigns": (_active_campaigns(1), False),
+            "voucher redemption": (_redeemable(1, "X"), False),
+            "event retention": (_expired_events(1, now, 1)[:5000], False),
+            "site event export": (_keyset_page(site_events, "ts", (now, 1))[:2000], False),
+        }
+
+    def test_hot_queries_use_indexes(self):
+        for name, (queryset, ordered_by_index) in self.hot_queries().items():
+            with self.subTest(name):
+                plan = queryplans.explain(queryset)
+                self.assertEqual(plan.full_scans, [], f"full scan in:\n{plan}")
+                if ordered_by_index:
+                    self.assertFalse(plan.sorts, f"sort in:\n{plan}")
+
+    def test_api_list_pages_follow_an_index(self):
+        from django.utils import timezone
+
+        from portalopenwisp.urls import router
+
+        from .pagination import TimestampCursorPagination
+
+        paginator = TimestampCursorPagination()
+        for prefix, viewset, _ in router.registry:
+            queryset = viewset.queryset
+            ordering = paginator.get_ordering(None, queryset, None)
+            column = ordering[0].lstrip("-")
+            # A later page: the cursor filters on the leading ordering column.
+            page = queryset.order_by(*ordering).filter(**{f"{column}__lt": timezone.now()})
+            with self.subTest(prefix):
+                plan = queryplans.explain(page[: paginator.page_size + 1])
+                self.assertEqual(plan.full_scans, [], f"full scan in:\n{plan}")
+                self.assertFalse(plan.sorts, f"sort in:\n{plan}")
+
+    def test_full_scan_is_reported(self):
+        from ads.models import Event
+
+        plan = queryplans.explain(Event.objects.filter(type="click"))
+        self.assertEqual(plan.full_scans, ["ads_event"])
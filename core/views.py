@@ -1,5 +1,6 @@
 from rest_framework import filters, viewsets
 
+from .api import ValuesReadMixin
 from .models import SSID, Brand, Controller, Site, Tenant
 from .serializers import (
     BrandSerializer,
@@ -12,32 +13,84 @@ from .serializers import (
 # Create your views here.
 
 
-class TenantViewSet(viewsets.ModelViewSet):
+class TenantViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Tenant.objects.all().order_by("-created_at")
     serializer_class = TenantSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "status",
+        "plan",
+        "settings_json",
+        "secret_salt",
+    )
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all().order_by("-created_at")
     serializer_class = BrandSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "theme_json",
+        "tenant",
+    )
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
 
 
-class SiteViewSet(viewsets.ModelViewSet):
+class SiteViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Site.objects.all().order_by("-created_at")
     serializer_class = SiteSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "address",
+        "lat",
+        "lon",
+        "timezone",
+        "tenant",
+        "brand",
+    )
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
 
 
-class SSIDViewSet(viewsets.ModelViewSet):
+class SSIDViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = SSID.objects.all().order_by("-created_at")
     serializer_class = SSIDSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "name",
+        "auth_mode",
+        "walled_garden_json",
+        "site",
+        "controller",
+    )
 
 
-class ControllerViewSet(viewsets.ModelViewSet):
+class ControllerViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Controller.objects.all().order_by("-created_at")
     serializer_class = ControllerSerializer
+    read_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "type",
+        "base_url",
+        "api_key",
+        "api_secret",
+        "radius_profile_id",
+        "metadata",
+        "tenant",
+    )
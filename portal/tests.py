@@ -1,8 +1,19 @@
-from django.test import Client, TestCase
+import gzip
+import hashlib
+import hmac
+import json
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, TestCase, override_settings
 
 from contentmgmt.models import Page
 from core.models import Brand, Site, Tenant
 
+from . import views
+
 
 class PortalTests(TestCase):
     def setUp(self):
@@ -24,12 +35,212 @@ class PortalTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertIn(b"P1", resp.content)
 
+    def test_splash_serves_publish_time_artifact(self):
+        page = Page.objects.get(name="P1")
+        page.html = "<html><body>P2<script>x()</script><iframe></iframe></body></html>"
+        page.save()
+        cache.clear()
+        c = Client()
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            c.post(f"/api/admin/pages/{page.id}/publish/", {"env": "test"})
+        with mock.patch("contentmgmt.utils.sanitize_html") as sanitize:
+            resp = c.get(f"/p/{self.tenant.id}/{self.site.id}")
+        sanitize.assert_not_called()
+        self.assertIn(b"P2", resp.content)
+        self.assertNotIn(b"<iframe>", resp.content)
+
+    def test_splash_conditional_get(self):
+        cache.clear()
+        c = Client()
+        url = f"/p/{self.tenant.id}/{self.site.id}"
+        resp = c.get(url)
+        etag = resp["ETag"]
+        self.assertEqual(resp["Cache-Control"], "public, max-age=0, must-revalidate")
+        self.assertIn("Last-Modified", resp)
+
+        with mock.patch("portal.views.get_page_artifact") as artifact:
+            resp = c.get(url, headers={"If-None-Match": etag})
+        artifact.assert_not_called()
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+        page = Page.objects.get(name="P1")
+        page.html = "<html><body>P1 edited</body></html>"
+        page.save()
+        resp = c.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_splash_serves_gzipped_bundle(self):
+        page = Page.objects.get(name="P1")
+        page.html = "<b>P1</b>" + "<i>welcome</i>" * 40
+        page.css = "/* theme */\nbody {\n  color: red;\n  content: 'a  b';\n}\n"
+        page.js = "  greet();\n\n  // done\n  var s = '</script>';\n"
+        page.save()
+        cache.clear()
+        c = Client()
+        url = f"/p/{self.tenant.id}/{self.site.id}"
+
+        plain = c.get(url)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain["Vary"], "Accept-Encoding")
+        self.assertTrue(plain.content.startswith(b"<style>body{color:red;content:'a  b'}</style>"))
+        script = b"<script>greet();\n// done\nvar s = '<\\/script>';</script>"
+        self.assertTrue(plain.content.endswith(b"<i>welcome</i>" + script))
+
+        resp = c.get(url, headers={"Accept-Encoding": "br, gzip;q=0.8"})
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(resp.content), plain.content)
+        self.assertNotEqual(resp["ETag"], plain["ETag"])
+        resp = c.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+        self.assertNotIn("Content-Encoding", resp)
+
+    def test_cache_control_tenant_override(self):
+        Tenant.objects.filter(pk=self.tenant.pk).update(
+            settings_json={"cache_control": {"splash": "private, max-age=300"}}
+        )
+        cache.clear()
+        c = Client()
+        resp = c.get(f"/p/{self.tenant.id}/{self.site.id}")
+        self.assertEqual(resp["Cache-Control"], "private, max-age=300")
+        resp = c.get(f"/p/{self.tenant.id}/{self.site.id}/ads", {"slot": "hero"})
+        self.assertEqual(resp.json(), {"creative": None})
+        self.assertEqual(resp["Cache-Control"], "public, max-age=30")
+
+    def test_republish_uploads_only_changed_assets(self):
+        from django.core.files.storage import default_storage
+
+        from contentmgmt.utils import publish_page_assets
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            first = publish_page_assets(self.tenant.id, "test", "<p>A</p>", "p{}", "x()")
+            self.assertEqual(len(first.uploaded), 6)
+            with default_storage.open(first.css_path + ".gz") as fh:
+                self.assertEqual(gzip.decompress(fh.read()), b"p{}")
+            with default_storage.open(first.manifest_path) as fh:
+                manifest = json.load(fh)
+            self.assertEqual(f"rev-{manifest['rev']}", first.rev)
+            self.assertEqual(manifest["files"]["js"]["path"], first.js_path)
+
+            with mock.patch.object(default_storage, "save", wraps=default_storage.save) as save:
+                again = publish_page_assets(self.tenant.id, "test", "<p>A</p>", "p{}", "x()")
+                save.assert_not_called()
+                changed = publish_page_assets(self.tenant.id, "test", "<p>A</p>", "p{}", "y()")
+            self.assertEqual(again.rev, first.rev)
+            self.assertEqual(again.uploaded, [])
+            self.assertNotEqual(changed.rev, first.rev)
+            self.assertEqual(changed.uploaded, [changed.js_path, changed.js_path + ".gz"])
+            self.assertEqual(save.call_count, 3)
+
+            as_css = publish_page_assets(self.tenant.id, "test", "<p>A</p>", "p{}")
+            as_js = publish_page_assets(self.tenant.id, "test", "<p>A</p>", "", "p{}")
+            self.assertNotEqual(as_css.rev, as_js.rev)
+
+    async def test_async_hot_paths(self):
+        from ads.models import Campaign, Creative, Event
+
+        factory = AsyncRequestFactory()
+        resp = await views.splash_async(
+            factory.get("/"), tenant_id=self.tenant.id, site_id=self.site.id
+        )
+        self.assertIn(b"P1", resp.content)
+
+        campaign = await Campaign.objects.acreate(tenant=self.tenant, name="C1")
+        await Creative.objects.acreate(
+            campaign=campaign,
+            type="image",
+            asset_url="https://cdn.example.com/a.png",
+            click_url="https://example.com",
+        )
+        resp = await views.ad_decision_async(
+            factory.get("/", {"slot": "hero"}), tenant_id=self.tenant.id, site_id=self.site.id
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Cache-Control"], "no-store")
+        self.assertEqual(await Event.objects.filter(type="impression").acount(), 1)
+
+        with override_settings(ALLOW_UNAUTH_EVENTS=True):
+            resp = await views.event_ingest_async(
+                factory.post(
+                    "/e",
+                    f"tenant_id={self.tenant.id}&site_id={self.site.id}",
+                    content_type="application/x-www-form-urlencoded",
+                )
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(await Event.objects.acount(), 3)
+
     def test_admin_api_tenants(self):
         c = Client()
         resp = c.get("/api/admin/tenants/")
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
-        self.assertEqual(len(data), 1)
+        self.assertEqual(len(data["results"]), 1)
+
+    @override_settings(ALLOW_UNAUTH_EVENTS=True)
+    def test_event_ingest_rejects_foreign_site(self):
+        from ads.models import Event
+
+        c = Client()
+        form = "application/x-www-form-urlencoded"
+        ok = c.post("/e", f"tenant_id={self.tenant.id}&site_id={self.site.id}", content_type=form)
+        self.assertEqual(ok.status_code, 200)
+        bad = c.post("/e", f"tenant_id={self.tenant.id}&site_id=0", content_type=form)
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_event_batch_ndjson_gzip(self):
+        from ads.models import Event
+
+        self.tenant.secret_salt = "s1"
+        self.tenant.save()
+        lines = [
+            {"type": "impression", "campaign_id": 3, "ts": "2025-03-01T12:00:00Z"},
+            {"type": "click", "site_id": 0},
+            "not an object",
+            {"type": "splash_view", "site_id": self.site.id},
+            {"type": "click", "ts": 1e20},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines).encode() + b"\n\n"
+        signature = "sha256=" + hmac.new(b"s1", body, hashlib.sha256).hexdigest()
+        # Two gzip members, split mid-line, as a client flushing twice would send.
+        payload = gzip.compress(body[:40]) + gzip.compress(body[40:])
+
+        def post(sig, data=payload):
+            return Client().post(
+                f"/e/batch?site_id={self.site.id}",
+                data,
+                content_type="application/x-ndjson",
+                headers={
+                    "Content-Encoding": "gzip",
+                    "X-Portal-Tenant": str(self.tenant.id),
+                    "X-Portal-Signature": sig,
+                },
+            )
+
+        with mock.patch.object(views, "parse_event_line") as parse:
+            self.assertEqual(post("sha256=bad").status_code, 401)
+        parse.assert_not_called()
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(post(signature, payload[:-4]).status_code, 400)
+
+        resp = post(signature)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["accepted"], 2)
+        self.assertEqual(
+            resp.json()["rejected"],
+            [
+                {"line": 2, "error": "site"},
+                {"line": 3, "error": "json"},
+                {"line": 5, "error": "ts"},
+            ],
+        )
+        impression = Event.objects.get(type="impression")
+        self.assertEqual(impression.payload_json["campaign_id"], 3)
+        self.assertEqual(impression.ts.year, 2025)
+
+        with override_settings(EVENT_BATCH_MAX_BYTES=64):
+            self.assertEqual(post(signature).status_code, 413)
 
     def test_clickthrough_auth(self):
         c = Client()
@@ -72,3 +283,229 @@ class PortalTests(TestCase):
         )
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(resp.json()["ok"])
+
+
+class MinifyTests(SimpleTestCase):
+    def test_css_string_literals_are_untouched(self):
+        from contentmgmt.utils import minify_css
+
+        css = 'p {\n  content: "a  ;}  b" ;\n}\na { color: red; /* x */ }'
+        self.assertEqual(minify_css(css), 'p{content:"a  ;}  b"}a{color:red}')
+
+    def test_js_multiline_literals_are_untouched(self):
+        from contentmgmt.utils import minify_js
+
+        js = "  const t = `line1\n    line2`;\n\n  // it's `x\n  var s = 'a\\\n   b';\n"
+        expected = "const t = `line1\n    line2`;\n// it's `x\nvar s = 'a\\\n   b';"
+        self.assertEqual(minify_js(js), expected)
+
+
+# Measured as deployed with Redis: the in-process test cache is shared by all requests,
+# and sized so that it does not cull the fixtures' entries (LocMem keeps 300 by default).
+@override_settings(
+    SESSION_INDEX_ENABLED=True,
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "endpoint-budgets",
+            "OPTIONS": {"MAX_ENTRIES": 100_000},
+        }
+    },
+)
+class EndpointBudgetTests(TestCase):
+    """Warm query counts and median times of the portal and admin API endpoints.
+
+    Runs against a few thousand rows so list endpoints and lookups are not
+    flattered by empty tables. Query counts must hold; times only fail the
+    test with ``PERF_BUDGET_ENFORCE_TIME``. The numbers go to
+    ``settings.PERF_BUDGET_REPORT``, if set, whether or not the budgets hold.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.utils import timezone
+
+        from ads.models import Campaign, Creative, Event
+        from authsvc.identity import mac_hash
+        from authsvc.models import GuestUser, Session, Voucher
+
+        tenants = Tenant.objects.bulk_create(
+            Tenant(name=f"T{n}", secret_salt=f"salt-{n}") for n in range(20)
+        )
+        brands = Brand.objects.bulk_create(Brand(tenant=t, name=t.name) for t in tenants)
+        sites = Site.objects.bulk_create(
+            Site(tenant=b.tenant, brand=b, name=f"{b.name}-S{n}") for b in brands for n in range(10)
+        )
+        Page.objects.bulk_create(
+            Page(
+                tenant=s.tenant,
+                brand=s.brand,
+                site=s,
+                name=s.name,
+                status="published",
+                html="<b>Welcome</b>" + "<i>terms</i>" * 200,
+                css="body { color: #333; }\n" * 20,
+                js="init();\n" * 20,
+            )
+            for s in sites
+        )
+        campaigns = Campaign.objects.bulk_create(
+            Campaign(tenant=t, name=f"{t.name}-C{n}") for t in tenants for n in range(20)
+        )
+        Creative.objects.bulk_create(
+            Creative(
+                campaign=c,
+                type="image",
+                asset_url=f"https://cdn.example.com/{c.name}-{n}.png",
+                click_url="https://example.com",
+                width=300,
+                height=250,
+            )
+            for c in campaigns
+            for n in range(3)
+        )
+        now = timezone.now()
+        Event.objects.bulk_create(
+            Event(
+                tenant=s.tenant, site=s, type="splash_view", ts=now - timezone.timedelta(minutes=n)
+            )
+            for s in sites
+            for n in range(50)
+        )
+        cls.tenant, cls.site = tenants[0], sites[0]
+        macs = [f"02:00:00:00:{n // 256:02x}:{n % 256:02x}" for n in range(2000)]
+        guests = GuestUser.objects.bulk_create(
+            GuestUser(tenant=cls.tenant, mac=mac, mac_hash=mac_hash(cls.tenant.secret_salt, mac))
+            for mac in macs
+        )
+        Session.objects.bulk_create(Session(user=g, site=cls.site, mac=g.mac) for g in guests)
+        Voucher.objects.bulk_create(
+            Voucher(tenant=cls.tenant, code=f"BUDGET{n:04d}") for n in range(1000)
+        )
+        cls.fixtures = {
+            "tenants": len(tenants),
+            "sites": len(sites),
+            "campaigns": len(campaigns),
+            "events": Event.objects.count(),
+            "sessions": len(guests),
+            "vouchers": 1000,
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def signed(self, **payload) -> dict:
+        body = json.dumps({"tenant_id": self.tenant.id, "site_id": self.site.id, **payload})
+        digest = hmac.new(self.tenant.secret_salt.encode(), body.encode(), hashlib.sha256)
+        return {
+            "data": body,
+            "content_type": "application/json",
+            "headers": {"X-Portal-Signature": f"sha256={digest.hexdigest()}"},
+        }
+
+    def budgets(self, repeats=5):
+        from authsvc.otp import issue_otp
+        from core.budgets import Budget
+        from core.resolver import resolve_tenant
+
+        t, s = self.tenant.id, self.site.id
+        macs = [f"02:00:00:00:00:{n:02x}" for n in range(50)]
+        updates = [{"mac": mac, "bytes_up": 10, "bytes_down": 20, "ts": 1} for mac in macs]
+        admin_lists = ("tenants", "sites", "pages", "campaigns", "creatives", "events", "vouchers")
+        event = f"tenant_id={t}&site_id={s}&type=click"
+        event_sig = hmac.new(self.tenant.secret_salt.encode(), event.encode(), hashlib.sha256)
+
+        batch = "".join(
+            json.dumps({"type": "impression", "campaign_id": n}) + "\n" for n in range(100)
+        ).encode()
+        batch_sig = hmac.new(self.tenant.secret_salt.encode(), batch, hashlib.sha256)
+
+        def guest(n):
+            # A new device per call: repeat logins would take a different path.
+            return {"tenant_id": t, "site_id": s, "mac": f"aa:00:00:00:00:{n:02x}"}
+
+        # Codes are single-use: one pending code per call, issued up front.
+        otp_codes = [
+            issue_otp(resolve_tenant(t), f"member{n}@example.com") for n in range(repeats + 1)
+        ]
+
+        return [
+            # (name, path, max queries, max ms). Splash and ads are served from
+            # caches; their one query is the event INSERT.
+            Budget("splash", f"/p/{t}/{s}", 1, 50),
+            Budget("ad decision", f"/p/{t}/{s}/ads", 1, 50, data={"slot": "hero"}),
+            Budget(
+                "event ingest",
+                "/e",
+                1,
+                50,
+                method="post",
+                data=event,
+                content_type="application/x-www-form-urlencoded",
+                headers={"X-Portal-Signature": f"sha256={event_sig.hexdigest()}"},
+            ),
+            Budget(
+                "event batch",
+                f"/e/batch?site_id={s}",
+                1,
+                100,
+                "post",
+                data=batch,
+                content_type="application/x-ndjson",
+                headers={
+                    "X-Portal-Tenant": str(t),
+                    "X-Portal-Signature": f"sha256={batch_sig.hexdigest()}",
+                },
+            ),
+            Budget("active sessions", "/sessions/active", 0, 50, "post", **self.signed(macs=macs)),
+            Budget("accounting", "/acct", 3, 100, "post", **self.signed(updates=updates)),
+            Budget("clickthrough", "/auth/clickthrough", 2, 50, "post", data=guest),
+            Budget(
+                "voucher",
+                "/auth/voucher",
+                5,
+                100,
+                "post",
+                data=lambda n: {**guest(n), "code": f"BUDGET{n:04d}"},
+            ),
+            # Its one query is the audit row, which the buffer defers outside tests.
+            Budget(
+                "email otp",
+                "/auth/email-otp",
+                1,
+                50,
+                "post",
+                data=lambda n: {"tenant_id": t, "email": f"guest{n}@example.com"},
+            ),
+            # Audit row, guest upsert, its email, the session.
+            Budget(
+                "email otp verify",
+                "/auth/email-otp/verify",
+                4,
+                50,
+                "post",
+                data=lambda n: {
+                    **guest(0x80 + n),
+                    "email": f"member{n}@example.com",
+                    "code": otp_codes[n],
+                },
+            ),
+            Budget("ruckus wispr login", "/ruckus/wispr/login", 0, 10, "post"),
+            Budget("ruckus coa", "/ruckus/coa", 0, 10, "post"),
+            *(Budget(f"admin api {name}", f"/api/admin/{name}/", 1, 250) for name in admin_lists),
+            Budget(
+                "admin api event export", "/api/admin/export/events", 1, 250, data={"tenant": t}
+            ),
+        ]
+
+    def test_endpoints_within_budget(self):
+        from core.budgets import measure, write_report
+
+        measurements = [measure(Client(), budget) for budget in self.budgets()]
+        write_report(measurements, self.fixtures)
+        for m in measurements:
+            with self.subTest(m.name):
+                self.assertEqual(m.status, 200)
+                self.assertLessEqual(m.queries, m.max_queries)
+                if settings.PERF_BUDGET_ENFORCE_TIME:
+                    self.assertLessEqual(m.ms, m.max_ms)
@@ -1,11 +1,27 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+# Under ASGI the hot endpoints can run natively async; the sync views stay the
+# default because async views under WSGI pay for a thread hop per request.
+if settings.PORTAL_ASYNC_VIEWS:
+    splash, ad_decision, event_ingest = (
+        views.splash_async,
+        views.ad_decision_async,
+        views.event_ingest_async,
+    )
+else:
+    splash, ad_decision, event_ingest = views.splash, views.ad_decision, views.event_ingest
+
 urlpatterns = [
-    path("p/<int:tenant_id>/<int:site_id>", views.splash, name="portal-splash"),
-    path("p/<int:tenant_id>/<int:site_id>/ads", views.ad_decision, name="portal-ads"),
-    path("e", views.event_ingest, name="portal-event"),
+    path("p/<int:tenant_id>/<int:site_id>", splash, name="portal-splash"),
+    path("p/<int:tenant_id>/<int:site_id>/ads", ad_decision, name="portal-ads"),
+    path("e", event_ingest, name="portal-event"),
+    path("e/batch", views.event_ingest_batch, name="portal-event-batch"),
+    path("acct", views.accounting_ingest, name="portal-accounting"),
+    path("sessions/active", views.active_session_lookup, name="portal-active-sessions"),
+    path("metrics", views.worker_metrics, name="portal-metrics"),
     # Auth
     path("auth/clickthrough", views.auth_clickthrough, name="auth-clickthrough"),
     path("auth/email-otp", views.auth_email_otp, name="auth-email-otp"),
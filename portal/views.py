@@ -1,96 +1,176 @@
 import hashlib
 import hmac
-import random
-import string
+import json
 
-import bleach
 from django.conf import settings
-from django.core.cache import cache
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
 from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
-from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
-from ads.models import Campaign, Event
-from authsvc.models import EmailOTP, GuestUser, Session, Voucher
-from contentmgmt.models import Page
+from ads.engine import decision_engine
+from ads.ingest import (
+    BatchTooLarge,
+    arecord_event,
+    event_buffer,
+    iter_ndjson_lines,
+    parse_event_line,
+    record_event,
+)
+from ads.models import Event
+from authsvc.accounting import apply_accounting
+from authsvc.identity import normalize_mac, upsert_guest
+from authsvc.models import Session
+from authsvc.otp import issue_otp, normalize_email, verify_otp
+from authsvc.presence import active_sessions
+from authsvc.vouchers import redeem_voucher
+from contentmgmt.utils import (
+    PageArtifact,
+    PublishedPage,
+    aget_page_artifact,
+    apublished_page,
+    get_page_artifact,
+    page_etag,
+    published_page,
+)
+from core import counters
 from core.models import Site, Tenant
+from core.ratelimit import charge, rate_limit
+from core.resolver import (
+    SiteRecord,
+    TenantRecord,
+    aresolve_site,
+    aresolve_tenant,
+    resolve_site,
+    resolve_tenant,
+)
+
+SPLASH_CSP = (
+    "default-src 'self' https: data:; img-src 'self' https: data:; "
+    "script-src 'self' https: 'unsafe-inline'; style-src 'self' https: 'unsafe-inline'"
+)
+
+
+def _cache_control(tenant: TenantRecord, kind: str) -> str:
+    """``Tenant.settings_json["cache_control"][kind]``, else ``settings.CACHE_CONTROL``."""
+    overrides = tenant.settings.get("cache_control")
+    value = overrides.get(kind) if isinstance(overrides, dict) else None
+    return value if isinstance(value, str) and value else settings.CACHE_CONTROL[kind]
+
+
+def _accepts_gzip(request: HttpRequest) -> bool:
+    codings = {}
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        params = params.strip()
+        try:
+            codings[name.strip().lower()] = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            codings[name.strip().lower()] = 0.0
+    return codings.get("gzip", codings.get("*", 0.0)) > 0
+
+
+def _splash_not_modified(
+    request: HttpRequest, tenant: TenantRecord, page: PublishedPage
+) -> HttpResponse | None:
+    """Answer a matching conditional GET with 304, before the artifact is even fetched."""
+    gzipped = _accepts_gzip(request)
+    resp = get_conditional_response(
+        request,
+        etag=page_etag(page, gzipped),
+        last_modified=int(page.updated_at.timestamp()),
+    )
+    if resp is not None:
+        _splash_cache_headers(resp, tenant, page, gzipped)
+    return resp
+
+
+def _splash_cache_headers(
+    resp: HttpResponse, tenant: TenantRecord, page: PublishedPage, gzipped: bool
+) -> None:
+    # The tag follows what the client accepts, not what was sent, so it is
+    # known before the artifact is loaded.
+    resp["ETag"] = page_etag(page, gzipped)
+    resp["Last-Modified"] = http_date(page.updated_at.timestamp())
+    resp["Cache-Control"] = _cache_control(tenant, "splash")
+    patch_vary_headers(resp, ["Accept-Encoding"])
+
+
+def _splash_response(
+    request: HttpRequest, tenant, site, page, artifact: PageArtifact
+) -> HttpResponse:
+    gzipped = _accepts_gzip(request)
+    if artifact.body:
+        if gzipped and artifact.gzipped:
+            resp = HttpResponse(artifact.gzipped)
+            resp["Content-Encoding"] = "gzip"
+        else:
+            resp = HttpResponse(artifact.body)
+        resp["Content-Security-Policy"] = SPLASH_CSP
+    else:
+        hero_zone_slug = f"t{tenant.id}-s{site.id}-hero"
+        resp = render(
+            request,
+            "home.html",
+            {
+                "app_name": "Sky Packets Portal",
+                "hero_zone_slug": hero_zone_slug,
+                "tenant_id": tenant.id,
+                "site_id": site.id,
+            },
+        )
+    _splash_cache_headers(resp, tenant, page, gzipped)
+    return resp
 
 
 @require_GET
 def splash(request: HttpRequest, tenant_id: int, site_id: int) -> HttpResponse:
     try:
-        tenant = Tenant.objects.get(id=tenant_id)
-        site = Site.objects.get(id=site_id, tenant=tenant)
+        tenant = resolve_tenant(tenant_id)
+        site = resolve_site(tenant.id, site_id)
     except (Tenant.DoesNotExist, Site.DoesNotExist) as exc:
         raise Http404 from exc
 
-    page = (
-        Page.objects.filter(tenant=tenant, site=site, status="published")
-        .order_by("-updated_at")
-        .first()
-    )
+    page = published_page(tenant.id, site.id)
     if page is None:
         raise Http404("No published page")
 
-    Event.objects.create(tenant=tenant, site=site, type="splash_view", payload_json={})
-
-    if page.html:
-        sanitized = bleach.clean(
-            page.html,
-            tags=bleach.sanitizer.ALLOWED_TAGS
-            | {"img", "video", "source", "link", "meta", "script"},
-            attributes={
-                "*": [
-                    "class",
-                    "style",
-                    "id",
-                    "href",
-                    "src",
-                    "width",
-                    "height",
-                    "type",
-                    "rel",
-                ]
-            },
-            protocols=["http", "https", "data"],
-        )
-        resp = HttpResponse(sanitized)
-        resp["Content-Security-Policy"] = (
-            "default-src 'self' https: data:; img-src 'self' https: data:; "
-            "script-src 'self' https: 'unsafe-inline'; style-src 'self' https: 'unsafe-inline'"
-        )
-        return resp
-    hero_zone_slug = f"t{tenant.id}-s{site.id}-hero"
-    return render(
-        request,
-        "home.html",
-        {
-            "app_name": "Sky Packets Portal",
-            "hero_zone_slug": hero_zone_slug,
-            "tenant_id": tenant.id,
-            "site_id": site.id,
-        },
-    )
+    record_event(tenant.id, site.id, "splash_view")
+    not_modified = _splash_not_modified(request, tenant, page)
+    if not_modified is not None:
+        return not_modified
+    return _splash_response(request, tenant, site, page, get_page_artifact(page))
 
 
 @require_GET
-def ad_decision(request: HttpRequest, tenant_id: int, site_id: int) -> JsonResponse:
-    slot = request.GET.get("slot")
+async def splash_async(request: HttpRequest, tenant_id: int, site_id: int) -> HttpResponse:
     try:
-        tenant = Tenant.objects.get(id=tenant_id)
-        site = Site.objects.get(id=site_id, tenant=tenant)
+        tenant = await aresolve_tenant(tenant_id)
+        site = await aresolve_site(tenant.id, site_id)
     except (Tenant.DoesNotExist, Site.DoesNotExist) as exc:
         raise Http404 from exc
 
-    campaign = (
-        Campaign.objects.filter(tenant=tenant, status="active").order_by("-updated_at").first()
-    )
-    creative = campaign.creatives.order_by("-updated_at").first() if campaign else None
+    page = await apublished_page(tenant.id, site.id)
+    if page is None:
+        raise Http404("No published page")
+
+    await arecord_event(tenant.id, site.id, "splash_view")
+    not_modified = _splash_not_modified(request, tenant, page)
+    if not_modified is not None:
+        return not_modified
+    return _splash_response(request, tenant, site, page, await aget_page_artifact(page))
+
 
-    payload = {"creative": None}
-    if creative is not None:
-        payload["creative"] = {
+def _ad_payload(creative, slot: str | None) -> tuple[dict, dict | None]:
+    """Return the response body and the impression payload (``None`` for no fill)."""
+    if creative is None:
+        return {"creative": None}, None
+    body = {
+        "creative": {
             "type": creative.type,
             "asset_url": creative.asset_url,
             "click_url": creative.click_url,
@@ -98,127 +178,302 @@ def ad_decision(request: HttpRequest, tenant_id: int, site_id: int) -> JsonRespo
             "height": creative.height,
             "slot": slot,
         }
-        Event.objects.create(
-            tenant=tenant,
-            site=site,
-            type="impression",
-            payload_json={
-                "slot": slot,
-                "creative_id": creative.id,
-                "campaign_id": campaign.id,
-            },
-        )
-    return JsonResponse(payload)
+    }
+    impression = {
+        "slot": slot,
+        "creative_id": creative.creative_id,
+        "campaign_id": creative.campaign_id,
+    }
+    return body, impression
+
+
+def _ad_response(tenant: TenantRecord, payload: dict, impression: dict | None) -> JsonResponse:
+    resp = JsonResponse(payload)
+    # A fill is a weighted pick that also counts an impression, so every one
+    # must reach the server; no fill only changes when campaigns do.
+    if impression is None:
+        resp["Cache-Control"] = _cache_control(tenant, "ad_no_fill")
+    else:
+        resp["Cache-Control"] = "no-store"
+    return resp
+
+
+@require_GET
+def ad_decision(request: HttpRequest, tenant_id: int, site_id: int) -> JsonResponse:
+    slot = request.GET.get("slot")
+    size = request.GET.get("size")
+    try:
+        tenant = resolve_tenant(tenant_id)
+        site = resolve_site(tenant.id, site_id)
+    except (Tenant.DoesNotExist, Site.DoesNotExist) as exc:
+        raise Http404 from exc
+
+    creative = decision_engine.decide(tenant.id, site.id, slot, size, tz=site.timezone)
+    payload, impression = _ad_payload(creative, slot)
+    if impression is not None:
+        record_event(tenant.id, site.id, "impression", impression)
+    return _ad_response(tenant, payload, impression)
+
+
+@require_GET
+async def ad_decision_async(request: HttpRequest, tenant_id: int, site_id: int) -> JsonResponse:
+    slot = request.GET.get("slot")
+    size = request.GET.get("size")
+    try:
+        tenant = await aresolve_tenant(tenant_id)
+        site = await aresolve_site(tenant.id, site_id)
+    except (Tenant.DoesNotExist, Site.DoesNotExist) as exc:
+        raise Http404 from exc
+
+    creative = await decision_engine.adecide(tenant.id, site.id, slot, size, tz=site.timezone)
+    payload, impression = _ad_payload(creative, slot)
+    if impression is not None:
+        await arecord_event(tenant.id, site.id, "impression", impression)
+    return _ad_response(tenant, payload, impression)
+
+
+def _signature_ok(request: HttpRequest, secret_salt: str) -> bool:
+    if settings.ALLOW_UNAUTH_EVENTS:
+        return True
+    signature = request.headers.get("X-Portal-Signature", "")
+    body = request.body or b""
+    secret = (secret_salt or "").encode("utf-8")
+    computed = hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, f"sha256={computed}")
 
 
 @require_POST
+@rate_limit("events")
 def event_ingest(request: HttpRequest) -> JsonResponse:
     data = request.POST or {}
     tenant_id = data.get("tenant_id")
     try:
-        tenant = Tenant.objects.get(id=tenant_id)
+        tenant = resolve_tenant(tenant_id)
     except Tenant.DoesNotExist:
         return JsonResponse({"ok": False, "error": "tenant"}, status=400)
-    signature = request.headers.get("X-Portal-Signature", "")
-    body = request.body or b""
-    secret = (tenant.secret_salt or "").encode("utf-8")
-    computed = hmac.new(secret, body, hashlib.sha256).hexdigest()
-    if not settings.ALLOW_UNAUTH_EVENTS and signature != f"sha256={computed}":
+    if not _signature_ok(request, tenant.secret_salt):
         return JsonResponse({"ok": False, "error": "sig"}, status=401)
-    Event.objects.create(
-        tenant_id=tenant_id,
-        site_id=data.get("site_id"),
-        type=data.get("type", "click"),
-        payload_json=data,
+    try:
+        site = resolve_site(tenant.id, data.get("site_id"))
+    except Site.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "site"}, status=400)
+    record_event(tenant.id, site.id, data.get("type", "click"), data)
+    return JsonResponse({"ok": True})
+
+
+@csrf_exempt
+@require_POST
+@rate_limit("events")
+def event_ingest_batch(request: HttpRequest) -> JsonResponse:
+    """NDJSON events, one JSON object per line, optionally ``Content-Encoding: gzip``.
+
+    The tenant comes from ``X-Portal-Tenant`` (or ``?tenant_id=``); lines
+    without a ``site_id`` use ``?site_id=``. One ``X-Portal-Signature`` covers
+    the uncompressed body. Valid lines are inserted together; invalid ones
+    are reported by 1-based line number and skipped. Each accepted line
+    costs one "events" rate-limit token (the request itself paid the first).
+    """
+    tenant_id = request.headers.get("X-Portal-Tenant") or request.GET.get("tenant_id")
+    try:
+        tenant = resolve_tenant(tenant_id)
+    except Tenant.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "tenant"}, status=400)
+    digest = None
+    if not settings.ALLOW_UNAUTH_EVENTS:
+        digest = hmac.new((tenant.secret_salt or "").encode("utf-8"), digestmod=hashlib.sha256)
+    gzipped = request.headers.get("Content-Encoding", "").lower() == "gzip"
+    default_site_id = request.GET.get("site_id")
+
+    # Lines are only buffered (at most EVENT_BATCH_MAX_BYTES) until the
+    # signature checks out: nothing is parsed or looked up for unsigned bodies.
+    numbered = []
+    lines = iter_ndjson_lines(
+        iter(lambda: request.read(64 * 1024), b""),
+        gzipped=gzipped,
+        digest=digest,
+        max_bytes=settings.EVENT_BATCH_MAX_BYTES,
     )
+    try:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            if len(numbered) >= settings.EVENT_BATCH_MAX_LINES:
+                return JsonResponse({"ok": False, "error": "too_many_lines"}, status=413)
+            numbered.append((number, line))
+    except BatchTooLarge:
+        return JsonResponse({"ok": False, "error": "too_large"}, status=413)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "gzip"}, status=400)
+    if digest is not None:
+        signature = request.headers.get("X-Portal-Signature", "")
+        if not hmac.compare_digest(signature, f"sha256={digest.hexdigest()}"):
+            return JsonResponse({"ok": False, "error": "sig"}, status=401)
+
+    events, rejected = [], []
+    for number, line in numbered:
+        try:
+            events.append(parse_event_line(tenant, line, default_site_id))
+        except ValueError as exc:
+            rejected.append({"line": number, "error": str(exc)})
+    limited = charge("events", request, len(events) - 1)
+    if limited is not None:
+        return limited
+    Event.objects.bulk_create(events)
+    counters.add(Event, len(events))
+    return JsonResponse({"ok": True, "accepted": len(events), "rejected": rejected})
+
+
+@require_POST
+@rate_limit("events")
+async def event_ingest_async(request: HttpRequest) -> JsonResponse:
+    data = request.POST or {}
+    tenant_id = data.get("tenant_id")
+    try:
+        tenant = await aresolve_tenant(tenant_id)
+    except Tenant.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "tenant"}, status=400)
+    if not _signature_ok(request, tenant.secret_salt):
+        return JsonResponse({"ok": False, "error": "sig"}, status=401)
+    try:
+        site = await aresolve_site(tenant.id, data.get("site_id"))
+    except Site.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "site"}, status=400)
+    await arecord_event(tenant.id, site.id, data.get("type", "click"), data)
     return JsonResponse({"ok": True})
 
 
+def _signed_site_json(request: HttpRequest) -> tuple[dict, SiteRecord] | JsonResponse:
+    """Parse a signed controller JSON body naming ``tenant_id`` and ``site_id``."""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "json"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"ok": False, "error": "json"}, status=400)
+    try:
+        tenant = resolve_tenant(data.get("tenant_id"))
+    except Tenant.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "tenant"}, status=400)
+    if not _signature_ok(request, tenant.secret_salt):
+        return JsonResponse({"ok": False, "error": "sig"}, status=401)
+    try:
+        site = resolve_site(tenant.id, data.get("site_id"))
+    except Site.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "site"}, status=400)
+    return data, site
+
+
+@csrf_exempt
+@require_POST
+def active_session_lookup(request: HttpRequest) -> JsonResponse:
+    """Signed JSON ``{"tenant_id", "site_id", "macs": [...]}`` -> open session id per MAC."""
+    parsed = _signed_site_json(request)
+    if isinstance(parsed, JsonResponse):
+        return parsed
+    data, site = parsed
+    macs = data.get("macs")
+    if not isinstance(macs, list) or not all(isinstance(mac, str) for mac in macs):
+        return JsonResponse({"ok": False, "error": "macs"}, status=400)
+    if len(macs) > settings.ACCT_MAX_BATCH:
+        return JsonResponse({"ok": False, "error": "too_many_macs"}, status=413)
+    return JsonResponse({"ok": True, "sessions": active_sessions(site.id, macs)})
+
+
+@csrf_exempt
 @require_POST
+def accounting_ingest(request: HttpRequest) -> JsonResponse:
+    """Signed JSON batch: ``{"tenant_id", "site_id", "updates": [...]}``.
+
+    Each update names a ``session_id`` or an open session's ``mac`` and carries
+    cumulative ``bytes_up``/``bytes_down``, a ``ts`` (epoch seconds or ISO 8601)
+    and an optional ``stop``.
+    """
+    parsed = _signed_site_json(request)
+    if isinstance(parsed, JsonResponse):
+        return parsed
+    data, site = parsed
+    updates = data.get("updates")
+    if not isinstance(updates, list):
+        return JsonResponse({"ok": False, "error": "updates"}, status=400)
+    if len(updates) > settings.ACCT_MAX_BATCH:
+        return JsonResponse({"ok": False, "error": "too_many_updates"}, status=413)
+    result = apply_accounting(site.id, updates)
+    return JsonResponse({"ok": True, **result.as_dict()})
+
+
+@require_POST
+@rate_limit("auth")
 def auth_clickthrough(request: HttpRequest) -> JsonResponse:
     tenant_id = int(request.POST.get("tenant_id"))
     site_id = int(request.POST.get("site_id"))
-    mac = request.POST.get("mac", "00:00:00:00:00:00")
-    tenant = Tenant.objects.get(id=tenant_id)
-    site = Site.objects.get(id=site_id, tenant=tenant)
+    mac = normalize_mac(request.POST.get("mac", "00:00:00:00:00:00"))
+    tenant = resolve_tenant(tenant_id)
+    site = resolve_site(tenant.id, site_id)
 
-    user, _ = GuestUser.objects.get_or_create(tenant=tenant, mac=mac)
+    user_id = upsert_guest(tenant, mac)
     session = Session.objects.create(
-        user=user, site=site, mac=mac, policy_json={"type": "clickthrough"}
+        user_id=user_id, site_id=site.id, mac=mac, policy_json={"type": "clickthrough"}
     )
     return JsonResponse({"ok": True, "session_id": session.id})
 
 
-def _generate_code(length: int = 6) -> str:
-    return "".join(random.choices(string.digits, k=length))
-
-
 @require_POST
+@rate_limit("otp")
 def auth_email_otp(request: HttpRequest) -> JsonResponse:
-    tenant_id = int(request.POST.get("tenant_id"))
-    email = request.POST.get("email")
-    code = _generate_code()
-    expires = timezone.now() + timezone.timedelta(minutes=10)
-    rl_key = f"otp:{tenant_id}:{email}"
-    if cache.get(rl_key):
-        return JsonResponse({"ok": False, "error": "rate_limited"}, status=429)
-    cache.set(rl_key, 1, timeout=60)
-    otp = EmailOTP.objects.create(tenant_id=tenant_id, email=email, code=code, expires_at=expires)
-    return JsonResponse({"ok": True, "otp_id": otp.id, "dev_code": code})
+    try:
+        tenant = resolve_tenant(request.POST.get("tenant_id"))
+    except Tenant.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "tenant"}, status=400)
+    code = issue_otp(tenant, request.POST.get("email"))
+    return JsonResponse({"ok": True, "dev_code": code})
 
 
 @require_POST
+@rate_limit("auth")
 def auth_email_otp_verify(request: HttpRequest) -> JsonResponse:
     tenant_id = int(request.POST.get("tenant_id"))
     site_id = int(request.POST.get("site_id"))
-    mac = request.POST.get("mac", "00:00:00:00:00:00")
-    email = request.POST.get("email")
+    mac = normalize_mac(request.POST.get("mac", "00:00:00:00:00:00"))
+    email = normalize_email(request.POST.get("email"))
     code = request.POST.get("code")
-    tenant = Tenant.objects.get(id=tenant_id)
-    site = Site.objects.get(id=site_id, tenant=tenant)
+    tenant = resolve_tenant(tenant_id)
+    site = resolve_site(tenant.id, site_id)
 
-    otp = (
-        EmailOTP.objects.filter(tenant=tenant, email=email, code=code)
-        .order_by("-created_at")
-        .first()
-    )
-    if otp is None or otp.expires_at < timezone.now():
+    if not verify_otp(tenant, email, code):
         return JsonResponse({"ok": False, "error": "invalid_or_expired"}, status=400)
-    otp.verified_at = timezone.now()
-    otp.save(update_fields=["verified_at"])
 
-    user, _ = GuestUser.objects.get_or_create(tenant=tenant, mac=mac, defaults={"email": email})
-    if not user.email:
-        user.email = email
-        user.save(update_fields=["email"])
+    user_id = upsert_guest(tenant, mac, email=email)
     session = Session.objects.create(
-        user=user, site=site, mac=mac, policy_json={"type": "email_otp"}
+        user_id=user_id, site_id=site.id, mac=mac, policy_json={"type": "email_otp"}
     )
     return JsonResponse({"ok": True, "session_id": session.id})
 
 
 @require_POST
+@rate_limit("auth")
 def auth_voucher(request: HttpRequest) -> JsonResponse:
     tenant_id = int(request.POST.get("tenant_id"))
     site_id = int(request.POST.get("site_id"))
-    mac = request.POST.get("mac", "00:00:00:00:00:00")
+    mac = normalize_mac(request.POST.get("mac", "00:00:00:00:00:00"))
     code = request.POST.get("code")
-    tenant = Tenant.objects.get(id=tenant_id)
-    site = Site.objects.get(id=site_id, tenant=tenant)
-
-    try:
-        voucher = Voucher.objects.get(tenant=tenant, code=code, status="active")
-    except Voucher.DoesNotExist:
-        return JsonResponse({"ok": False, "error": "invalid_voucher"}, status=400)
+    tenant = resolve_tenant(tenant_id)
+    site = resolve_site(tenant.id, site_id)
+
+    with transaction.atomic():
+        if not redeem_voucher(tenant.id, code, mac):
+            return JsonResponse({"ok": False, "error": "invalid_voucher"}, status=400)
+        user_id = upsert_guest(tenant, mac)
+        session = Session.objects.create(
+            user_id=user_id, site_id=site.id, mac=mac, policy_json={"type": "voucher"}
+        )
+    return JsonResponse({"ok": True, "session_id": session.id})
 
-    user, _ = GuestUser.objects.get_or_create(tenant=tenant, mac=mac)
-    session = Session.objects.create(user=user, site=site, mac=mac, policy_json={"type": "voucher"})
 
-    voucher.status = "used"
-    voucher.used_by_mac = mac
-    voucher.used_at = timezone.now()
-    voucher.save(update_fields=["status", "used_by_mac", "used_at"])
-    return JsonResponse({"ok": True, "session_id": session.id})
+@require_GET
+@staff_member_required
+def worker_metrics(request: HttpRequest) -> JsonResponse:
+    # Per worker process: each one owns its own buffer and ad snapshots.
+    return JsonResponse({"events": event_buffer.metrics(), "ads": decision_engine.metrics()})
 
 
 @require_POST
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 import environ
@@ -33,6 +34,8 @@ DEBUG = env("DEBUG")
 
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["*"])
 
+TESTING = sys.argv[1:2] == ["test"]
+
 
 # Application definition
 
@@ -84,6 +87,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "portalopenwisp.wsgi.application"
 
+# Route splash/ads/event ingest to their async views; enable when serving via ASGI.
+PORTAL_ASYNC_VIEWS = env.bool("PORTAL_ASYNC_VIEWS", default=False)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -95,6 +101,10 @@ DATABASES = {
     }
 }
 
+# Covering indexes (INCLUDE columns) only take effect on PostgreSQL; SQLite
+# builds them as plain composite indexes.
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -147,8 +157,99 @@ AWS_QUERYSTRING_AUTH = env.bool("AWS_QUERYSTRING_AUTH", default=True)  # signed
 
 ALLOW_UNAUTH_EVENTS = env.bool("ALLOW_UNAUTH_EVENTS", default=False)
 
+# Write-behind Event ingestion: rows are flushed with bulk_create by size or age
+EVENT_BUFFER_ENABLED = env.bool("EVENT_BUFFER_ENABLED", default=not TESTING)
+EVENT_BUFFER_MAX_SIZE = env.int("EVENT_BUFFER_MAX_SIZE", default=500)
+EVENT_BUFFER_MAX_AGE = env.float("EVENT_BUFFER_MAX_AGE", default=2.0)
+EVENT_BUFFER_MAX_PENDING = env.int("EVENT_BUFFER_MAX_PENDING", default=50_000)
+
+# Batched event ingest (/e/batch): limits per request, after decompression
+EVENT_BATCH_MAX_BYTES = env.int("EVENT_BATCH_MAX_BYTES", default=8 * 1024 * 1024)
+EVENT_BATCH_MAX_LINES = env.int("EVENT_BATCH_MAX_LINES", default=10_000)
+
+# Session accounting: most updates a controller may send in one request
+ACCT_MAX_BATCH = env.int("ACCT_MAX_BATCH", default=20_000)
+
+# Token-bucket rate limits per scope and key: "N/period" allows a burst of N, refilling
+# at N per period. Shared through Redis when REDIS_URL is set, else per process.
+# Guests of a venue usually share one NAT address, so there is no per-IP bucket
+# unless RATE_LIMIT_IP_<SCOPE> sets one (e.g. RATE_LIMIT_IP_AUTH=600/m).
+RATE_LIMIT_ENABLED = env.bool("RATE_LIMIT_ENABLED", default=not TESTING)
+RATE_LIMITS = {
+    "auth": {"mac": "10/m", "tenant": "6000/m"},
+    "otp": {"email": "1/m", "tenant": "600/m"},
+    "events": {"tenant": "2000/s"},
+}
+for _scope, _limits in RATE_LIMITS.items():
+    _ip_rate = env(f"RATE_LIMIT_IP_{_scope.upper()}", default="")
+    if _ip_rate:
+        _limits["ip"] = _ip_rate
+
+# Email OTPs live in the cache, hashed; EmailOTP rows are only a batched audit trail
+EMAIL_OTP_TTL = env.int("EMAIL_OTP_TTL", default=60 * 10)
+EMAIL_OTP_MAX_ATTEMPTS = env.int("EMAIL_OTP_MAX_ATTEMPTS", default=5)
+EMAIL_OTP_AUDIT = env.bool("EMAIL_OTP_AUDIT", default=True)
+EMAIL_OTP_RETENTION_DAYS = env.int("EMAIL_OTP_RETENTION_DAYS", default=30)
+
+# Active-session index: a site is reloaded from the DB at least this often
+SESSION_INDEX_TTL = env.int("SESSION_INDEX_TTL", default=60 * 60 * 6)
+
+# Event retention: older events move to gzip NDJSON archives, one per tenant per day.
+# Tenant.settings_json["event_retention_days"] overrides the default horizon.
+EVENT_RETENTION_DAYS = env.int("EVENT_RETENTION_DAYS", default=90)
+EVENT_ARCHIVE_ROOT = env.path("EVENT_ARCHIVE_ROOT", default=BASE_DIR / "archive" / "events")
+
+# Ad decision snapshots: how often each process checks for campaign changes, and the
+# age at which it recompiles anyway (the only bound across processes without Redis)
+ADS_SNAPSHOT_CHECK_INTERVAL = env.float("ADS_SNAPSHOT_CHECK_INTERVAL", default=1.0)
+ADS_SNAPSHOT_MAX_AGE = env.float("ADS_SNAPSHOT_MAX_AGE", default=60.0)
+
+# Admin dashboard tile counts: kept in the cache by signals and bulk-write hooks and
+# recounted by `reconcile_counters`. Past COUNTER_EXACT_LIMIT rows a recount uses the
+# PostgreSQL planner estimate instead of COUNT(*).
+DASHBOARD_COUNTERS = [
+    "core.Tenant",
+    "core.Brand",
+    "core.Site",
+    "core.SSID",
+    "core.Controller",
+    "contentmgmt.Page",
+    "ads.Campaign",
+    "ads.Creative",
+    "ads.Event",
+    "authsvc.Session",
+]
+COUNTER_TTL = env.int("COUNTER_TTL", default=60 * 60 * 24)
+COUNTER_EXACT_LIMIT = env.int("COUNTER_EXACT_LIMIT", default=100_000)
+
+# Page publishing: concurrent existence checks/uploads against the file storage
+PUBLISH_UPLOAD_WORKERS = env.int("PUBLISH_UPLOAD_WORKERS", default=8)
+
+# Sanitized splash artifacts are cached per page rev; a miss re-sanitizes.
+PAGE_ARTIFACT_TTL = env.int("PAGE_ARTIFACT_TTL", default=60 * 60 * 24)
+# Which page a site serves is cached too; Page saves evict it, the TTL bounds site moves.
+PAGE_LOOKUP_TTL = env.int("PAGE_LOOKUP_TTL", default=60)
+
+# Cache-Control per response kind; Tenant.settings_json["cache_control"] overrides each.
+# Splash is revalidated on every connect (cheap: 304 from the page rev); an ad no-fill
+# is cacheable briefly, while a fill is always "no-store" since it counts an impression.
+CACHE_CONTROL = {
+    "splash": env("SPLASH_CACHE_CONTROL", default="public, max-age=0, must-revalidate"),
+    "ad_no_fill": env("AD_NO_FILL_CACHE_CONTROL", default="public, max-age=30"),
+}
+
+# Endpoint budget tests (portal.tests.EndpointBudgetTests) always enforce query counts;
+# times are only reported unless PERF_BUDGET_ENFORCE_TIME is set, and the time scale
+# loosens max_ms on slow runners. Measurements are written to PERF_BUDGET_REPORT if set.
+PERF_BUDGET_REPORT = env("PERF_BUDGET_REPORT", default="")
+PERF_BUDGET_ENFORCE_TIME = env.bool("PERF_BUDGET_ENFORCE_TIME", default=False)
+PERF_BUDGET_TIME_SCALE = env.float("PERF_BUDGET_TIME_SCALE", default=1.0)
+
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # Cursor pages; clients may ask for up to 1000 rows with ?page_size=
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.TimestampCursorPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=100),
 }
 
 # Caches (Redis if REDIS_URL provided, else local memory)
@@ -171,6 +272,16 @@ else:
         }
     }
 
+# The active-session index (authsvc.presence) is only correct in a cache every worker
+# shares; with the per-process memory cache, lookups go to the database instead.
+SESSION_INDEX_ENABLED = env.bool("SESSION_INDEX_ENABLED", default=bool(REDIS_URL))
+
+# Tenant/site resolver: per-process LRU in front of the cache above. Edits reach other
+# workers within RESOLVER_LOCAL_TTL only with Redis; otherwise within RESOLVER_CACHE_TTL.
+RESOLVER_LOCAL_SIZE = env.int("RESOLVER_LOCAL_SIZE", default=4096)
+RESOLVER_LOCAL_TTL = env.float("RESOLVER_LOCAL_TTL", default=30.0)
+RESOLVER_CACHE_TTL = env.int("RESOLVER_CACHE_TTL", default=60 * 60)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,6 +1,8 @@
 from django import template
 from django.apps import apps
 
+from core.counters import get_count
+
 register = template.Library()
 
 
@@ -9,7 +11,7 @@ def model_count(model_path: str) -> int:
     try:
         app_label, model_name = model_path.split(".")
         model = apps.get_model(app_label, model_name)
-        return model.objects.count()
+        return get_count(model)
     except Exception:
         return 0
 
@@ -18,6 +20,6 @@ def model_count(model_path: str) -> int:
 def model_count2(app_label: str, object_name: str) -> int:
     try:
         model = apps.get_model(app_label, object_name)
-        return model.objects.count()
+        return get_count(model)
     except Exception:
         return 0
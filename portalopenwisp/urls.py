@@ -20,6 +20,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from ads.views import CampaignViewSet, CreativeViewSet, EventViewSet, SlotViewSet
+from authsvc.views import VoucherViewSet
 from contentmgmt.views import PageViewSet
 from core.views import BrandViewSet, ControllerViewSet, SiteViewSet, SSIDViewSet, TenantViewSet
 
@@ -34,10 +35,12 @@ router.register(r"campaigns", CampaignViewSet)
 router.register(r"creatives", CreativeViewSet)
 router.register(r"slots", SlotViewSet)
 router.register(r"events", EventViewSet)
+router.register(r"vouchers", VoucherViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("home.urls")),
     path("", include("portal.urls")),
+    path("api/admin/", include("analytics.urls")),
     path("api/admin/", include(router.urls)),
 ]